@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+
+import argparse
+import gzip
+import os
+import resource
+import shutil
+import struct
+import tempfile
+import uuid
+from harness import emit, load, timed
+
+"""
+.blend block parser benchmark: lists the IDs and assets of synthetic .blend files from 100 MB to 2 GB, uncompressed
+(memory-mapped) and optionally gzip or Zstandard compressed (streamed). Reports time and peak memory use.
+
+    python3 benchmarks/bench_blendfile.py [--sizes-mb 100 500 2000] [--codecs none gzip zstd] [--ids 1000]
+
+The synthetic files have Blender's layout (header, ID blocks each followed by DATA blocks, DNA1, ENDB) with a minimal
+DNA describing only the ID struct, which is all the parser needs. Damaged and junk files are checked first, to make sure
+the parser rejects them all with BlendFileException.
+"""
+
+blendfile = load("lib.blendfile")
+
+DATA_BLOCK_SIZE = 1024 * 1024
+_BHEAD = struct.Struct("<4siQii")
+
+
+def _dna() -> bytes:
+    def strings(tag: bytes, items: list[str]) -> bytes:
+        body = tag + struct.pack("<i", len(items)) + b"".join(s.encode() + b"\0" for s in items)
+        return body + b"\0" * (-len(body) % 4)
+
+    names = ["*next", "*prev", "*newid", "*lib", "*asset_data", "name[66]", "flag", "*local_type_info",
+             "*properties", "catalog_id"]
+    types = ["char", "short", "int", "void", "ID", "Library", "AssetMetaData", "bUUID"]
+    lengths = [1, 2, 4, 0, 108, 0, 32, 16]
+    structs = [
+        (4, [(3, 0), (3, 1), (4, 2), (5, 3), (6, 4), (0, 5), (1, 6)]),
+        (6, [(3, 7), (3, 8), (7, 9)]),
+    ]
+    dna = b"SDNA" + strings(b"NAME", names) + strings(b"TYPE", types)
+    tlen = b"TLEN" + struct.pack(f"<{len(lengths)}h", *lengths)
+    dna += tlen + b"\0" * (-len(tlen) % 4)
+    dna += b"STRC" + struct.pack("<i", len(structs))
+    for type_index, fields in structs:
+        dna += struct.pack("<hh", type_index, len(fields))
+        dna += b"".join(struct.pack("<hh", t, n) for t, n in fields)
+    return dna
+
+
+def _block(code: bytes, body: bytes, old: int = 0) -> bytes:
+    return _BHEAD.pack(code, len(body), old, 0, 1) + body
+
+
+def write_synthetic_blend(filepath: str, size: int, id_count: int, codec: str | None) -> None:
+    payload = os.urandom(DATA_BLOCK_SIZE)
+    data_blocks = size // DATA_BLOCK_SIZE
+    opener = {None: open, "gzip": lambda p, m: gzip.open(p, m, compresslevel=1)}.get(codec)
+    if codec == "zstd":
+        import zstandard
+        raw = open(filepath, "wb")
+        fh = zstandard.ZstdCompressor(level=1).stream_writer(raw, closefd=True)
+    else:
+        fh = opener(filepath, "wb")
+    with fh:
+        fh.write(b"BLENDER-v402")
+        fh.write(_block(b"GLOB", b"\0" * 64))
+        for i in range(id_count):
+            # Every tenth ID is marked as an asset
+            asset_data = 0x1000 + i if i % 10 == 0 else 0
+            name = f"OBObject {i}".encode().ljust(66, b"\0")
+            fh.write(_block(b"OB\0\0", struct.pack("<QQQQQ", 0, 0, 0, 0, asset_data) + name + b"\0" * 6))
+            if asset_data:
+                fh.write(_block(b"DATA", b"\0" * 16 + uuid.UUID(int=i).bytes, asset_data))
+            # Spread the data blocks evenly over the IDs
+            for _ in range(data_blocks * (i + 1) // id_count - data_blocks * i // id_count):
+                fh.write(_block(b"DATA", payload))
+        fh.write(_block(b"DNA1", _dna()))
+        fh.write(_BHEAD.pack(b"ENDB", 0, 0, 0, 0))
+
+
+def _malformed_variants(valid: bytes) -> dict[str, bytes]:
+    """Broken versions of a small valid file, each of which must be rejected with BlendFileException"""
+    dna_at = valid.index(b"DNA1")
+    endb_at = valid.index(b"ENDB")
+    dna_body = valid[dna_at + _BHEAD.size:endb_at]
+    # Point the ID struct at a type index that doesn't exist
+    bad_type = dna_body.replace(struct.pack("<hh", 4, 7), struct.pack("<hh", 99, 7), 1)
+    return {
+        "empty": b"",
+        "not_blend": b"PK\x03\x04" + valid[4:],
+        "bad_version": b"BLENDER-vXYZ" + valid[12:],
+        "bad_header_size": b"BLENDER05" + valid[9:],
+        "truncated": valid[:len(valid) // 2],
+        "no_endb": valid[:endb_at],
+        "short_dna": valid[:dna_at] + _block(b"DNA1", dna_body[:20]) + valid[endb_at:],
+        "bad_dna_index": valid[:dna_at] + _block(b"DNA1", bad_type) + valid[endb_at:],
+        "negative_length": valid[:12] + _BHEAD.pack(b"GLOB", -64, 0, 0, 1) + valid[12 + _BHEAD.size:],
+        "huge_dna": valid[:dna_at] + _BHEAD.pack(b"DNA1", 2 ** 31 - 1, 0, 0, 1) + dna_body + valid[endb_at:],
+        "corrupt_gzip": gzip.compress(valid)[:200] + os.urandom(64),
+        "corrupt_zstd": b"\x28\xb5\x2f\xfd" + os.urandom(256),
+    }
+
+
+def check_malformed(work_dir: str) -> None:
+    """Make sure that junk and damaged files raise BlendFileException, which callers expect, and nothing else"""
+    filepath = os.path.join(work_dir, "valid.blend")
+    write_synthetic_blend(filepath, 0, 20, None)
+    with open(filepath, "rb") as fh:
+        valid = fh.read()
+    variants = _malformed_variants(valid)
+    failures = {}
+    for name, data in variants.items():
+        path = os.path.join(work_dir, f"malformed_{name}.blend")
+        with open(path, "wb") as fh:
+            fh.write(data)
+        try:
+            blendfile.read_info(path)
+            failures[name] = "accepted"
+        except blendfile.BlendFileException:
+            pass
+        except OSError as e:
+            # Callers handle these too, e.g., a gzip header that's bad from the start
+            if name not in ("corrupt_gzip", "corrupt_zstd"):
+                failures[name] = repr(e)
+        except Exception as e:
+            failures[name] = repr(e)
+        os.remove(path)
+    os.remove(filepath)
+    emit("blendfile.malformed", checked=len(variants), failures=failures)
+    if failures:
+        raise SystemExit(f"Malformed files weren't rejected with BlendFileException: {failures}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes-mb", type=int, nargs="+", default=[100, 500, 2000])
+    parser.add_argument("--codecs", nargs="+", default=["none"], choices=["none", "gzip", "zstd"])
+    parser.add_argument("--ids", type=int, default=1000, help="ID blocks per file")
+    parser.add_argument("--dir", default=None, help="Where to write the test files (default: the temp directory)")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="bench_blendfile_", dir=args.dir)
+    try:
+        check_malformed(work_dir)
+        for codec in args.codecs:
+            for size_mb in args.sizes_mb:
+                filepath = os.path.join(work_dir, f"synthetic_{size_mb}_{codec}.blend")
+                write_synthetic_blend(filepath, size_mb * 1024 * 1024, args.ids, None if codec == "none" else codec)
+
+                blendfile._cache.clear()
+                rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+                with timed("blendfile.read_info", size_mb=size_mb, codec=codec, cache="cold",
+                           file_bytes=os.path.getsize(filepath)):
+                    info = blendfile.read_info(filepath)
+                with timed("blendfile.read_info", size_mb=size_mb, codec=codec, cache="warm"):
+                    blendfile.read_info(filepath)
+                emit("blendfile.read_info.result", size_mb=size_mb, codec=codec, ids=len(info.ids),
+                     assets=len(info.assets), catalogs=len({a.catalog_id for a in info.assets if a.catalog_id}),
+                     blocks=info.block_count,
+                     peak_rss_growth_kb=resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before)
+                os.remove(filepath)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+
+import argparse
+import os
+import shutil
+import tempfile
+import uuid
+from harness import load, timed
+
+"""
+Catalog merge benchmark: merges a handful of new catalogs into destination cats files of increasing size, cold
+(first parse) and warm (cached UUID index).
+
+    python3 benchmarks/bench_cats.py [--sizes 1000 10000 100000]
+"""
+
+cats = load("lib.cats")
+
+
+def cats_text(count: int, prefix: str = "Library") -> str:
+    lines = ["# This is an Asset Catalog Definition file for Blender.", "", "VERSION 1", ""]
+    lines += [f"{uuid.uuid4()}:{prefix}/Catalog {i}:{prefix}-Catalog {i}" for i in range(count)]
+    return "\n".join(lines) + "\n"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--new", type=int, default=10, help="New catalogs added per merge")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="bench_cats_")
+    try:
+        for size in args.sizes:
+            library = os.path.join(work_dir, f"lib_{size}")
+            os.mkdir(library)
+            with open(os.path.join(library, cats.CATS_FILENAME), "w", encoding="utf-8") as fh:
+                fh.write(cats_text(size))
+
+            with timed("cats.merge_catalogs", lines=size, cache="cold", new=args.new):
+                cats.merge_catalogs(library, cats_text(args.new, "New"))
+            with timed("cats.merge_catalogs", lines=size, cache="warm", new=args.new):
+                cats.merge_catalogs(library, cats_text(args.new, "Newer"))
+            with timed("cats.merge_catalogs", lines=size, cache="warm", new=0):
+                cats.merge_catalogs(library, cats_text(0))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+import types
+import uuid
+from contextlib import contextmanager
+from harness import PACKAGE, emit, install_fake_bpy, load, timed
+from fake_bpy import install_preferences, make_fake_asset_data, make_fake_id
+
+"""
+Publish path benchmark: times each phase of COPYTOASSETLIBRARY_OT_copy.execute() (preflight, save/stage, backup,
+copy, catalog merge) and the whole of execute(), on plain CPython with a fake bpy. Also times preflight's external
+file audit, cold and warm, with every stat delayed by --latency-ms as on a network share.
+
+    python3 benchmarks/bench_publish.py [--ids 1000 10000 100000 1000000] [--file-mb 100]
+                                        [--filesystems disk tmpfs throttled] [--textures 500]
+
+Filesystems:
+    disk       the system temp directory
+    tmpfs      /dev/shm, to take the drive out of the picture
+    throttled  the temp directory, with every data-writing syscall slowed to --throttle-mbps and every rename, link
+               and replace delayed by --latency-ms, to stand in for a slow network drive
+"""
+
+bpy = install_fake_bpy()
+backups = load("lib.backups")
+cats = load("lib.cats")
+dependencies = load("lib.dependencies")
+preflight = load("lib.preflight")
+publish = load("lib.publish")
+transfer = load("lib.transfer")
+copy_operator = load("operator.copy")
+preferences = load("panel.preferences")
+
+
+def populate(id_count: int) -> None:
+    """Fill bpy.data with id_count synthetic IDs. Only the very last one is an asset, and every image is unpacked with
+    an absolute path, so preflight has to look at everything (its worst case)."""
+    for collection in ("objects", "materials", "node_groups", "images", "libraries"):
+        getattr(bpy.data, collection).clear()
+    shares = {"objects": 0.6, "materials": 0.2, "node_groups": 0.15, "images": 0.05}
+    for collection, share in shares.items():
+        items = getattr(bpy.data, collection)
+        for i in range(max(1, int(id_count * share))):
+            items.append(make_fake_id(f"{collection} {i}", filepath=f"/textures/{i}.png", packed_file=None))
+    bpy.data.objects[-1].asset_data = make_fake_asset_data()
+    bpy.data.objects[-1].id_type = 'OBJECT'
+    for i in range(3):
+        bpy.data.libraries.append(make_fake_id(f"library {i}", filepath=f"/libraries/{i}.blend", packed_file=None,
+                                               users_id=[None] * 5))
+
+
+def cats_text(count: int, prefix: str) -> str:
+    lines = ["# This is an Asset Catalog Definition file for Blender.", "", "VERSION 1", ""]
+    lines += [f"{uuid.uuid4()}:{prefix}/Catalog {i}:{prefix}-Catalog {i}" for i in range(count)]
+    return "\n".join(lines) + "\n"
+
+
+@contextmanager
+def throttled(mbps: float, latency_ms: float):
+    """Slow down the syscalls that write data or change directory entries, process-wide"""
+    bytes_per_second = mbps * 1024 * 1024
+    originals = {name: getattr(os, name) for name in ("write", "sendfile", "copy_file_range", "rename", "replace",
+                                                      "link") if hasattr(os, name)}
+
+    def data_call(fn):
+        def wrapper(*args, **kwargs):
+            written = fn(*args, **kwargs)
+            time.sleep(written / bytes_per_second)
+            return written
+        return wrapper
+
+    def metadata_call(fn):
+        def wrapper(*args, **kwargs):
+            time.sleep(latency_ms / 1000)
+            return fn(*args, **kwargs)
+        return wrapper
+
+    for name, fn in originals.items():
+        setattr(os, name, data_call(fn) if name in ("write", "sendfile", "copy_file_range") else metadata_call(fn))
+    try:
+        yield
+    finally:
+        for name, fn in originals.items():
+            setattr(os, name, fn)
+
+
+def bench_preflight(id_counts: list[int]) -> None:
+    operator = copy_operator.COPYTOASSETLIBRARY_OT_copy()
+    for id_count in id_counts:
+        populate(id_count)
+        preflight.invalidate()
+        with timed("publish.preflight", ids=id_count, cache="cold"):
+            operator._preflight(bpy.context)
+        with timed("publish.preflight", ids=id_count, cache="warm"):
+            operator._preflight(bpy.context)
+
+
+@contextmanager
+def slow_stat(latency_ms: float):
+    original = os.stat
+
+    def wrapper(*args, **kwargs):
+        time.sleep(latency_ms / 1000)
+        return original(*args, **kwargs)
+
+    os.stat = wrapper
+    try:
+        yield
+    finally:
+        os.stat = original
+
+
+def bench_audit(texture_count: int, latency_ms: float) -> None:
+    work_dir = tempfile.mkdtemp(prefix="bench_audit_")
+    try:
+        bpy.data.filepath = os.path.join(work_dir, "project", "asset_101.blend")
+        library = os.path.join(work_dir, "library")
+        populate(0)
+        bpy.data.images.clear()
+        for folder in range(4):
+            os.makedirs(os.path.join(work_dir, "project", f"textures{folder}"))
+        for i in range(texture_count):
+            relative = f"textures{i % 4}/{i}.png"
+            # Every tenth texture is missing
+            if i % 10:
+                with open(os.path.join(work_dir, "project", relative), "wb") as fh:
+                    fh.write(b"\0" * 4096)
+            bpy.data.images.append(make_fake_id(f"texture {i}", filepath=f"//{relative}", packed_file=None,
+                                                library=None))
+        with slow_stat(latency_ms):
+            for cache in ("cold", "warm"):
+                with timed("publish.dependency_audit", textures=texture_count, latency_ms=latency_ms, cache=cache):
+                    audit = dependencies.audit([library])
+        emit("publish.dependency_audit.result", missing=len(audit.missing), unresolvable=len(audit.unresolvable),
+             timed_out=len(audit.timed_out), total_bytes=audit.total_bytes)
+        # Overwriting a texture in place doesn't change its directory, but has to show in the next audit
+        with open(os.path.join(work_dir, "project", "textures1", "1.png"), "wb") as fh:
+            fh.write(b"\0" * 8192)
+        emit("publish.dependency_audit.overwritten", total_bytes_change=dependencies.audit([library]).total_bytes
+             - audit.total_bytes)
+    finally:
+        dependencies.shutdown()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def bench_filesystem(filesystem: str, base_dir: str, file_mb: int, cats_lines: int) -> None:
+    work_dir = tempfile.mkdtemp(prefix="bench_publish_", dir=base_dir)
+    try:
+        source = os.path.join(work_dir, "asset_101.blend")
+        with open(source, "wb") as fh:
+            for _ in range(file_mb):
+                fh.write(os.urandom(1024 * 1024))
+        library = os.path.join(work_dir, "library")
+        os.mkdir(library)
+        with open(os.path.join(library, cats.CATS_FILENAME), "w", encoding="utf-8") as fh:
+            fh.write(cats_text(cats_lines, "Library"))
+
+        bpy.data.filepath = source
+        bpy.data.texts.clear()
+        bpy.data.texts.append(types.SimpleNamespace(name=cats.CATS_FILENAME,
+                                                    as_string=lambda: cats_text(20, "Source")))
+        populate(1000)
+        prefs = install_preferences(bpy, PACKAGE, preferences.COPYTOASSETLIBRARY_PT_preferences,
+                                    skip_preflight=True, append_catalog=True)
+        operator = copy_operator.COPYTOASSETLIBRARY_OT_copy(path=library)
+        operator._reencode_level = None
+        operator._phases = []
+        fields = {"filesystem": filesystem, "file_mb": file_mb}
+        destination = os.path.join(library, "asset_latest.blend")
+
+        throttle = throttled(ARGS.throttle_mbps, ARGS.latency_ms) if filesystem == "throttled" else None
+        if throttle:
+            throttle.__enter__()
+        try:
+            with timed("publish.save_to_temp", **fields):
+                staged = operator._save_copy(destination, prefs)
+            with timed("publish.copy", **fields):
+                transfer.copy_file(staged, destination)
+            with timed("publish.backup", style="blend1", **fields):
+                publish.backup_existing(destination)
+            with timed("publish.backup", style="store", **fields):
+                backups.store(destination)
+            operator._cleanup_temp()
+            with timed("publish.catalog_merge", catalog_lines=cats_lines, **fields):
+                cats.append_catalogs_from_current_file(library)
+
+            for skip_unchanged in (False, True):
+                prefs.skip_unchanged = skip_unchanged
+                with timed("publish.execute", skip_unchanged=skip_unchanged, **fields):
+                    result = operator.execute(bpy.context)
+                emit("publish.execute.result", result=sorted(result), reports=[m for _, m in operator.reports[-1:]],
+                     **fields)
+        finally:
+            if throttle:
+                throttle.__exit__(None, None, None)
+            backups.shutdown()
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def main() -> None:
+    global ARGS
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ids", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument("--file-mb", type=int, default=100)
+    parser.add_argument("--cats-lines", type=int, default=100_000, help="Catalogs in the library's catalog file")
+    parser.add_argument("--filesystems", nargs="+", default=["disk", "tmpfs", "throttled"],
+                        choices=["disk", "tmpfs", "throttled"])
+    parser.add_argument("--throttle-mbps", type=float, default=50.0)
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    parser.add_argument("--textures", type=int, default=500, help="External textures for the dependency audit")
+    ARGS = parser.parse_args()
+
+    bench_preflight(ARGS.ids)
+    bench_audit(ARGS.textures, ARGS.latency_ms)
+    for filesystem in ARGS.filesystems:
+        base_dir = "/dev/shm" if filesystem == "tmpfs" else None
+        if base_dir and not os.path.isdir(base_dir):
+            emit("publish.skipped", filesystem=filesystem, reason=f"{base_dir} doesn't exist")
+            continue
+        bench_filesystem(filesystem, base_dir, ARGS.file_mb, ARGS.cats_lines)
+
+
+if __name__ == "__main__":
+    main()
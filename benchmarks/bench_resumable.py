@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+
+import argparse
+import errno
+import filecmp
+import os
+import random
+import shutil
+import tempfile
+from harness import emit, load, timed
+
+"""
+Resumable transfer benchmark and fault check: copies a file into a local directory with lib/resumable.py while
+injecting I/O errors into a share of the writes and read-backs, then checks the copy is identical. Also times the
+same copy with no faults, with the fast copy engine for comparison, with a bandwidth cap, and resuming after a
+cancelled copy.
+
+    python3 benchmarks/bench_resumable.py [--file-mb 256] [--fault-rate 0.02] [--bandwidth-mbps 100]
+"""
+
+resumable = load("lib.resumable")
+transfer = load("lib.transfer")
+jobs = load("lib.jobs")
+
+
+def faults(rate: float, seed: int = 1):
+    rng = random.Random(seed)
+    counts = {"injected": 0}
+
+    def hook(operation: str, offset: int) -> None:
+        if rng.random() < rate:
+            counts["injected"] += 1
+            raise OSError(errno.EIO, f"Injected {operation} fault at {offset}")
+    return hook, counts
+
+
+class _CancelAfter:
+    """Enough of a BackgroundJob for copy_file(): cancels itself once progress passes a fraction"""
+
+    def __init__(self, fraction: float):
+        self.fraction = fraction
+        self.progress = 0.0
+
+    def check_cancelled(self) -> None:
+        if self.progress >= self.fraction:
+            raise jobs.JobCancelled()
+
+    def sleep(self, seconds: float) -> None:
+        self.check_cancelled()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--file-mb", type=int, default=256)
+    parser.add_argument("--fault-rate", type=float, default=0.02, help="Share of writes/read-backs that fail")
+    parser.add_argument("--bandwidth-mbps", type=float, default=100.0)
+    args = parser.parse_args()
+    # Retry straight away, the faults aren't a real network that needs time to come back
+    resumable.RETRY_DELAY = 0.0
+
+    work_dir = tempfile.mkdtemp(prefix="bench_resumable_")
+    try:
+        source = os.path.join(work_dir, "source.blend")
+        with open(source, "wb") as fh:
+            for _ in range(args.file_mb):
+                fh.write(os.urandom(1024 * 1024))
+        library = os.path.join(work_dir, "library")
+        os.mkdir(library)
+        partial = resumable.partial_path(os.path.join(library, "asset_latest.blend"))
+        fields = {"file_mb": args.file_mb}
+
+        with timed("resumable.fast_copy", **fields):
+            transfer.copy_file(source, os.path.join(library, "fast.blend"))
+        with timed("resumable.copy", faults=0.0, **fields):
+            stats = resumable.copy_file(source, partial, resumable.Options())
+        emit("resumable.copy.result", identical=filecmp.cmp(source, partial, shallow=False), bytes=stats.bytes,
+             **fields)
+        os.remove(partial)
+
+        hook, counts = faults(args.fault_rate)
+        resumable.set_fault_hook(hook)
+        try:
+            with timed("resumable.copy", faults=args.fault_rate, **fields):
+                stats = resumable.copy_file(source, partial, resumable.Options(retries=10_000))
+        finally:
+            resumable.set_fault_hook(None)
+        emit("resumable.copy.result", faults=args.fault_rate, injected=counts["injected"],
+             identical=filecmp.cmp(source, partial, shallow=False), bytes=stats.bytes, **fields)
+        os.remove(partial)
+
+        try:
+            resumable.copy_file(source, partial, resumable.Options(), _CancelAfter(0.5))
+        except jobs.JobCancelled:
+            pass
+        with timed("resumable.copy", resumed_after_cancel=True, **fields):
+            stats = resumable.copy_file(source, partial, resumable.Options())
+        emit("resumable.copy.result", resumed_after_cancel=True, bytes_copied=stats.bytes,
+             identical=filecmp.cmp(source, partial, shallow=False), **fields)
+        os.remove(partial)
+
+        with timed("resumable.copy", bandwidth_mbps=args.bandwidth_mbps, **fields):
+            resumable.copy_file(source, partial, resumable.Options(args.bandwidth_mbps * 1024 * 1024))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
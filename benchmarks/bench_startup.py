@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+
+import argparse
+import importlib.util
+import os
+import subprocess
+import sys
+import time
+from contextlib import redirect_stdout
+from harness import PACKAGE, SRC, emit, install_fake_bpy
+
+"""
+Add-on startup benchmark: imports the add-on and runs its register() with the stand-in bpy, in a fresh interpreter
+each run, and reports the import and register times, which of the add-on's modules were loaded at startup and which
+were deferred until first use (see lib/lazy.py), and what loading the deferred ones costs on the first publish.
+
+    python3 benchmarks/bench_startup.py [--runs 5]
+"""
+
+
+def _one_run() -> None:
+    bpy = install_fake_bpy()
+    bpy.types.TOPBAR_MT_file = type("TOPBAR_MT_file", (), {"append": staticmethod(lambda fn: None),
+                                                            "remove": staticmethod(lambda fn: None)})
+    before = set(sys.modules)
+    # The add-on's own logging goes to stderr so stdout stays machine-readable
+    with redirect_stdout(sys.stderr):
+        start = time.perf_counter()
+        spec = importlib.util.spec_from_file_location(PACKAGE, os.path.join(SRC, "__init__.py"),
+                                                      submodule_search_locations=[SRC])
+        package = importlib.util.module_from_spec(spec)
+        sys.modules[PACKAGE] = package
+        spec.loader.exec_module(package)
+        imported = time.perf_counter() - start
+        start = time.perf_counter()
+        package.register()
+        registered = time.perf_counter() - start
+
+    lazy = sys.modules[f"{PACKAGE}.lib.lazy"]
+    added = [name for name in set(sys.modules) - before if name.startswith(PACKAGE)]
+    deferred = sorted(name for name in added if not lazy.is_loaded(sys.modules[name]))
+    stdlib_loaded = sorted(name for name in set(sys.modules) - before
+                           if not name.startswith(PACKAGE) and lazy.is_loaded(sys.modules[name]) and "." not in name)
+    with redirect_stdout(sys.stderr):
+        start = time.perf_counter()
+        lazy.load_all()
+        first_use = time.perf_counter() - start
+    emit("startup", import_ms=round(imported * 1000, 2), register_ms=round(registered * 1000, 2),
+         first_use_ms=round(first_use * 1000, 2), modules_loaded=len(added) - len(deferred),
+         modules_deferred=len(deferred), deferred=deferred, other_modules_loaded=stdlib_loaded)
+    with redirect_stdout(sys.stderr):
+        package.unregister()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--one-run", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.one_run:
+        _one_run()
+        return
+    # Each run needs a fresh interpreter, or everything is already imported
+    for _ in range(args.runs):
+        subprocess.run([sys.executable, os.path.abspath(__file__), "--one-run"], check=True,
+                       cwd=os.path.dirname(os.path.abspath(__file__)), stderr=subprocess.DEVNULL)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+import os
+import shutil
+import types
+
+"""
+A stand-in for Blender's bpy module, with just enough of the API for the add-on's modules (including its operators)
+to import and run on plain CPython. bpy.data is a plain namespace that benchmarks fill with synthetic IDs, and
+bpy.ops.wm.save_as_mainfile() "saves" by copying the working file.
+"""
+
+
+class _Property:
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+
+    @property
+    def default(self):
+        if "default" in self.kwargs:
+            return self.kwargs["default"]
+        return {"string": "", "bool": False, "int": 0, "float": 0.0}.get(self.kwargs["_kind"])
+
+
+def _prop_fn(kind: str):
+    def prop(**kwargs) -> _Property:
+        return _Property(_kind=kind, **kwargs)
+    return prop
+
+
+def _annotated_defaults(cls) -> dict:
+    defaults = {}
+    for klass in reversed(cls.__mro__):
+        for name, prop in getattr(klass, "__annotations__", {}).items():
+            if isinstance(prop, _Property):
+                default = prop.default
+                if prop.kwargs.get("_kind") == "collection":
+                    default = []
+                defaults[name] = default
+    return defaults
+
+
+class _Struct:
+    """Base for the fake bpy.types classes. Instances get their annotated properties' defaults as attributes."""
+
+    def __init__(self, **overrides):
+        for name, value in {**_annotated_defaults(type(self)), **overrides}.items():
+            setattr(self, name, value)
+
+
+class Operator(_Struct):
+    def __init__(self, **overrides):
+        super().__init__(**overrides)
+        self.reports: list[tuple[set, str]] = []
+
+    def report(self, level: set, message: str) -> None:
+        self.reports.append((level, message))
+
+    @classmethod
+    def poll_message_set(cls, message: str) -> None:
+        pass
+
+
+class _IDCollection(list):
+    """A list of fake IDs that can also be looked up by name, like a bpy_prop_collection"""
+
+    def __contains__(self, name) -> bool:
+        return any(getattr(item, "name", None) == name for item in self)
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return next(item for item in self if item.name == key)
+        return super().__getitem__(key)
+
+
+def make_fake_id(name: str, **fields) -> types.SimpleNamespace:
+    return types.SimpleNamespace(**{"name": name, "asset_data": None, "library": None, **fields})
+
+
+def make_fake_asset_data(catalog_id: str = "00000000-0000-0000-0000-000000000000", tags: tuple[str, ...] = (),
+                         description: str = "") -> types.SimpleNamespace:
+    return types.SimpleNamespace(catalog_id=catalog_id, tags=[types.SimpleNamespace(name=t) for t in tags],
+                                 description=description)
+
+
+def make_fake_bpy() -> types.ModuleType:
+    bpy = types.ModuleType("bpy")
+
+    bpy.types = types.ModuleType("bpy.types")
+    bpy.types.CollectionProperty = type("CollectionProperty", (), {})
+
+    bpy.data = types.SimpleNamespace(filepath="", texts=_IDCollection(), is_saved=True, is_dirty=False)
+    collections = ("objects", "meshes", "collections", "materials", "textures", "worlds", "node_groups", "actions",
+                   "brushes", "images", "libraries", "sounds", "movieclips", "fonts", "volumes", "cache_files")
+    for collection in collections:
+        setattr(bpy.data, collection, _IDCollection())
+    bpy.data.bl_rna = types.SimpleNamespace(properties={c: bpy.types.CollectionProperty() for c in collections})
+
+    def abspath(path: str, library=None) -> str:
+        if path.startswith("//"):
+            return os.path.join(os.path.dirname(library.filepath if library else bpy.data.filepath), path[2:])
+        return path
+
+    bpy.path = types.SimpleNamespace(abspath=abspath, basename=os.path.basename)
+
+    def save_as_mainfile(filepath: str, copy: bool = False, compress: bool = False, **_kwargs) -> set:
+        shutil.copyfile(bpy.data.filepath, filepath)
+        return {'FINISHED'}
+
+    bpy.ops = types.SimpleNamespace(wm=types.SimpleNamespace(save_as_mainfile=save_as_mainfile))
+
+    bpy.types.Operator = Operator
+    for name in ("Menu", "Panel", "PropertyGroup", "AddonPreferences", "Scene", "OperatorFileListElement"):
+        setattr(bpy.types, name, type(name, (_Struct,), {}))
+
+    bpy.props = types.ModuleType("bpy.props")
+    for kind in ("string", "bool", "int", "float", "enum", "collection", "pointer"):
+        setattr(bpy.props, f"{kind.capitalize()}Property", _prop_fn(kind))
+
+    bpy.app = types.ModuleType("bpy.app")
+    bpy.app.background = True
+    bpy.app.binary_path = "blender"
+    bpy.app.version_string = "fake"
+    bpy.app.handlers = types.ModuleType("bpy.app.handlers")
+    bpy.app.handlers.persistent = lambda fn: fn
+    for handler_list in ("depsgraph_update_post", "save_post", "load_post"):
+        setattr(bpy.app.handlers, handler_list, [])
+    bpy.app.timers = types.SimpleNamespace(register=lambda *a, **k: None, unregister=lambda fn: None,
+                                           is_registered=lambda fn: False)
+
+    bpy.context = types.SimpleNamespace(
+        preferences=types.SimpleNamespace(addons={}, filepaths=types.SimpleNamespace(asset_libraries=[])),
+        window_manager=types.SimpleNamespace(windows=[], popup_menu=lambda *a, **k: None),
+        scene=types.SimpleNamespace(),
+    )
+    bpy.utils = types.SimpleNamespace(register_class=lambda cls: None, unregister_class=lambda cls: None)
+    return bpy
+
+
+def submodules(bpy: types.ModuleType) -> dict[str, types.ModuleType]:
+    """The bpy submodules that add-on code imports from directly (from bpy.types import Operator, etc.)"""
+    return {"bpy.types": bpy.types, "bpy.props": bpy.props, "bpy.app": bpy.app, "bpy.app.handlers": bpy.app.handlers}
+
+
+def install_preferences(bpy: types.ModuleType, package: str, preferences_class, **overrides) -> object:
+    """Register the add-on's preferences, with their defaults from the class's property annotations"""
+    prefs = preferences_class(**overrides)
+    bpy.context.preferences.addons[package] = types.SimpleNamespace(preferences=prefs)
+    return prefs
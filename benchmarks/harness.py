@@ -0,0 +1,51 @@
+import importlib
+import json
+import os
+import sys
+import time
+import types
+from contextlib import contextmanager, redirect_stdout
+
+"""
+Shared helpers for the benchmarks: loading the add-on's modules outside of Blender and timing things.
+Benchmarks print one JSON object per measurement so results can be collected and compared between runs.
+"""
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC = os.path.join(ROOT, "src")
+PACKAGE = "copy_to_asset_library"
+
+
+def install_fake_bpy() -> types.ModuleType:
+    """Put a stand-in bpy module in sys.modules so add-on modules can be imported by plain CPython."""
+    if "bpy" not in sys.modules:
+        from fake_bpy import make_fake_bpy, submodules
+        bpy = make_fake_bpy()
+        sys.modules["bpy"] = bpy
+        sys.modules.update(submodules(bpy))
+    return sys.modules["bpy"]
+
+
+def load(module_name: str) -> types.ModuleType:
+    """Import one of the add-on's modules (e.g. "lib.cats") without running the add-on's __init__.py, which would
+    try to register everything with Blender."""
+    install_fake_bpy()
+    if PACKAGE not in sys.modules:
+        package = types.ModuleType(PACKAGE)
+        package.__path__ = [SRC]
+        sys.modules[PACKAGE] = package
+    return importlib.import_module(f"{PACKAGE}.{module_name}")
+
+
+def emit(benchmark: str, **fields) -> None:
+    print(json.dumps({"benchmark": benchmark, **fields}), flush=True)
+
+
+@contextmanager
+def timed(benchmark: str, **fields):
+    """Time the with block and emit the result. The add-on's own print() logging goes to stderr so stdout stays
+    machine-readable."""
+    start = time.perf_counter()
+    with redirect_stdout(sys.stderr):
+        yield
+    emit(benchmark, seconds=round(time.perf_counter() - start, 6), **fields)
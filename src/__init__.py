@@ -1,16 +1,38 @@
+import time
+
+# Measured from here, for the startup report (see addon.startup_report())
+_import_started = time.perf_counter()
+
 from typing import Callable
 import bpy
 from .lib import addon
+from .lib import lazy
+from .lib import preflight
+from .lib import libstatus
+from .lib import autopublish
 from .operator import copy as copy_to_asset_library
+from .operator import copy_multi as copy_to_asset_libraries
+from .operator import batch as batch_copy
+from .operator import restore as restore_previous
+from .operator import stale as stale_files
+from .operator import autopublish as auto_publish
 from .panel import preferences as preferences_panel
 from .menu import file_menu
 
+# Only used here to shut down their thread pools, which they only have if they've been used
+backups = lazy.lazy_import(".lib.backups", __package__)
+dependencies = lazy.lazy_import(".lib.dependencies", __package__)
+packing = lazy.lazy_import(".lib.packing", __package__)
+
 if "_LOADED" in locals():
     import importlib
 
-    for mod in (addon, copy_to_asset_library, preferences_panel, file_menu):
+    for mod in (addon, lazy, preflight, libstatus, autopublish, copy_to_asset_library, copy_to_asset_libraries,
+                batch_copy, restore_previous, stale_files, auto_publish, preferences_panel, file_menu, backups,
+                dependencies, packing):
         importlib.reload(mod)
 _LOADED = True
+addon.timings["import"] = time.perf_counter() - _import_started
 
 package_name = __package__
 
@@ -33,29 +55,42 @@ menus: list[tuple[str, Callable]] = [
     ("TOPBAR_MT_file", addon.menuitem(file_menu.COPYTOASSETLIBRARY_MT_destinations))
 ]
 
-# Registerable modules have a REGISTER_CLASSES list that lists all registerable classes in the module
+# Registerable modules have a REGISTER_CLASSES list that lists all registerable classes in the module, a
+# REGISTER_HANDLERS list of (bpy.app.handlers list name, handler function) tuples, and/or a REGISTER_TIMERS list of
+# (timer function, first interval) tuples
 registerable_modules = [
     file_menu,
     copy_to_asset_library,
+    copy_to_asset_libraries,
+    batch_copy,
+    restore_previous,
+    stale_files,
+    auto_publish,
     preferences_panel,
+    preflight,
+    libstatus,
+    autopublish,
 ]
 
 
 def register() -> None:
-    for c in addon.get_registerable_classes(registerable_modules):
-        # Attempt to clean up if the addon broke during registration.
-        try:
-            bpy.utils.unregister_class(c)
-        except RuntimeError:
-            pass
-        bpy.utils.register_class(c)
-        if hasattr(c, 'post_register') and callable(c.post_register):
-            c.post_register()
-        print("Copy to Asset Library registered class:", c)
-    addon.register_menus(menus)
+    with addon.timed("register"):
+        for c in addon.get_registerable_classes(registerable_modules):
+            addon.register_class(c)
+        addon.register_menus(menus)
+        addon.register_handlers(addon.get_registerable_handlers(registerable_modules))
+        addon.register_timers(addon.get_registerable_timers(registerable_modules))
+    print(addon.startup_report())
 
 
 def unregister() -> None:
+    addon.unregister_timers(addon.get_registerable_timers(registerable_modules))
+    libstatus.shutdown()
+    autopublish.shutdown()
+    for module in (backups, dependencies, packing):
+        if lazy.is_loaded(module):
+            module.shutdown()
+    addon.unregister_handlers(addon.get_registerable_handlers(registerable_modules))
     addon.unregister_menus(menus)
     for m in menus[::-1]:
         getattr(bpy.types, m[0]).remove(m[1])
@@ -1,9 +1,19 @@
 import bpy
+import time
+from contextlib import contextmanager
 from typing import Callable, Type
 from types import ModuleType
+from . import lazy
 
 from hashlib import md5
 
+if "_LOADED" in locals():
+    import importlib
+
+    for mod in (lazy,):  # list all imports here
+        importlib.reload(mod)
+_LOADED = True
+
 """
 This library contains helper functions useful in setup and management of Blender addons.
 It is required by the __init__.py, so don't remove it unless you fix dependencies.
@@ -45,3 +55,71 @@ def register_menus(menus: list[tuple[str, Callable]]):
 def unregister_menus(menus: list[tuple[str, Callable]]):
     for m in menus[::-1]:
         getattr(bpy.types, m[0]).remove(m[1])
+
+
+def get_registerable_handlers(registerable_modules: list[ModuleType]) -> list[tuple[str, Callable]]:
+    module_handlers = [m.REGISTER_HANDLERS for m in registerable_modules if hasattr(m, "REGISTER_HANDLERS")]
+    return [h for mh in module_handlers for h in mh]
+
+
+def register_handlers(handlers: list[tuple[str, Callable]]):
+    for h in handlers:
+        handler_list = getattr(bpy.app.handlers, h[0])
+        if h[1] not in handler_list:
+            handler_list.append(h[1])
+
+
+def unregister_handlers(handlers: list[tuple[str, Callable]]):
+    for h in handlers[::-1]:
+        handler_list = getattr(bpy.app.handlers, h[0])
+        if h[1] in handler_list:
+            handler_list.remove(h[1])
+
+
+def get_registerable_timers(registerable_modules: list[ModuleType]) -> list[tuple[Callable, float]]:
+    module_timers = [m.REGISTER_TIMERS for m in registerable_modules if hasattr(m, "REGISTER_TIMERS")]
+    return [t for mt in module_timers for t in mt]
+
+
+def register_timers(timers: list[tuple[Callable, float]]):
+    for t in timers:
+        if not bpy.app.timers.is_registered(t[0]):
+            bpy.app.timers.register(t[0], first_interval=t[1], persistent=True)
+
+
+def unregister_timers(timers: list[tuple[Callable, float]]):
+    for t in timers[::-1]:
+        if bpy.app.timers.is_registered(t[0]):
+            bpy.app.timers.unregister(t[0])
+
+
+def register_class(cls: Type) -> None:
+    try:
+        bpy.utils.register_class(cls)
+    except ValueError:
+        # Still registered by an earlier attempt that broke partway through, so clean that up and try again
+        bpy.utils.unregister_class(cls)
+        bpy.utils.register_class(cls)
+    if hasattr(cls, 'post_register') and callable(cls.post_register):
+        cls.post_register()
+
+
+# Seconds each step of the add-on's startup took ("import", "register"), for startup_report()
+timings: dict[str, float] = {}
+
+
+@contextmanager
+def timed(step: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[step] = time.perf_counter() - start
+
+
+def startup_report() -> str:
+    """One line on what the add-on added to Blender's startup"""
+    steps = ", ".join(f"{step} {seconds * 1000:.1f} ms" for step, seconds in timings.items())
+    deferred, loaded = lazy.deferred()
+    return f"Copy to Asset Library startup: {steps or 'not measured'}. {deferred} modules deferred until first use, " \
+           f"{loaded} loaded since."
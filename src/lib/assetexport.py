@@ -0,0 +1,49 @@
+import bpy
+import os
+from typing import NamedTuple
+from . import preflight
+
+if "_LOADED" in locals():
+    import importlib
+
+    for mod in (preflight,):  # list all imports here
+        importlib.reload(mod)
+_LOADED = True
+
+"""
+Asset-only export: writes just the datablocks marked as assets, and everything they use, instead of the whole working
+file with its scratch scenes and leftovers. Blender's partial write (bpy.data.libraries.write) follows the
+dependencies itself.
+"""
+
+
+class ExportStats(NamedTuple):
+    assets: int
+    bytes: int
+    # Size of the working file on disk, for comparison (0 if it's never been saved)
+    source_bytes: int
+
+    def __str__(self) -> str:
+        written = f"Wrote {self.assets} assets, {self.bytes / (1024 * 1024):.1f} MB"
+        if not self.source_bytes:
+            return written
+        return f"{written} (the whole file is {self.source_bytes / (1024 * 1024):.1f} MB)"
+
+
+def asset_ids() -> set:
+    """The open file's own (not linked) datablocks that are marked as assets"""
+    ids = set()
+    for key in preflight.id_collections():
+        for item in getattr(bpy.data, key, ()):
+            if item.asset_data is not None and item.library is None:
+                ids.add(item)
+    return ids
+
+
+def write_assets(filepath: str, assets: set, compress: bool, relative_remap: bool) -> ExportStats:
+    """Write the given assets and their dependencies to filepath"""
+    bpy.data.libraries.write(filepath, assets, path_remap='RELATIVE' if relative_remap else 'NONE',
+                             compress=compress)
+    source_bytes = os.path.getsize(bpy.data.filepath) if bpy.data.filepath and os.path.isfile(bpy.data.filepath) \
+        else 0
+    return ExportStats(len(assets), os.path.getsize(filepath), source_bytes)
@@ -0,0 +1,116 @@
+import bpy
+import time
+from bpy.app.handlers import persistent
+from contextlib import contextmanager
+from . import jobs
+from . import pkginfo
+
+if "_LOADED" in locals():
+    import importlib
+
+    for mod in (jobs, pkginfo,):  # list all imports here
+        importlib.reload(mod)
+_LOADED = True
+
+"""
+Publishing automatically after every save, for files that opt in. A burst of saves within the debounce delay turns
+into one publish of the newest state, and a save while a publish is running cancels it in favour of a new one. The
+libraries a file auto-publishes to are stored in the file (on every scene, as there's nowhere file-wide to put them),
+so they follow "Save Incremental" copies and don't depend on which scene is showing.
+"""
+
+SCENE_PROPERTY = "copy_to_asset_library_auto_publish"
+
+_pending_libraries: list[str] = []
+_due: float | None = None
+_current_job: jobs.BackgroundJob | None = None
+# Saves made by the add-on itself (Save As Copy into a temporary file) mustn't set off another publish
+_own_save_depth = 0
+
+
+def libraries() -> list[str]:
+    """The library paths the file auto-publishes to. A library any scene opted in to counts, so scenes added since
+    (which start out with nothing set) don't turn it off."""
+    paths = {}
+    for scene in bpy.data.scenes:
+        paths.update((p, None) for p in getattr(scene, SCENE_PROPERTY, "").split("\n") if p)
+    return list(paths)
+
+
+def set_enabled(library_path: str, enabled: bool) -> None:
+    paths = [p for p in libraries() if p != library_path]
+    if enabled:
+        paths.append(library_path)
+    for scene in bpy.data.scenes:
+        setattr(scene, SCENE_PROPERTY, "\n".join(paths))
+
+
+@contextmanager
+def own_save():
+    """Wrap the add-on's own saves so they don't trigger an auto-publish"""
+    global _own_save_depth
+    _own_save_depth += 1
+    try:
+        yield
+    finally:
+        _own_save_depth -= 1
+
+
+def track(job: jobs.BackgroundJob) -> None:
+    """Remember the auto-publish job that's running, so the next save can cancel it"""
+    global _current_job
+    _current_job = job
+
+
+def _tick() -> float | None:
+    global _due
+    if _due is None:
+        return None
+    remaining = _due - time.monotonic()
+    if remaining > 0:
+        return remaining
+    if _current_job and not _current_job.done:
+        # Still winding down after being cancelled
+        return 0.1
+
+    _due = None
+    wm = bpy.context.window_manager
+    if not wm.windows:
+        return None
+    print(f"Auto-publishing to {len(_pending_libraries)} libraries")
+    # Timers run without a window, which the modal publish needs for its progress bar
+    with bpy.context.temp_override(window=wm.windows[0]):
+        bpy.ops.copy_to_asset_library.copy_multi('INVOKE_DEFAULT', libraries="\n".join(_pending_libraries),
+                                                 skip_preflight=True, auto_publish=True)
+    return None
+
+
+@persistent
+def _save_post_handler(*_args) -> None:
+    global _pending_libraries, _due
+    if bpy.app.background or _own_save_depth:
+        return
+    prefs = bpy.context.preferences.addons[pkginfo.package_name()].preferences
+    paths = libraries()
+    if not paths or prefs.create_symlinks:
+        return
+
+    if _current_job and not _current_job.done:
+        print("Saved again, so cancelling the auto-publish in progress")
+        _current_job.cancel()
+    _pending_libraries = paths
+    _due = time.monotonic() + prefs.auto_publish_delay
+    if not bpy.app.timers.is_registered(_tick):
+        bpy.app.timers.register(_tick, first_interval=prefs.auto_publish_delay)
+
+
+def shutdown() -> None:
+    global _due
+    _due = None
+    if bpy.app.timers.is_registered(_tick):
+        bpy.app.timers.unregister(_tick)
+    if _current_job and not _current_job.done:
+        _current_job.cancel()
+
+
+REGISTER_HANDLERS = [("save_post", _save_post_handler)]
@@ -0,0 +1,225 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+from . import hashing
+from . import linkstrategy
+from . import lock
+from . import pubindex
+from . import transfer
+
+if "_LOADED" in locals():
+    import importlib
+
+    for mod in (hashing, linkstrategy, lock, pubindex, transfer,):  # list all imports here
+        importlib.reload(mod)
+_LOADED = True
+
+"""
+A backup store in each Asset Library that keeps several generations of every published file. Backups are stored by
+content hash, so identical generations share one blob, and a file is hard linked into the store just before it's
+replaced, so the published file never goes missing in between. Where the filesystem can't hard link, the file is
+moved into the store rather than copied. Generations are small marker files pointing at blobs, and pruning old ones
+runs on a background thread.
+
+    <library>/.copy_to_asset_library_backups/
+        blobs/<hash>.blob
+        generations/<published name>/<time_ns>_<hash>
+
+Blobs don't have a .blend extension so Blender never indexes them as part of the library.
+"""
+
+STORE_DIRNAME = ".copy_to_asset_library_backups"
+
+
+class Retention(NamedTuple):
+    # Always keep at least this many of the newest generations of each file
+    keep: int
+    # Also keep any generation newer than this many days. 0 to only go by keep.
+    max_age_days: float = 0.0
+
+
+class Generation(NamedTuple):
+    published_name: str
+    time_ns: int
+    digest: str
+
+    @property
+    def marker_name(self) -> str:
+        return f"{self.time_ns}_{self.digest}"
+
+
+def store_path(library_path: str) -> str:
+    return os.path.join(library_path, STORE_DIRNAME)
+
+
+def _blob_path(library_path: str, digest: str) -> str:
+    return os.path.join(store_path(library_path), "blobs", f"{digest}.blob")
+
+
+def _generations_path(library_path: str, published_name: str) -> str:
+    return os.path.join(store_path(library_path), "generations", published_name)
+
+
+def is_blob(filepath: str) -> bool:
+    return os.path.basename(os.path.dirname(os.path.dirname(filepath))) == STORE_DIRNAME \
+        and filepath.endswith(".blob")
+
+
+def generations(library_path: str, published_name: str) -> list[Generation]:
+    """The stored generations of a published file, newest first"""
+    try:
+        markers = os.listdir(_generations_path(library_path, published_name))
+    except FileNotFoundError:
+        return []
+    result = []
+    for marker in markers:
+        time_ns, _, digest = marker.partition("_")
+        if time_ns.isdigit() and digest:
+            result.append(Generation(published_name, int(time_ns), digest))
+    return sorted(result, key=lambda g: g.time_ns, reverse=True)
+
+
+def _store_locked(library_path: str, destination: str, job=None) -> str:
+    digest = hashing.file_hash(destination, job)
+    blob = _blob_path(library_path, digest)
+    os.makedirs(os.path.dirname(blob), exist_ok=True)
+    if os.path.isfile(blob):
+        print(f"{destination} is already in the backup store as {digest}")
+    else:
+        print(f"Linking existing {destination} into the backup store as {digest}")
+        temp_blob = transfer.temp_path(blob)
+        try:
+            try:
+                transfer.link_file(destination, temp_blob)
+            except OSError as e:
+                if not transfer.links_unsupported(e):
+                    raise
+                # Copying the whole previous file on every publish is too slow, so move it into the store instead
+                print(f"Can't hard link in {library_path} ({e}), so moving {destination} into the backup store")
+                os.replace(destination, temp_blob)
+            os.replace(temp_blob, blob)
+        finally:
+            if os.path.isfile(temp_blob):
+                os.remove(temp_blob)
+
+    generation = Generation(os.path.basename(destination), time.time_ns(), digest)
+    generations_dir = _generations_path(library_path, generation.published_name)
+    os.makedirs(generations_dir, exist_ok=True)
+    open(os.path.join(generations_dir, generation.marker_name), "x").close()
+    return blob
+
+
+def store(destination: str, job=None) -> str | None:
+    """Add an existing destination file to its library's backup store as a new generation, leaving the file in place
+    for the caller to replace. If the filesystem can't hard link, it's moved into the store instead, so the
+    destination is briefly missing until the caller puts the new file in place. Returns the blob path (which
+    restore_blob() can put back), or None if there was nothing to back up."""
+    # A symlink has no content of its own to keep
+    if os.path.islink(destination) or not os.path.isfile(destination):
+        return None
+    library_path = os.path.dirname(destination)
+    with lock.file_lock(store_path(library_path)):
+        return _store_locked(library_path, destination, job)
+
+
+def restore_blob(blob: str, destination: str, job=None) -> transfer.CopyStats:
+    """Put a blob at the destination (replacing any file there) without copying its bytes when the filesystem allows
+    it. Blender and the publish code always replace library files rather than writing into them, so sharing the blob
+    is safe."""
+    strategy = linkstrategy.probe(os.path.dirname(destination), blob).strategy
+    temp = transfer.temp_path(destination)
+    try:
+        stats = linkstrategy.place_file(blob, temp, strategy, job)
+        transfer.replace(temp, destination)
+    finally:
+        if os.path.isfile(temp):
+            os.remove(temp)
+    hashing.remember(destination, os.path.basename(blob)[:-len(".blob")])
+    return stats
+
+
+def restore_previous(library_path: str, published_name: str, timeout: float = lock.DEFAULT_TIMEOUT,
+                     job=None) -> Generation | None:
+    """Replace a published file with the newest stored generation that differs from it. The file being replaced is
+    stored as a generation first, so restoring is itself undoable. The restore is recorded in the library's publish
+    index, if it has one, so the restored file isn't reported as changed. Waits up to timeout seconds for each of
+    the file's and the store's locks, raising lock.LockTimeoutException if one stays locked. If a job is given,
+    progress is reported to it and cancellation is checked while reading and copying. Returns the restored
+    generation, or None if there was nothing to restore."""
+    destination = os.path.join(library_path, published_name)
+    with lock.file_lock(destination, timeout), lock.file_lock(store_path(library_path), timeout):
+        current = hashing.file_hash(destination, job) if os.path.isfile(destination) else None
+        target = next((g for g in generations(library_path, published_name) if g.digest != current), None)
+        if target is None:
+            return None
+        if job:
+            job.progress = 0.4
+        if current:
+            _store_locked(library_path, destination, job)
+        if job:
+            job.progress = 0.6
+        stats = restore_blob(_blob_path(library_path, target.digest), destination, job)
+        pubindex.record_restore(destination, target.digest)
+    if job:
+        job.progress = 1.0
+    print(f"Restored {destination} from the backup of {time.ctime(target.time_ns / 1e9)} ({stats})")
+    return target
+
+
+def prune(library_path: str, retention: Retention) -> int:
+    """Drop generations outside the retention policy, then any blobs no generation refers to. Returns the number of
+    blobs removed."""
+    now = time.time_ns()
+    max_age_ns = int(retention.max_age_days * 86400 * 1e9)
+    with lock.file_lock(store_path(library_path)):
+        generations_root = os.path.join(store_path(library_path), "generations")
+        referenced = set()
+        for published_name in os.listdir(generations_root) if os.path.isdir(generations_root) else ():
+            for index, generation in enumerate(generations(library_path, published_name)):
+                if index < retention.keep or (max_age_ns and now - generation.time_ns < max_age_ns):
+                    referenced.add(generation.digest)
+                    continue
+                os.remove(os.path.join(_generations_path(library_path, published_name), generation.marker_name))
+            if not os.listdir(_generations_path(library_path, published_name)):
+                os.rmdir(_generations_path(library_path, published_name))
+
+        removed = 0
+        blobs_dir = os.path.join(store_path(library_path), "blobs")
+        for blob in os.listdir(blobs_dir) if os.path.isdir(blobs_dir) else ():
+            if blob.endswith(".blob") and blob[:-len(".blob")] not in referenced:
+                os.remove(os.path.join(blobs_dir, blob))
+                removed += 1
+    if removed:
+        print(f"Pruned {removed} old backups from {library_path}")
+    return removed
+
+
+# One thread, so prunes of the same library never race each other
+_pool: ThreadPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+
+def _prune_quietly(library_path: str, retention: Retention) -> None:
+    try:
+        prune(library_path, retention)
+    except (OSError, lock.LockTimeoutException) as e:
+        print(f"Could not prune backups in {library_path}: {e}")
+
+
+def schedule_prune(library_path: str, retention: Retention) -> None:
+    """Prune a library's backup store on a background thread"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="copy_to_asset_library_prune")
+        _pool.submit(_prune_quietly, library_path, retention)
+
+
+def shutdown() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
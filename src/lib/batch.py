@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+try:
+    from . import blendfile
+    from . import naming
+except ImportError:
+    # Running as a command-line script, so lib/ is on the path instead
+    import blendfile
+    import naming
+
+"""
+Batch publishing: runs the Copy to Asset Library operator on many .blend files, each in its own background Blender
+process, through a bounded worker pool. This module doesn't use bpy or the rest of the add-on, so it can also be run
+as a command-line script:
+
+    python3 lib/batch.py --blender /path/to/blender --library /path/to/asset/library file_or_dir [file_or_dir ...]
+
+Catalog merges are serialized across the workers by the lock in lib/cats.py.
+"""
+
+DEFAULT_PACKAGE = "copy_to_asset_library"
+LOG_TAIL_LINES = 20
+
+# Run inside each worker Blender. Enables the add-on if the user prefs didn't, then runs the same operator as the menu.
+_WORKER_EXPR = """
+import addon_utils, bpy
+if not addon_utils.check({package!r})[1]:
+    addon_utils.enable({package!r}, default_set=False)
+result = bpy.ops.copy_to_asset_library.copy(path={library!r}, skip_preflight=True)
+if 'FINISHED' not in result:
+    raise RuntimeError(f"Copy to Asset Library returned {{result}}")
+"""
+
+
+def find_blend_files(paths: list[str], recursive: bool = False) -> list[str]:
+    """Expand a list of files and directories into a sorted, deduplicated list of .blend files."""
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            if recursive:
+                for root, dirs, files in os.walk(path):
+                    dirs[:] = [d for d in dirs if not d.startswith(".")]
+                    found += [os.path.join(root, f) for f in files if f.lower().endswith(".blend")]
+            else:
+                found += [e.path for e in os.scandir(path) if e.is_file() and e.name.lower().endswith(".blend")]
+        elif path.lower().endswith(".blend"):
+            found.append(path)
+    return sorted(dict.fromkeys(os.path.abspath(f) for f in found))
+
+
+def latest_per_destination(files: list[str], normalize_numeric_suffix: bool = True) -> tuple[list[str], list[str]]:
+    """Files that would publish to the same name (e.g., file_101.blend and file_102.blend both becoming
+    file_latest.blend) would just overwrite each other, so keep only the most recently modified one of each. Every file
+    goes to the same library, so this applies across directories, too. Returns (files to publish, superseded files)."""
+    by_destination: dict[str, list[str]] = {}
+    for f in files:
+        key = naming.published_filename(os.path.basename(f), normalize_numeric_suffix)
+        by_destination.setdefault(key, []).append(f)
+    keep, superseded = [], []
+    for group in by_destination.values():
+        group.sort(key=os.path.getmtime)
+        keep.append(group[-1])
+        superseded += group[:-1]
+    return sorted(keep), sorted(superseded)
+
+
+def without_assets(files: list[str]) -> list[str]:
+    """Files that have nothing marked as an asset, found by reading their block headers (see lib/blendfile.py) rather
+    than starting Blender. Files that can't be read that way are left for Blender to deal with."""
+    found = []
+    for f in files:
+        try:
+            if not blendfile.read_info(f).assets:
+                found.append(f)
+        except (OSError, blendfile.BlendFileException) as e:
+            print(f"Could not check {f} for assets: {e}", file=sys.stderr)
+    return found
+
+
+def default_workers() -> int:
+    return max(1, os.cpu_count() or 1)
+
+
+def publish_file(blender: str, blend_file: str, library: str, package: str = DEFAULT_PACKAGE,
+                 timeout: float | None = None) -> dict:
+    """Publish one file with a background Blender process. Returns a status record for the report."""
+    command = [blender, "-b", blend_file, "--python-exit-code", "1",
+               "--python-expr", _WORKER_EXPR.format(package=package, library=library)]
+    start = time.perf_counter()
+    try:
+        proc = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, timeout=timeout,
+                              encoding="utf-8", errors="replace")
+        status = "ok" if proc.returncode == 0 else "failed"
+        returncode = proc.returncode
+        output = proc.stdout
+    except subprocess.TimeoutExpired as e:
+        status = "timeout"
+        returncode = None
+        output = e.stdout.decode("utf-8", "replace") if isinstance(e.stdout, bytes) else (e.stdout or "")
+    except OSError as e:
+        status = "failed"
+        returncode = None
+        output = str(e)
+    return {
+        "file": blend_file,
+        "status": status,
+        "seconds": round(time.perf_counter() - start, 3),
+        "returncode": returncode,
+        "log": output.splitlines()[-LOG_TAIL_LINES:],
+    }
+
+
+def publish_files(blender: str, files: list[str], library: str, workers: int | None = None,
+                  package: str = DEFAULT_PACKAGE, timeout: float | None = None, normalize_numeric_suffix: bool = True,
+                  skip_without_assets: bool = False, job=None) -> dict:
+    """Publish every file through a pool of background Blender processes and return the report. If a job is given,
+    progress is reported to it, and cancelling it stops any files that haven't started yet. With skip_without_assets,
+    files with nothing marked as an asset aren't published."""
+    workers = workers or default_workers()
+    start = time.perf_counter()
+    files, superseded = latest_per_destination(files, normalize_numeric_suffix)
+    results = [{"file": f, "status": "superseded", "seconds": 0, "returncode": None, "log": []} for f in superseded]
+    if skip_without_assets:
+        no_assets = without_assets(files)
+        files = [f for f in files if f not in no_assets]
+        results += [{"file": f, "status": "no_assets", "seconds": 0, "returncode": None, "log": []} for f in no_assets]
+    skipped = len(results)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(publish_file, blender, f, library, package, timeout): f for f in files}
+        for future in as_completed(futures):
+            if future.cancelled():
+                continue
+            result = future.result()
+            results.append(result)
+            print(f"[{len(results) - skipped}/{len(files)}] {result['status']} {result['file']} ({result['seconds']}s)",
+                  file=sys.stderr)
+            if job:
+                job.progress = (len(results) - skipped) / len(files)
+                if job.cancelled:
+                    for f in futures:
+                        f.cancel()
+    # Cancelled futures never produced a result
+    done_files = {r["file"] for r in results}
+    results += [{"file": f, "status": "cancelled", "seconds": 0, "returncode": None, "log": []}
+                for f in files if f not in done_files]
+    results.sort(key=lambda r: r["file"])
+    return {
+        "library": library,
+        "workers": workers,
+        "seconds": round(time.perf_counter() - start, 3),
+        "succeeded": sum(1 for r in results if r["status"] == "ok"),
+        "failed": sum(1 for r in results if r["status"] not in ("ok", "superseded", "no_assets")),
+        "files": results,
+    }
+
+
+def write_report(report: dict, report_path: str) -> None:
+    with open(report_path, "w", encoding="utf-8") as fh:
+        json.dump(report, fh, indent=2)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Publish .blend files to an Asset Library with Copy to Asset Library")
+    parser.add_argument("paths", nargs="+", help=".blend files or directories containing them")
+    parser.add_argument("--library", required=True, help="Asset Library directory to publish to")
+    parser.add_argument("--blender", default="blender", help="Blender executable (default: blender on the PATH)")
+    parser.add_argument("--workers", type=int, default=default_workers(), help="Number of Blender processes")
+    parser.add_argument("--recursive", action="store_true", help="Look for .blend files in subdirectories")
+    parser.add_argument("--timeout", type=float, default=None, help="Seconds to allow each file")
+    parser.add_argument("--package", default=DEFAULT_PACKAGE, help="Module name the add-on is installed as")
+    parser.add_argument("--keep-numeric-suffix", action="store_true",
+                        help="Match an add-on set not to replace numeric suffixes with \"_latest\"")
+    parser.add_argument("--skip-without-assets", action="store_true",
+                        help="Don't publish files that have nothing marked as an asset")
+    parser.add_argument("--report", default=None, help="Write the JSON report here instead of to stdout")
+    args = parser.parse_args(argv)
+
+    files = find_blend_files(args.paths, args.recursive)
+    if not files:
+        print("No .blend files found", file=sys.stderr)
+        return 1
+
+    report = publish_files(args.blender, files, args.library, args.workers, args.package, args.timeout,
+                           not args.keep_numeric_suffix, args.skip_without_assets)
+    if args.report:
+        write_report(report, args.report)
+        print(f"Wrote report to {args.report}")
+    else:
+        print(json.dumps(report, indent=2))
+    return 0 if report["failed"] == 0 else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,354 @@
-import bpy
+import gzip
+import mmap
+import os
+import re
+import struct
+import threading
+import zlib
+from typing import NamedTuple
 
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
 
-def is_compressed(filepath: str = None):
-    filepath = filepath if filepath else bpy.data.filepath
+# What a corrupt compressed stream raises while it's being read (besides OSError)
+_DECOMPRESSION_ERRORS = (EOFError, zlib.error) + ((zstandard.ZstdError,) if zstandard else ())
+
+"""
+Reading .blend files without Blender: detecting compression, and walking the file's blocks to list its IDs, which of
+them are assets, and the assets' catalogs. Uncompressed files are memory-mapped and compressed ones are decompressed
+as a stream, so only block headers (and the start of each ID block and the block after it, where an asset's metadata
+is) are ever looked at, and memory use doesn't grow with the file size.
+
+Nothing here needs bpy except detect_codec()'s default of the open file, so this also works from lib/batch.py's
+command line.
+"""
+
+CODEC_GZIP = "gzip"
+CODEC_ZSTD = "zstd"
+
+_MAGIC = b"BLENDER"
+# How much of each ID block to keep until the file's DNA (at the end of the file) says where the name and asset
+# pointer are. The name is at most 258 bytes, after a handful of pointers.
+_ID_PREFIX_SIZE = 1024
+# How much to keep of the block after each ID block. For an asset, that's its AssetMetaData, which starts with two
+# pointers and the catalog UUID.
+_ASSET_PREFIX_SIZE = 64
+_SKIP_CHUNK_SIZE = 1024 * 1024
+# Blender's DNA is a few hundred kB, so anything much bigger means the block header is garbage
+_MAX_DNA_SIZE = 16 * 1024 * 1024
+_ID_CODE = re.compile(rb"[A-Z][A-Z0-9]\0\0")
+# The code of the placeholder blocks written for IDs linked from other files. They keep the linked ID's asset_data
+# pointer, but the asset belongs to the other file.
+LINKED_ID_CODE = "ID"
+_ARRAY_DIM = re.compile(r"\[(\d+)]")
+
+
+class BlendFileException(BaseException):
+    pass
+
+
+class BlendHeader(NamedTuple):
+    pointer_size: int
+    little_endian: bool
+    # e.g., 402 for Blender 4.2
+    version: int
+    # 0 for the original layout, 1 for the larger block headers of Blender 5.0 and later
+    file_format: int
+
+
+class IDBlock(NamedTuple):
+    # Two-letter ID code, e.g., "OB" for objects and "MA" for materials
+    code: str
+    name: str
+    # Position and size of the block's data in the uncompressed file
+    offset: int
+    length: int
+    is_asset: bool
+    # The asset's catalog UUID, or None if it isn't an asset or the catalog couldn't be read
+    catalog_id: str | None = None
+
+
+class BlendInfo(NamedTuple):
+    codec: str | None
+    header: BlendHeader
+    ids: list[IDBlock]
+    block_count: int
+
+    @property
+    def assets(self) -> list[IDBlock]:
+        return [i for i in self.ids if i.is_asset]
+
+
+def detect_codec(filepath: str = None) -> str | None:
+    """Return the compression codec of a .blend file (CODEC_GZIP or CODEC_ZSTD), or None if it's uncompressed. Defaults
+    to the open file."""
+    if not filepath:
+        import bpy
+        filepath = bpy.data.filepath
     # This may be a new, unsaved file
     if not filepath:
-        return False
+        return None
     with open(filepath, "rb") as fh:
         head = fh.read(4)
-        return head[0:2] == b"\x1f\x8b" or head[0:4] == b"\x28\xb5\x2f\xfd"
+    if head[0:2] == b"\x1f\x8b":
+        return CODEC_GZIP
+    if head[0:4] == b"\x28\xb5\x2f\xfd":
+        return CODEC_ZSTD
+    return None
+
+
+def is_compressed(filepath: str = None) -> str | None:
+    """Truthy if the file is compressed. The value is the detected codec, as with detect_codec()."""
+    return detect_codec(filepath)
+
+
+class _MappedReader:
+    def __init__(self, filepath: str):
+        with open(filepath, "rb") as fh:
+            try:
+                self._map = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise BlendFileException(f"{filepath} is empty")
+        self._pos = 0
+
+    def read(self, size: int) -> bytes:
+        data = self._map[self._pos:self._pos + size]
+        self._pos += len(data)
+        return data
+
+    def skip(self, size: int) -> None:
+        self._pos += size
+
+    def tell(self) -> int:
+        return self._pos
+
+    def close(self) -> None:
+        self._map.close()
+
+
+class _StreamReader:
+    def __init__(self, filepath: str, codec: str):
+        if codec == CODEC_GZIP:
+            self._fh = gzip.open(filepath, "rb")
+        elif zstandard is None:
+            raise BlendFileException(f"{filepath} is Zstandard-compressed, and the zstandard module isn't available")
+        else:
+            self._raw = open(filepath, "rb")
+            # Blender writes many independent frames, so keep reading past the end of the first one
+            self._fh = zstandard.ZstdDecompressor().stream_reader(self._raw, read_across_frames=True)
+        self._pos = 0
+
+    def read(self, size: int) -> bytes:
+        data = self._fh.read(size)
+        self._pos += len(data)
+        return data
+
+    def skip(self, size: int) -> None:
+        while size > 0:
+            chunk = self._fh.read(min(size, _SKIP_CHUNK_SIZE))
+            if not chunk:
+                break
+            self._pos += len(chunk)
+            size -= len(chunk)
+
+    def tell(self) -> int:
+        return self._pos
+
+    def close(self) -> None:
+        self._fh.close()
+        if hasattr(self, "_raw"):
+            self._raw.close()
+
+
+def _read_header(reader) -> BlendHeader:
+    head = reader.read(12)
+    if head[:7] != _MAGIC:
+        raise BlendFileException("Not a .blend file")
+    try:
+        if head[7:9].isdigit():
+            # "BLENDER17-01v0500": header size, pointer size (always 8), file format version, endianness, version
+            size = int(head[7:9])
+            if size < 17:
+                raise ValueError(size)
+            head += reader.read(size - 12)
+            return BlendHeader(8, head[12:13] == b"v", int(head[13:17]), int(head[10:12]))
+        return BlendHeader(8 if head[7:8] == b"-" else 4, head[8:9] == b"v", int(head[9:12]), 0)
+    except ValueError:
+        raise BlendFileException(f"Unrecognized .blend file header {bytes(head)!r}")
+
+
+def _bhead_format(header: BlendHeader) -> tuple[struct.Struct, tuple[int, int, int, int]]:
+    """The block header layout, and the positions of (code, length, SDNA index, old address) in its unpacked fields"""
+    endian = "<" if header.little_endian else ">"
+    if header.file_format >= 1:
+        return struct.Struct(f"{endian}4siQqq"), (0, 3, 1, 2)
+    pointer = "Q" if header.pointer_size == 8 else "I"
+    return struct.Struct(f"{endian}4si{pointer}ii"), (0, 1, 3, 2)
+
+
+class _Layout(NamedTuple):
+    # (offset, size) of ID.name
+    name: tuple[int, int]
+    # Offset of ID.asset_data
+    asset_data: int
+    # Offset of AssetMetaData.catalog_id, or None if the DNA doesn't have it
+    catalog_id: int | None
+
+
+def _layout(dna: bytes, header: BlendHeader) -> _Layout:
+    """Find where the ID name, asset pointer and asset catalog are from the file's DNA block"""
+    try:
+        return _parse_layout(dna, header)
+    except (ValueError, IndexError, struct.error) as e:
+        # Truncated tables, indices out of range, missing string terminators...
+        raise BlendFileException(f"The file's DNA is malformed ({e})")
+
+
+def _parse_layout(dna: bytes, header: BlendHeader) -> _Layout:
+    endian = "<" if header.little_endian else ">"
+    pos = 8  # "SDNA" "NAME"
+
+    def read_int(fmt: str) -> int:
+        nonlocal pos
+        value = struct.unpack_from(endian + fmt, dna, pos)[0]
+        pos += struct.calcsize(fmt)
+        return value
+
+    def read_strings(count: int) -> list[str]:
+        nonlocal pos
+        strings = []
+        for _ in range(count):
+            end = dna.index(b"\0", pos)
+            strings.append(dna[pos:end].decode("ascii", "replace"))
+            pos = end + 1
+        pos = (pos + 3) & ~3
+        return strings
+
+    names = read_strings(read_int("i"))
+    pos += 4  # "TYPE"
+    types = read_strings(read_int("i"))
+    pos += 4  # "TLEN"
+    lengths = struct.unpack_from(f"{endian}{len(types)}h", dna, pos)
+    pos = (pos + 2 * len(types) + 3) & ~3
+    pos += 4  # "STRC"
+    # struct name -> field name -> (offset, size)
+    structs: dict[str, dict[str, tuple[int, int]]] = {}
+    for _ in range(read_int("i")):
+        type_index, field_count = struct.unpack_from(f"{endian}hh", dna, pos)
+        fields = struct.unpack_from(f"{endian}{field_count * 2}h", dna, pos + 4)
+        pos += 4 + field_count * 4
+        if types[type_index] not in ("ID", "AssetMetaData"):
+            continue
+
+        offset = 0
+        layout = structs[types[type_index]] = {}
+        for field_type, field_name in zip(fields[0::2], fields[1::2]):
+            name = names[field_name]
+            count = 1
+            for dim in _ARRAY_DIM.findall(name):
+                count *= int(dim)
+            pointer = name.startswith("*") or name.startswith("(*")
+            size = (header.pointer_size if pointer else lengths[field_type]) * count
+            if size < 0:
+                raise ValueError(f"negative size for {name}")
+            layout[_ARRAY_DIM.sub("", name).strip("*()")] = (offset, size)
+            offset += size
+
+    id_layout = structs.get("ID", {})
+    if "name" not in id_layout or "asset_data" not in id_layout:
+        raise BlendFileException("The file's DNA has no usable ID struct")
+    catalog_id = structs.get("AssetMetaData", {}).get("catalog_id")
+    return _Layout(id_layout["name"], id_layout["asset_data"][0],
+                   catalog_id[0] if catalog_id and catalog_id[1] == 16 else None)
+
+
+def _format_uuid(data: bytes, little_endian: bool) -> str:
+    """Format a bUUID struct the way Blender writes catalog UUIDs"""
+    time_low, time_mid, time_hi = struct.unpack_from("<IHH" if little_endian else ">IHH", data)
+    return f"{time_low:08x}-{time_mid:04x}-{time_hi:04x}-{data[8:10].hex()}-{data[10:16].hex()}"
+
+
+def _read(filepath: str) -> BlendInfo:
+    codec = detect_codec(filepath)
+    reader = _StreamReader(filepath, codec) if codec else _MappedReader(filepath)
+    try:
+        header = _read_header(reader)
+        bhead, (code_at, length_at, _, old_at) = _bhead_format(header)
+        # (code, offset, length, prefix, (old address, prefix) of the block after it)
+        raw_ids: list[list] = []
+        dna = None
+        block_count = 0
+        after_id = False
+        while True:
+            raw = reader.read(bhead.size)
+            if len(raw) < bhead.size:
+                raise BlendFileException(f"{filepath} is truncated")
+            fields = bhead.unpack(raw)
+            code, length = fields[code_at], fields[length_at]
+            if length < 0:
+                raise BlendFileException(f"{filepath} has a block with a negative length")
+            block_count += 1
+            if code == b"ENDB":
+                break
+            offset = reader.tell()
+            is_id = bool(_ID_CODE.fullmatch(code))
+            if code == b"DNA1":
+                if length > _MAX_DNA_SIZE:
+                    raise BlendFileException(f"{filepath} has an implausibly large DNA block")
+                dna = bytes(reader.read(length))
+            elif is_id:
+                prefix = bytes(reader.read(min(length, _ID_PREFIX_SIZE)))
+                reader.skip(length - len(prefix))
+                raw_ids.append([code, offset, length, prefix, (0, b"")])
+            elif after_id:
+                prefix = bytes(reader.read(min(length, _ASSET_PREFIX_SIZE)))
+                reader.skip(length - len(prefix))
+                raw_ids[-1][4] = (fields[old_at], prefix)
+            else:
+                reader.skip(length)
+            after_id = is_id
+    except _DECOMPRESSION_ERRORS as e:
+        raise BlendFileException(f"{filepath} is corrupt ({e})")
+    finally:
+        reader.close()
+
+    if dna is None:
+        raise BlendFileException(f"{filepath} has no DNA block")
+    layout = _layout(dna, header)
+    name_offset, name_size = layout.name
+    pointer = "<" if header.little_endian else ">"
+    pointer += "Q" if header.pointer_size == 8 else "I"
+    ids = []
+    for code, offset, length, prefix, (next_address, next_prefix) in raw_ids:
+        name = prefix[name_offset:name_offset + name_size].split(b"\0", 1)[0][2:].decode("utf-8", "replace")
+        asset_data = struct.unpack_from(pointer, prefix, layout.asset_data)[0] \
+            if len(prefix) >= layout.asset_data + header.pointer_size else 0
+        catalog_id = None
+        # Blender writes an asset's metadata straight after its ID block
+        if asset_data and next_address == asset_data and layout.catalog_id is not None \
+                and len(next_prefix) >= layout.catalog_id + 16:
+            catalog_id = _format_uuid(next_prefix[layout.catalog_id:layout.catalog_id + 16], header.little_endian)
+        ids.append(IDBlock(code[:2].decode("ascii"), name, offset, length, asset_data != 0, catalog_id))
+    return BlendInfo(codec, header, ids, block_count)
+
+
+# abspath -> (size, mtime_ns, info)
+_cache: dict[str, tuple[int, int, BlendInfo]] = {}
+_cache_lock = threading.Lock()
+
+
+def read_info(filepath: str) -> BlendInfo:
+    """The header, IDs and assets of a .blend file on disk, without loading it in Blender. Results are cached until
+    the file changes. Raises BlendFileException if the file isn't a readable .blend file."""
+    path = os.path.abspath(filepath)
+    st = os.stat(path)
+    with _cache_lock:
+        cached = _cache.get(path)
+    if cached and cached[:2] == (st.st_size, st.st_mtime_ns):
+        return cached[2]
+    info = _read(path)
+    with _cache_lock:
+        _cache[path] = (st.st_size, st.st_mtime_ns, info)
+    return info
@@ -1,35 +1,74 @@
-import os.path
+import os
 import bpy
 import re
 import shutil
+import threading
+from . import lock
+
+if "_LOADED" in locals():
+    import importlib
+
+    for mod in (lock,):  # list all imports here
+        importlib.reload(mod)
+_LOADED = True
 
 # If version 2 or whatever comes around and it's compatible, just bump this number to make the script work
 MAX_CATSFILE_VERSION = 1
 
+CATS_FILENAME = 'blender_assets.cats.txt'
+
+_CATALOG_LINE = re.compile(r'([0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}):.+')
+_VERSION_LINE = re.compile(r'VERSION (\d+)')
+
+# Destination cats file path -> (size, mtime_ns, version, set of UUIDs), so an unchanged file isn't parsed again
+_index_cache: dict[str, tuple[int, int, int | None, set[str]]] = {}
+_index_lock = threading.Lock()
+
 
 class CatalogVersionException(BaseException):
     pass
 
 
 def _text_to_catalogs_by_uuid(cats_text: str) -> dict[str, str]:
-    lines = cats_text.split('\n')
     uuids = {}
-    for line in lines:
-        match = re.search('([0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}):.+', line)
-        if not match:
-            continue
-        uuid = match.group(1)
-        uuids[uuid] = line
+    for line in cats_text.splitlines():
+        if match := _CATALOG_LINE.match(line):
+            uuids[match.group(1)] = line
     return uuids
 
 
+def _scan_cats_file(cats_file: str) -> tuple[int | None, set[str]]:
+    """Stream through a cats file, returning its VERSION (or None if there isn't one) and the set of catalog UUIDs."""
+    version = None
+    uuids = set()
+    with open(cats_file, 'r', encoding='utf-8') as fh:
+        for line in fh:
+            if match := _CATALOG_LINE.match(line):
+                uuids.add(match.group(1))
+            elif version is None and (match := _VERSION_LINE.fullmatch(line.rstrip('\r\n'))):
+                version = int(match.group(1))
+    return version, uuids
+
+
+def catalog_index(cats_file: str) -> tuple[int | None, set[str]]:
+    """The VERSION and catalog UUIDs of a cats file, cached by (size, mtime_ns)."""
+    st = os.stat(cats_file)
+    with _index_lock:
+        cached = _index_cache.get(cats_file)
+        if cached and cached[:2] == (st.st_size, st.st_mtime_ns):
+            return cached[2], cached[3]
+    version, uuids = _scan_cats_file(cats_file)
+    with _index_lock:
+        _index_cache[cats_file] = (st.st_size, st.st_mtime_ns, version, uuids)
+    return version, uuids
+
+
 def _get_text_from_textblock() -> str | None:
-    return bpy.data.texts[
-        'blender_assets.cats.txt'].as_string() if 'blender_assets.cats.txt' in bpy.data.texts else None
+    return bpy.data.texts[CATS_FILENAME].as_string() if CATS_FILENAME in bpy.data.texts else None
 
 
 def _get_text_from_file() -> str | None:
-    source_path = bpy.path.abspath('//blender_assets.cats.txt')
+    source_path = bpy.path.abspath(f'//{CATS_FILENAME}')
     if not os.path.isfile(source_path):
         return None
     fh = open(source_path, 'r')
@@ -38,76 +77,96 @@ def _get_text_from_file() -> str | None:
     return contents
 
 
-def _copy_cats_file(dest_file: str) -> None:
-    # Use the textblock if one exists
-    if contents := _get_text_from_textblock():
-        fh = open(dest_file, 'x')
-        fh.write(contents)
-        fh.close()
-        return
-
-    # Copy the file if one exists
-    source_path = bpy.path.abspath('//blender_assets.cats.txt')
-    if os.path.isfile(source_path):
-        shutil.copy(source_path, dest_file)
-        return
-
-    # No source existed. Nothing done.
-    return
+def get_catalog_text() -> str | None:
+    """The catalog data that goes with the current file, from a textblock (preferred) or a file alongside it. This
+    reads bpy.data, so call it from the main thread."""
+    return _get_text_from_textblock() or _get_text_from_file()
+
+
+def _append_atomic(dest_file: str, new_lines: list[str]) -> None:
+    """Write the existing contents of dest_file plus new_lines to a temporary file alongside it, then swap it into
+    place, so readers never see a half-written file. The previous file is kept as a ".backup" hard link, or a copy
+    when the filesystem can't hard link."""
+    temp_file = os.path.join(os.path.dirname(dest_file), f".{CATS_FILENAME}.{os.getpid()}.tmp")
+    temp_backup = f"{temp_file}.backup"
+    try:
+        with open(temp_file, 'w', encoding='utf-8', newline='') as out_fh:
+            needs_newline = False
+            with open(dest_file, 'r', encoding='utf-8', newline='') as in_fh:
+                while chunk := in_fh.read(1024 * 1024):
+                    out_fh.write(chunk)
+                    needs_newline = not chunk.endswith('\n')
+            if needs_newline:
+                out_fh.write('\n')
+            out_fh.write(''.join(f"{line}\n" for line in new_lines))
+            out_fh.flush()
+            os.fsync(out_fh.fileno())
+
+        # The new backup is made under a temporary name and swapped in, so the old one stays until it exists
+        backup_file = f"{dest_file}.backup"
+        try:
+            os.link(dest_file, temp_backup)
+        except OSError as e:
+            print(f"Could not hard link {dest_file} ({e}), so copying it to {backup_file}")
+            shutil.copy2(dest_file, temp_backup)
+        os.replace(temp_backup, backup_file)
+        print(f"Backed up {dest_file} -> {backup_file}")
+        os.replace(temp_file, dest_file)
+    finally:
+        for path in (temp_file, temp_backup):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def merge_catalogs(dest_path: str, source_cats_text: str) -> int:
+    """Add any catalogs from source_cats_text that aren't already in the library at dest_path. Doesn't touch bpy, so
+    it's safe from a background thread. Returns the number of catalogs added."""
+    dest_file = os.path.join(dest_path, CATS_FILENAME)
+
+    # Other Blender processes (e.g., batch publish workers) may be merging into the same library
+    with lock.file_lock(dest_file):
+        source_cats_data = _text_to_catalogs_by_uuid(source_cats_text)
+
+        # If no file exists at the destination, just write the one we have
+        if not os.path.isfile(dest_file):
+            print(f"No catalog file existed at {dest_file}, so creating a new one.")
+            with open(dest_file, 'x', encoding='utf-8') as fh:
+                fh.write(source_cats_text)
+            return len(source_cats_data)
+
+        version, dest_uuids = catalog_index(dest_file)
+        if version is None:
+            raise CatalogVersionException(f"Cannot find VERSION in {dest_file}. It may be a newer version, or invalid.")
+
+        print(f"Catalog file is version {version}, max supported is version {MAX_CATSFILE_VERSION}")
+
+        if version > MAX_CATSFILE_VERSION:
+            raise CatalogVersionException(
+                f"VERSION in {CATS_FILENAME} file is version {version} and may not be compatible with version "
+                f"{MAX_CATSFILE_VERSION}. Change MAX_CATSFILE_VERSION in the script if you want to try it.")
+
+        new_cats = {uuid: spec for (uuid, spec) in source_cats_data.items() if uuid not in dest_uuids}
+        if not new_cats:
+            print(f"All new catalogs already existed in {dest_file}")
+            return 0
+
+        _append_atomic(dest_file, list(new_cats.values()))
+
+        # We know exactly what's in the new file, so save the next publish from parsing it
+        st = os.stat(dest_file)
+        with _index_lock:
+            _index_cache[dest_file] = (st.st_size, st.st_mtime_ns, version, dest_uuids | new_cats.keys())
+
+        print(f"Added {len(new_cats)} catalog(s) to {dest_file}")
+        return len(new_cats)
 
 
 def append_catalogs_from_current_file(dest_path: str) -> None:
     """Attempt to export any blender_assets.cats.txt lines from either a textblock (preferred) or a file, to the
     given destination. Appends the file's data onto any existing data if it exists. If no blender_assets.cats.txt
     data exists with the current file (no Textblock or file), nothing is done and the operation returns."""
-
-    dest_file = os.path.join(dest_path, 'blender_assets.cats.txt')
-
-    # If no file exists at the destination, just copy the one we have
-    if not os.path.isfile(dest_file):
-        print(f"No catalog file existed at {dest_file}, so creating/copying a new one.")
-        _copy_cats_file(dest_file)
-        return
-
-    dest_fh = open(dest_file, 'r')
-    dest_cats_text = dest_fh.read()
-    dest_fh.close()
-
-    source_cats_text = _get_text_from_textblock() or _get_text_from_file()
+    source_cats_text = get_catalog_text()
     if not source_cats_text:
         print(f"No existing catalog data. Nothing to export.")
         return
-
-    version_lines = [line for line in dest_cats_text.split('\n') if re.match('^VERSION \d+$', line)]
-    if not version_lines:
-        raise CatalogVersionException(f"Cannot find VERSION in {dest_file}. It may be a newer version, or invalid.")
-
-    version = int(version_lines[0][8:])
-
-    print(f"Catalog file is version {version}, max supported is version {MAX_CATSFILE_VERSION}")
-
-    if version > MAX_CATSFILE_VERSION:
-        raise CatalogVersionException(
-            f"VERSION in blender_assets.cats.txt file is version {version} and may not be compatible with version "
-            f"{MAX_CATSFILE_VERSION}. Change MAX_CATSFILE_VERSION in the script if you want to try it.")
-
-    source_cats_data = _text_to_catalogs_by_uuid(source_cats_text)
-    dest_cats_data = _text_to_catalogs_by_uuid(dest_cats_text)
-
-    new_cats = {uuid: spec for (uuid, spec) in source_cats_data.items() if uuid not in dest_cats_data}
-    new_lines = [line for line in new_cats.values()]
-
-    if not new_lines:
-        print(f"All new catalogs already existed in {dest_file}")
-        return
-
-    # Make a backup
-    shutil.copyfile(dest_file, f"{dest_file}.backup")
-    print(f"Backed up {dest_file} -> {dest_file}.backup")
-
-    # Write the new lines
-    fh = open(dest_file, 'a')
-    fh.write('\n'.join(new_lines))
-    fh.close()
-
-    print(f"Added {len(new_lines)} catalog(s) to {dest_file}")
+    merge_catalogs(dest_path, source_cats_text)
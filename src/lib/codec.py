@@ -0,0 +1,113 @@
+import os
+import struct
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+from . import jobs
+
+if "_LOADED" in locals():
+    import importlib
+
+    for mod in (jobs,):  # list all imports here
+        importlib.reload(mod)
+_LOADED = True
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+"""
+Re-encoding of saved .blend files with Zstandard at a chosen level, compressing frames in parallel on all cores.
+Output uses the same seekable Zstandard layout Blender writes (independent frames followed by a seek table in a
+skippable frame), so Blender reads it like one of its own compressed files.
+
+This needs the "zstandard" Python module, which some Blender builds bundle. Check available() before using it.
+"""
+
+# Uncompressed bytes per frame. Frames are compressed independently, so this is also the unit of parallel work.
+FRAME_SIZE = 2 * 1024 * 1024
+
+ZSTD_MIN_LEVEL = 1
+ZSTD_MAX_LEVEL = 22
+
+_SKIPPABLE_FRAME_MAGIC = 0x184D2A5E
+_SEEKABLE_MAGIC = 0x8F92EAB1
+
+_local = threading.local()
+
+
+class EncodeStats(NamedTuple):
+    codec: str
+    level: int
+    input_bytes: int
+    output_bytes: int
+    seconds: float
+
+    def __str__(self) -> str:
+        ratio = self.output_bytes / self.input_bytes if self.input_bytes else 1.0
+        return f"{self.codec} level {self.level}: {self.input_bytes / (1024 * 1024):.1f} MB -> " \
+               f"{self.output_bytes / (1024 * 1024):.1f} MB ({ratio:.1%}) in {self.seconds:.2f}s"
+
+
+def available() -> bool:
+    return zstandard is not None
+
+
+def _compress_frame(data: bytes, level: int) -> bytes:
+    # ZstdCompressor objects aren't safe to share between threads, so each worker gets its own
+    compressors = getattr(_local, "compressors", None)
+    if compressors is None:
+        compressors = _local.compressors = {}
+    if level not in compressors:
+        compressors[level] = zstandard.ZstdCompressor(level=level, write_content_size=True)
+    return compressors[level].compress(data)
+
+
+def _seek_table(frames: list[tuple[int, int]]) -> bytes:
+    entries = b"".join(struct.pack("<II", compressed, decompressed) for compressed, decompressed in frames)
+    footer = struct.pack("<IBI", len(frames), 0, _SEEKABLE_MAGIC)
+    return struct.pack("<II", _SKIPPABLE_FRAME_MAGIC, len(entries) + len(footer)) + entries + footer
+
+
+def encode_zstd(source: str, destination: str, level: int, threads: int = 0,
+                job: jobs.BackgroundJob | None = None) -> EncodeStats:
+    """Compress an uncompressed .blend file into a seekable Zstandard .blend file. Frames are compressed on a pool of
+    threads (all cores if threads is 0), with a bounded number in flight so memory use stays flat."""
+    if not available():
+        raise RuntimeError("The zstandard module is not available in this Python")
+
+    threads = threads or os.cpu_count() or 1
+    total = os.path.getsize(source)
+    start = time.perf_counter()
+    frames: list[tuple[int, int]] = []
+    read = 0
+    try:
+        with open(source, "rb") as src_fh, open(destination, "wb") as dest_fh, \
+                ThreadPoolExecutor(max_workers=threads) as pool:
+            pending = deque()
+            while True:
+                while len(pending) < threads * 2 and (chunk := src_fh.read(FRAME_SIZE)):
+                    pending.append((len(chunk), pool.submit(_compress_frame, chunk, level)))
+                if not pending:
+                    break
+                if job:
+                    job.check_cancelled()
+                decompressed_size, future = pending.popleft()
+                compressed = future.result()
+                dest_fh.write(compressed)
+                frames.append((len(compressed), decompressed_size))
+                read += decompressed_size
+                if job and total:
+                    job.progress = read / total
+            dest_fh.write(_seek_table(frames))
+    except (OSError, jobs.JobCancelled):
+        if os.path.isfile(destination):
+            os.remove(destination)
+        raise
+
+    stats = EncodeStats("zstd", level, total, os.path.getsize(destination), time.perf_counter() - start)
+    print(f"Re-encoded {source} to {destination}: {stats}")
+    return stats
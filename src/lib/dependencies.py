@@ -0,0 +1,159 @@
+import bpy
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Collection, NamedTuple
+
+"""
+Audit of the external files the open file depends on (unpacked images, movie clips and sounds, and linked libraries):
+whether they exist, how big they are, and whether they'll still resolve once the file is in an Asset Library.
+
+Checking hundreds of textures on a network share one stat at a time is slow, so the stats run on a thread pool with
+an overall timeout. Directories are stat'ed first, since textures tend to share a handful of them. A file that's
+missing is cached as missing by (path, mtime of its directory): adding or renaming a file changes its directory's
+mtime, which is what invalidates that. Files that exist are stat'ed on every audit, because overwriting one in place
+changes its size without touching its directory.
+"""
+
+MAX_WORKERS = 16
+# Seconds to wait for the whole audit before giving up on the files that haven't answered
+TIMEOUT = 3.0
+# External files bigger than this are called out in the report
+LARGE_FILE_BYTES = 100 * 1024 * 1024
+
+# bpy.data collections to audit, and the kind of file they hold
+COLLECTIONS = (("images", "Image"), ("movieclips", "Movie clip"), ("sounds", "Sound"), ("libraries", "Library"))
+# Image sources that have no file behind them
+_GENERATED_IMAGE_SOURCES = {'GENERATED', 'VIEWER'}
+
+
+class ExternalFile(NamedTuple):
+    kind: str
+    name: str
+    # As stored in the file, possibly relative ("//")
+    filepath: str
+    abspath: str
+    # Linked from another library, so relative paths are relative to that library and aren't remapped on save
+    linked: bool
+
+
+class FileStat(NamedTuple):
+    exists: bool
+    size: int
+
+
+class Audit(NamedTuple):
+    files: list[ExternalFile]
+    missing: list[ExternalFile]
+    large: list[ExternalFile]
+    # Files whose path won't resolve from (one of) the Asset Libraries (see audit())
+    unresolvable: list[ExternalFile]
+    # Files that couldn't be checked within the timeout
+    timed_out: list[ExternalFile]
+    total_bytes: int
+
+
+# (absolute path, mtime_ns of its directory) of files known to be missing
+_missing: set[tuple[str, int]] = set()
+_lock = threading.Lock()
+_pool: ThreadPoolExecutor | None = None
+
+
+def _get_pool() -> ThreadPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="copy_to_asset_library_deps")
+    return _pool
+
+
+def external_files(packing: Collection[str] = ()) -> list[ExternalFile]:
+    """Every unpacked external file the open file refers to, except the images named in packing, which will be packed
+    into the published copy. Must run on the main thread."""
+    files = []
+    for key, kind in COLLECTIONS:
+        for item in getattr(bpy.data, key, ()):
+            if getattr(item, "packed_file", None) is not None or not item.filepath:
+                continue
+            if key == "images" and (getattr(item, "source", 'FILE') in _GENERATED_IMAGE_SOURCES
+                                    or item.name in packing):
+                continue
+            # Paths inside linked data are relative to the library they came from
+            library = getattr(item, "library", None)
+            abspath = os.path.normpath(bpy.path.abspath(item.filepath, library=library))
+            files.append(ExternalFile(kind, item.name, item.filepath, abspath, library is not None))
+    return files
+
+
+def _stat_dir(path: str) -> int | None:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _stat_file(path: str) -> FileStat:
+    try:
+        return FileStat(True, os.stat(path).st_size)
+    except OSError:
+        return FileStat(False, 0)
+
+
+def _escapes(path: str, library_path: str) -> bool:
+    """Whether path, made relative to the library, has to climb out of it"""
+    try:
+        return os.path.relpath(path, library_path).startswith(os.pardir)
+    except ValueError:
+        # A different drive (Windows), so Blender will keep it absolute
+        return False
+
+
+def audit(library_paths: list[str], timeout: float = TIMEOUT, packing: Collection[str] = ()) -> Audit:
+    """Check every external file of the open file, as it would be published to the given libraries. Saving the copy
+    remaps relative paths to the library, so a relative path counts as unresolvable if the remapped path has to climb
+    out of the library: it only works on this machine, and breaks as soon as the library is synced or opened
+    elsewhere. The images named in packing are left out, since the copy won't depend on their files."""
+    files = external_files(packing)
+    deadline = time.monotonic() + timeout
+    pool = _get_pool()
+
+    dir_futures = {d: pool.submit(_stat_dir, d) for d in {os.path.dirname(f.abspath) for f in files}}
+    wait(dir_futures.values(), timeout=max(0.0, deadline - time.monotonic()))
+    dir_mtimes = {d: f.result() if f.done() else False for d, f in dir_futures.items()}
+
+    stats: dict[str, FileStat] = {}
+    file_futures = {}
+    with _lock:
+        for f in files:
+            dir_mtime = dir_mtimes[os.path.dirname(f.abspath)]
+            if dir_mtime is None:
+                stats[f.abspath] = FileStat(False, 0)
+            elif dir_mtime is not False and (f.abspath, dir_mtime) in _missing:
+                stats[f.abspath] = FileStat(False, 0)
+            elif f.abspath not in file_futures:
+                file_futures[f.abspath] = pool.submit(_stat_file, f.abspath)
+
+    wait(file_futures.values(), timeout=max(0.0, deadline - time.monotonic()))
+    with _lock:
+        for path, future in file_futures.items():
+            if future.done():
+                stats[path] = future.result()
+                dir_mtime = dir_mtimes[os.path.dirname(path)]
+                if dir_mtime and not stats[path].exists:
+                    _missing.add((path, dir_mtime))
+
+    timed_out = [f for f in files if f.abspath not in stats]
+    checked = [f for f in files if f.abspath in stats]
+    missing = [f for f in checked if not stats[f.abspath].exists]
+    large = [f for f in checked if stats[f.abspath].size > LARGE_FILE_BYTES]
+    unresolvable = [f for f in files if not f.linked and f.filepath.startswith("//")
+                    and any(_escapes(f.abspath, library_path) for library_path in library_paths)]
+    total_bytes = sum(stats[path].size for path in {f.abspath for f in checked})
+    return Audit(files, missing, large, unresolvable, timed_out, total_bytes)
+
+
+def shutdown() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
@@ -0,0 +1,56 @@
+import hashlib
+import os
+import threading
+
+"""
+Content hashing of files, with results cached by (path, size, mtime_ns) so an unchanged file is only read once.
+"""
+
+HASH_CHUNK_SIZE = 4 * 1024 * 1024
+
+# abspath -> (size, mtime_ns, digest). Only the latest version of each file is kept.
+_cache: dict[str, tuple[int, int, str]] = {}
+_cache_lock = threading.Lock()
+
+
+def _stat_key(filepath: str) -> tuple[str, tuple[int, int]]:
+    st = os.stat(filepath)
+    return os.path.abspath(filepath), (st.st_size, st.st_mtime_ns)
+
+
+def file_hash(filepath: str, job=None) -> str:
+    """Return the hex BLAKE2b digest of the file, reading it in fixed-size chunks. If a job is given, cancellation
+    is checked between chunks."""
+    path, stamp = _stat_key(filepath)
+    with _cache_lock:
+        cached = _cache.get(path)
+        if cached and cached[:2] == stamp:
+            return cached[2]
+
+    digest = hashlib.blake2b(digest_size=32)
+    with open(filepath, "rb") as fh:
+        while chunk := fh.read(HASH_CHUNK_SIZE):
+            if job:
+                job.check_cancelled()
+            digest.update(chunk)
+    result = digest.hexdigest()
+
+    with _cache_lock:
+        _cache[path] = (*stamp, result)
+    return result
+
+
+def cached_hash(filepath: str) -> str | None:
+    """The file's hash if it's cached and the file hasn't changed since, without reading the file"""
+    path, stamp = _stat_key(filepath)
+    with _cache_lock:
+        cached = _cache.get(path)
+    return cached[2] if cached and cached[:2] == stamp else None
+
+
+def remember(filepath: str, digest: str) -> None:
+    """Record the hash of a file whose content is already known (e.g., a fresh copy of a file that was hashed)."""
+    path, stamp = _stat_key(filepath)
+    with _cache_lock:
+        _cache[path] = (*stamp, digest)
+
@@ -0,0 +1,109 @@
+import threading
+import time
+from typing import Any, Callable
+
+"""
+Background jobs for work that shouldn't block Blender's main thread (file transfers and the like).
+The worker function runs on a thread and must not touch bpy. The main thread polls the job (from a modal operator or
+a bpy.app.timers callback) for progress, completion and errors.
+"""
+
+
+class JobCancelled(BaseException):
+    pass
+
+
+class BackgroundJob:
+    def __init__(self, fn: Callable[..., Any], *args, **kwargs):
+        """Run fn(*args, job=<this job>, **kwargs) on a worker thread once start() is called. The function receives
+        the job so it can report progress and check for cancellation."""
+        self._fn = fn
+        self._args = args
+        self._kwargs = kwargs
+        self._cancel = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self.progress: float = 0.0
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+    def _run(self) -> None:
+        try:
+            self.result = self._fn(*self._args, job=self, **self._kwargs)
+        except BaseException as e:
+            self.error = e
+
+    def start(self) -> "BackgroundJob":
+        self._thread.start()
+        return self
+
+    def cancel(self) -> None:
+        self._cancel.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    @property
+    def done(self) -> bool:
+        return self._thread.ident is not None and not self._thread.is_alive()
+
+    def check_cancelled(self) -> None:
+        """Call from the worker between units of work. Raises JobCancelled if cancel() was called."""
+        if self._cancel.is_set():
+            raise JobCancelled()
+
+    def sleep(self, seconds: float) -> None:
+        """Call from the worker to wait before retrying something. Raises JobCancelled as soon as cancel() is called."""
+        if self._cancel.wait(seconds):
+            raise JobCancelled()
+
+    def join(self, timeout: float | None = None) -> None:
+        """Block until the job finishes. Errors are left in self.error."""
+        self._thread.join(timeout)
+
+    def wait(self, timeout: float | None = None) -> Any:
+        """Block until the job finishes, re-raising any error from the worker. Returns the worker's result."""
+        self.join(timeout)
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+class ChildJob:
+    """Stands in for a BackgroundJob in one of several parallel pieces of work. Progress rolls up into the parent as
+    the average of its children, and cancelling the parent cancels the children. The parent may be None."""
+
+    def __init__(self, parent: BackgroundJob | None, siblings: list["ChildJob"]):
+        self._parent = parent
+        self._siblings = siblings
+        self._progress = 0.0
+
+    @property
+    def progress(self) -> float:
+        return self._progress
+
+    @progress.setter
+    def progress(self, value: float) -> None:
+        self._progress = value
+        if self._parent:
+            self._parent.progress = sum(c._progress for c in self._siblings) / len(self._siblings)
+
+    @property
+    def cancelled(self) -> bool:
+        return self._parent.cancelled if self._parent else False
+
+    def check_cancelled(self) -> None:
+        if self._parent:
+            self._parent.check_cancelled()
+
+    def sleep(self, seconds: float) -> None:
+        if self._parent:
+            self._parent.sleep(seconds)
+        else:
+            time.sleep(seconds)
+
+
+def split(job: BackgroundJob | None, count: int) -> list[ChildJob]:
+    children: list[ChildJob] = []
+    children += [ChildJob(job, children) for _ in range(count)]
+    return children
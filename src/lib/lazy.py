@@ -0,0 +1,56 @@
+import importlib.util
+import sys
+import threading
+from types import ModuleType
+
+"""
+Deferred imports, so the publish machinery doesn't add to Blender's startup time. lazy_import() puts a module in
+sys.modules straight away, but only runs it the first time one of its attributes is used (with the standard library's
+LazyLoader), so a plain "from . import x" elsewhere gets the same module and importlib.reload() still works.
+
+Loading on first use isn't thread-safe before Python 3.12, so call load_all() on the main thread before starting any
+background work that might be the first to use a deferred module.
+"""
+
+_deferred: list[ModuleType] = []
+_lock = threading.Lock()
+
+
+def lazy_import(name: str, package: str | None = None) -> ModuleType:
+    """Import a module (relative to package, like importlib.import_module()) without running it yet"""
+    fullname = importlib.util.resolve_name(name, package)
+    if (module := sys.modules.get(fullname)) is not None:
+        return module
+    spec = importlib.util.find_spec(fullname)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[fullname] = module
+    loader.exec_module(module)
+    parent, _, child = fullname.rpartition(".")
+    if parent:
+        # As a regular import would, so "from . import child" finds it
+        setattr(sys.modules[parent], child, module)
+    with _lock:
+        _deferred.append(module)
+    return module
+
+
+def is_loaded(module: ModuleType) -> bool:
+    """Whether a module has run, without making it run. Deferred modules are a ModuleType subclass until then."""
+    return type(module) is ModuleType
+
+
+def deferred() -> tuple[int, int]:
+    """(modules imported with lazy_import(), how many of them have been loaded since)"""
+    with _lock:
+        return len(_deferred), sum(is_loaded(m) for m in _deferred)
+
+
+def load_all() -> None:
+    """Run every deferred module that hasn't run yet"""
+    with _lock:
+        pending = [m for m in _deferred if not is_loaded(m)]
+    for module in pending:
+        # Any attribute access loads it
+        getattr(module, "__name__")
@@ -0,0 +1,124 @@
+import bpy
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+from . import naming
+from . import pkginfo
+
+if "_LOADED" in locals():
+    import importlib
+
+    for mod in (naming, pkginfo,):  # list all imports here
+        importlib.reload(mod)
+_LOADED = True
+
+"""
+Status of each Asset Library (reachable, writable, free space, whether and when the open file was published there)
+for display in the menu. All filesystem checks happen on a thread pool, started by a timer or by a request from the
+UI, so drawing never waits on a slow or offline network drive. draw() only ever reads the cache.
+"""
+
+# How long a status stays fresh before it's checked again
+STATUS_TTL = 30.0
+REFRESH_INTERVAL = 10.0
+MAX_WORKERS = 4
+
+
+class LibraryStatus(NamedTuple):
+    reachable: bool
+    writable: bool
+    free_bytes: int | None
+    # mtime of this file's published copy in the library, or None if it hasn't been published there
+    published_mtime: float | None
+    checked_at: float
+
+
+# (library path, published filename) -> status
+_statuses: dict[tuple[str, str], LibraryStatus] = {}
+_in_flight: set[tuple[str, str]] = set()
+_lock = threading.Lock()
+_pool: ThreadPoolExecutor | None = None
+
+
+def _check(library_path: str, published_name: str) -> LibraryStatus:
+    reachable = os.path.isdir(library_path)
+    writable = reachable and os.access(library_path, os.W_OK)
+    free_bytes = None
+    published_mtime = None
+    if reachable:
+        try:
+            free_bytes = shutil.disk_usage(library_path).free
+        except OSError:
+            pass
+        try:
+            published_mtime = os.stat(os.path.join(library_path, published_name)).st_mtime
+        except OSError:
+            pass
+    return LibraryStatus(reachable, writable, free_bytes, published_mtime, time.time())
+
+
+def _check_and_store(key: tuple[str, str]) -> None:
+    try:
+        status = _check(*key)
+        with _lock:
+            _statuses[key] = status
+    finally:
+        with _lock:
+            _in_flight.discard(key)
+
+
+def _get_pool() -> ThreadPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="copy_to_asset_library_status")
+    return _pool
+
+
+def get(library_path: str, published_name: str) -> LibraryStatus | None:
+    """The cached status of a library, or None if it hasn't been checked yet. A stale or missing status is queued for
+    a refresh, but this never touches the filesystem itself, so it's safe to call from draw()."""
+    key = (library_path, published_name)
+    with _lock:
+        status = _statuses.get(key)
+        stale = status is None or time.time() - status.checked_at > STATUS_TTL
+        if stale and key not in _in_flight:
+            _in_flight.add(key)
+            _get_pool().submit(_check_and_store, key)
+    return status
+
+
+def invalidate(library_path: str | None = None) -> None:
+    """Forget cached statuses (for one library, or all) so they're checked again, e.g., after publishing"""
+    with _lock:
+        for key in [k for k in _statuses if library_path is None or k[0] == library_path]:
+            del _statuses[key]
+
+
+def published_name_for_open_file() -> str | None:
+    if not bpy.data.filepath:
+        return None
+    prefs = bpy.context.preferences.addons[pkginfo.package_name()].preferences
+    return naming.published_filename(bpy.path.basename(bpy.data.filepath), prefs.normalize_numeric_suffix)
+
+
+def _refresh_timer() -> float:
+    published_name = published_name_for_open_file()
+    if published_name:
+        for lib in bpy.context.preferences.filepaths.asset_libraries:
+            get(lib.path, published_name)
+    return REFRESH_INTERVAL
+
+
+def shutdown() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+    with _lock:
+        _in_flight.clear()
+
+
+REGISTER_TIMERS = [(_refresh_timer, 1.0)]
@@ -0,0 +1,123 @@
+import os
+import threading
+import time
+from typing import NamedTuple
+from . import transfer
+
+if "_LOADED" in locals():
+    import importlib
+
+    for mod in (transfer,):  # list all imports here
+        importlib.reload(mod)
+_LOADED = True
+
+"""
+Choosing how to get an already-saved file into an Asset Library without re-saving it through Blender. Each library is
+probed once (per source directory) for what its filesystem supports, and the result is cached for the session.
+"""
+
+STRATEGY_REFLINK = "reflink"
+STRATEGY_HARDLINK = "hardlink"
+STRATEGY_COPY = "copy"
+
+# Cheapest first. Symlinks are probed but never picked automatically, since a symlink follows later edits to the
+# working file instead of publishing a snapshot of it.
+_PREFERENCE = (STRATEGY_REFLINK, STRATEGY_HARDLINK, STRATEGY_COPY)
+
+
+class LibraryProbe(NamedTuple):
+    same_device: bool
+    reflink: bool
+    hardlink: bool
+    symlink: bool
+    seconds: float
+
+    @property
+    def strategy(self) -> str:
+        supported = {
+            STRATEGY_REFLINK: self.same_device and self.reflink,
+            STRATEGY_HARDLINK: self.same_device and self.hardlink,
+            STRATEGY_COPY: True,
+        }
+        return next(s for s in _PREFERENCE if supported[s])
+
+
+# (library path, source directory) -> probe
+_probes: dict[tuple[str, str], LibraryProbe] = {}
+_probes_lock = threading.Lock()
+
+
+def _try(fn, *args) -> bool:
+    try:
+        fn(*args)
+        return True
+    except (OSError, NotImplementedError):
+        return False
+
+
+def _probe(library_path: str, source_dir: str) -> LibraryProbe:
+    start = time.perf_counter()
+    try:
+        same_device = os.stat(library_path).st_dev == os.stat(source_dir).st_dev
+    except OSError:
+        same_device = False
+
+    base = os.path.join(library_path, f".copy_to_asset_library_probe_{os.getpid()}")
+    probe_file, reflink_file, hardlink_file, symlink_file = base, f"{base}.reflink", f"{base}.hardlink", f"{base}.symlink"
+    try:
+        with open(probe_file, "wb") as fh:
+            fh.write(b"probe")
+    except OSError:
+        # Can't write here at all, so nothing but a (failing) copy will do
+        return LibraryProbe(same_device, False, False, False, time.perf_counter() - start)
+
+    try:
+        reflink = _try(transfer.clone_file, probe_file, reflink_file)
+        hardlink = _try(os.link, probe_file, hardlink_file)
+        symlink = _try(os.symlink, probe_file, symlink_file)
+    finally:
+        for f in (probe_file, reflink_file, hardlink_file, symlink_file):
+            if os.path.lexists(f):
+                os.remove(f)
+
+    return LibraryProbe(same_device, reflink, hardlink, symlink, time.perf_counter() - start)
+
+
+def probe(library_path: str, source_path: str) -> LibraryProbe:
+    """Find out what the filesystem under library_path supports, relative to a source file. Cached per library and
+    source directory."""
+    key = (os.path.normpath(library_path), os.path.dirname(os.path.abspath(source_path)))
+    with _probes_lock:
+        if key in _probes:
+            return _probes[key]
+    result = _probe(*key)
+    print(f"Probed {library_path}: same device={result.same_device}, reflink={result.reflink}, "
+          f"hardlink={result.hardlink}, symlink={result.symlink} ({result.seconds * 1000:.1f}ms). "
+          f"Strategy: {result.strategy}")
+    with _probes_lock:
+        _probes[key] = result
+    return result
+
+
+def cached_strategy(library_path: str, source_path: str) -> str | None:
+    """The strategy for a library if it has already been probed, without touching the filesystem. For UI drawing."""
+    key = (os.path.normpath(library_path), os.path.dirname(os.path.abspath(source_path)))
+    with _probes_lock:
+        result = _probes.get(key)
+    return result.strategy if result else None
+
+
+def forget(library_path: str | None = None) -> None:
+    """Drop cached probes (for one library, or all of them) so they're probed again next time"""
+    with _probes_lock:
+        for key in [k for k in _probes if library_path is None or k[0] == os.path.normpath(library_path)]:
+            del _probes[key]
+
+
+def place_file(source: str, destination: str, strategy: str, job=None) -> transfer.CopyStats:
+    """Put source at destination using the given strategy"""
+    if strategy == STRATEGY_REFLINK:
+        return transfer.clone_file(source, destination)
+    if strategy == STRATEGY_HARDLINK:
+        return transfer.link_file(source, destination)
+    return transfer.copy_file(source, destination, job)
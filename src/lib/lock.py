@@ -0,0 +1,153 @@
+import os
+import socket
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+"""
+Advisory lock files, used to serialize writes to shared files in an Asset Library (catalogs, published files) across
+Blender processes and machines. A lock is a "<path>.lock" file created exclusively, holding the host and PID of its
+owner. It works on network shares where fcntl/msvcrt locks often don't.
+
+While a lock is held, a background thread keeps its modification time fresh, so only a lock whose owner has stopped
+refreshing it (because it crashed or lost its connection) is ever treated as stale.
+"""
+
+DEFAULT_TIMEOUT = 60.0
+# A lock that hasn't been refreshed for this long is assumed to have been left behind by a crashed process
+STALE_AFTER = 600.0
+POLL_INTERVAL = 0.1
+
+
+class LockTimeoutException(BaseException):
+    pass
+
+
+class LockLostException(LockTimeoutException):
+    pass
+
+
+class HeldLock:
+    """What file_lock() yields. Long writers can call check() as they go, to stop if the lock was taken over."""
+
+    def __init__(self, lock_path: str):
+        self.lock_path = lock_path
+        self.lost = threading.Event()
+
+    def check(self) -> None:
+        if self.lost.is_set():
+            raise LockLostException(f"Lost the lock {self.lock_path} to another process")
+
+
+def _refresh_interval(stale_after: float) -> float:
+    return max(1.0, min(60.0, stale_after / 4))
+
+
+def _read_owner(lock_path: str) -> tuple[str, int | None, str] | None:
+    """The (host, PID, token) written into a lock file, or None if it's gone. Fields that can't be read are blank."""
+    try:
+        with open(lock_path, "r", encoding="utf-8", errors="replace") as fh:
+            fields = fh.read().split()
+    except FileNotFoundError:
+        return None
+    except OSError:
+        fields = []
+    fields += [""] * (3 - len(fields))
+    try:
+        pid = int(fields[1])
+    except ValueError:
+        pid = None
+    return fields[0], pid, fields[2]
+
+
+def _pid_running(pid: int) -> bool | None:
+    """Whether a process on this machine is running, or None if that can't be told."""
+    if os.name != "posix":
+        # os.kill(pid, 0) would terminate the process on Windows
+        return None
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    except OSError:
+        return None
+    return True
+
+
+def _owner_alive(owner: tuple[str, int | None, str]) -> bool:
+    """Whether a lock's owner can be seen to still be running. Only processes on this machine can be checked."""
+    host, pid, _ = owner
+    return host == socket.gethostname() and pid is not None and _pid_running(pid) is True
+
+
+def _keep_fresh(held: HeldLock, token: str, interval: float, stop: threading.Event) -> None:
+    lock_path = held.lock_path
+    while not stop.wait(interval):
+        owner = _read_owner(lock_path)
+        if owner is None or owner[2] != token:
+            print(f"Lock {lock_path} was taken over by another process")
+            held.lost.set()
+            return
+        try:
+            os.utime(lock_path)
+        except OSError as e:
+            print(f"Could not refresh lock {lock_path}: {e}")
+
+
+@contextmanager
+def file_lock(path: str, timeout: float = DEFAULT_TIMEOUT, stale_after: float = STALE_AFTER):
+    """Hold an advisory lock on path for the duration of the with block, waiting up to timeout seconds for it."""
+    lock_path = f"{path}.lock"
+    token = uuid.uuid4().hex
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            os.write(fd, f"{socket.gethostname()} {os.getpid()} {token}\n".encode("utf-8"))
+            os.close(fd)
+            break
+        except FileExistsError:
+            pass
+
+        try:
+            age = time.time() - os.path.getmtime(lock_path)
+        except FileNotFoundError:
+            continue
+        if age > stale_after:
+            owner = _read_owner(lock_path)
+            if owner is None:
+                continue
+            if not _owner_alive(owner):
+                print(f"Removing stale lock {lock_path} ({age:.0f}s old, held by {owner[0]} {owner[1]})")
+                # Make sure it's still the same lock, and not one another process has just taken over
+                if _read_owner(lock_path) == owner:
+                    try:
+                        os.remove(lock_path)
+                    except FileNotFoundError:
+                        pass
+                continue
+        if time.monotonic() > deadline:
+            raise LockTimeoutException(f"Timed out after {timeout:.0f}s waiting for {lock_path}")
+        time.sleep(POLL_INTERVAL)
+
+    held = HeldLock(lock_path)
+    stop = threading.Event()
+    refresher = threading.Thread(target=_keep_fresh, args=(held, token, _refresh_interval(stale_after), stop),
+                                 name=f"lock refresh {os.path.basename(path)}", daemon=True)
+    refresher.start()
+    try:
+        yield held
+    finally:
+        stop.set()
+        refresher.join()
+        owner = _read_owner(lock_path)
+        if owner is not None and owner[2] == token:
+            try:
+                os.remove(lock_path)
+            except FileNotFoundError:
+                pass
+        elif owner is not None:
+            print(f"Not removing lock {lock_path}, which is now held by {owner[0]} {owner[1]}")
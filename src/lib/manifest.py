@@ -0,0 +1,141 @@
+import bpy
+import hashlib
+import json
+import os
+import time
+from typing import NamedTuple
+from . import hashing
+from . import lock
+from . import preflight
+from . import transfer
+
+if "_LOADED" in locals():
+    import importlib
+
+    for mod in (hashing, lock, preflight, transfer,):  # list all imports here
+        importlib.reload(mod)
+_LOADED = True
+
+"""
+Asset manifests, so library tools can learn what a published file contains without opening it. Each published file
+gets a small JSON sidecar beside it ("<name>.blend.assets.json") listing its assets, and each library has an
+aggregate manifest of every published file's assets, updated one file at a time as they're published. Both are
+written to a temporary file and swapped into place, so readers never see a half-written manifest.
+
+The asset details come from the open file while it's being published, so nothing has to be read back.
+"""
+
+MANIFEST_VERSION = 1
+SIDECAR_SUFFIX = ".assets.json"
+LIBRARY_MANIFEST_FILENAME = ".copy_to_asset_library_assets.json"
+
+
+class AssetEntry(NamedTuple):
+    name: str
+    # e.g., "OBJECT" or "MATERIAL"
+    id_type: str
+    catalog_id: str
+    tags: list[str]
+    description: str
+
+
+def collect() -> list[AssetEntry]:
+    """The assets of the open file, as they'll be published. Must run on the main thread."""
+    entries = []
+    for key in preflight.id_collections():
+        for item in getattr(bpy.data, key, ()):
+            if item.asset_data is None or item.library is not None:
+                continue
+            asset_data = item.asset_data
+            entries.append(AssetEntry(item.name, item.id_type, asset_data.catalog_id,
+                                      [tag.name for tag in asset_data.tags], asset_data.description))
+    return entries
+
+
+def sidecar_path(published_path: str) -> str:
+    return f"{published_path}{SIDECAR_SUFFIX}"
+
+
+def library_manifest_path(library_path: str) -> str:
+    return os.path.join(library_path, LIBRARY_MANIFEST_FILENAME)
+
+
+def _file_fingerprint(published_path: str, st: os.stat_result) -> str:
+    """The published file's content hash if it's known without reading the file, otherwise its size and mtime"""
+    if digest := hashing.cached_hash(published_path):
+        return digest
+    return f"{st.st_size}:{st.st_mtime_ns}"
+
+
+def _fingerprint(entry: AssetEntry, file_fingerprint: str) -> str:
+    """Changes whenever the asset's details or the file it's in change"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(json.dumps([*entry, file_fingerprint]).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _file_record(published_path: str, entries: list[AssetEntry]) -> dict:
+    st = os.stat(published_path)
+    fingerprint = _file_fingerprint(published_path, st)
+    return {
+        "published_at": time.time(),
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "fingerprint": fingerprint,
+        "assets": [{**entry._asdict(), "fingerprint": _fingerprint(entry, fingerprint)} for entry in entries],
+    }
+
+
+def is_current(record: dict, published_path: str) -> bool:
+    """Whether a sidecar or manifest record still describes the published file, i.e., it hasn't been replaced since"""
+    try:
+        st = os.stat(published_path)
+    except OSError:
+        return False
+    return (record.get("size"), record.get("mtime_ns")) == (st.st_size, st.st_mtime_ns)
+
+
+def _write_atomic(path: str, data: dict) -> None:
+    temp_path = transfer.temp_path(path)
+    try:
+        with open(temp_path, "w", encoding="utf-8") as fh:
+            json.dump(data, fh, separators=(",", ":"))
+        transfer.replace(temp_path, path)
+    finally:
+        if os.path.isfile(temp_path):
+            os.remove(temp_path)
+
+
+def _read_json(path: str) -> dict | None:
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            data = json.load(fh)
+    except (OSError, ValueError):
+        return None
+    return data if isinstance(data, dict) and data.get("version") == MANIFEST_VERSION else None
+
+
+def write(published_path: str, entries: list[AssetEntry]) -> None:
+    """Write the sidecar for a file that's just been published, and update its library's manifest. Doesn't touch bpy,
+    so it's safe from a background thread. Raises lock.LockTimeoutException if the library manifest stays locked."""
+    record = _file_record(published_path, entries)
+    _write_atomic(sidecar_path(published_path), {"version": MANIFEST_VERSION, **record})
+
+    manifest_path = library_manifest_path(os.path.dirname(published_path))
+    # Other Blender processes may be publishing other files to the same library
+    with lock.file_lock(manifest_path):
+        manifest = _read_json(manifest_path) or {"version": MANIFEST_VERSION, "files": {}}
+        manifest["files"][os.path.basename(published_path)] = record
+        _write_atomic(manifest_path, manifest)
+
+
+def read_sidecar(published_path: str) -> dict | None:
+    """A published file's sidecar, or None if it has none (or it's unreadable)"""
+    return _read_json(sidecar_path(published_path))
+
+
+def read_library(library_path: str) -> dict[str, dict]:
+    """Published file name -> its record in the library's manifest, dropping files that are no longer there"""
+    manifest = _read_json(library_manifest_path(library_path)) or {"files": {}}
+    present = set(os.listdir(library_path))
+    return {name: record for name, record in manifest["files"].items() if name in present}
@@ -0,0 +1,131 @@
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import NamedTuple
+
+"""
+Per-phase timing of publishes. Each phase of a publish (preflight, Blender's save, the copy, the backup, the catalog
+merge, ...) is measured as a Phase, and the finished publish is appended to a JSON lines log as one record:
+
+    {"time": 1700000000.0, "library": "/path/to/library", "file": "file_latest.blend", "outcome": "COPIED",
+     "total_seconds": 1.23, "phases": {"save_as_mainfile": {"seconds": 0.8, "bytes": 104857600}, ...}}
+
+Recent records are also kept in memory, per library, for the p50/p95 summary in the preferences. Nothing in here
+touches bpy.
+"""
+
+PREFLIGHT = "preflight"
+PACK = "pack"
+SAVE = "save_as_mainfile"
+ENCODE = "encode"
+HASH = "hash"
+COPY = "copy"
+BACKUP = "backup"
+SYMLINK = "symlink"
+CATALOG_MERGE = "catalog_merge"
+MANIFEST = "manifest"
+TOTAL = "total"
+
+# Publishes per library kept for the summary
+HISTORY_SIZE = 200
+
+_write_lock = threading.Lock()
+# library path -> recent records, oldest first
+_history: dict[str, deque] = {}
+_loaded_from: str | None = None
+
+
+class Phase(NamedTuple):
+    name: str
+    seconds: float
+    bytes: int | None = None
+
+
+@contextmanager
+def measure(phases: list[Phase], name: str, size: int | None = None):
+    """Time the with block and append it to phases as the named phase"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        phases.append(Phase(name, time.perf_counter() - start, size))
+
+
+def _remember(record: dict) -> None:
+    _history.setdefault(record["library"], deque(maxlen=HISTORY_SIZE)).append(record)
+
+
+def record(log_path: str | None, library_path: str, filename: str, outcome: str, phases: list[Phase],
+           total_seconds: float) -> dict:
+    """Build the record for a finished publish, remember it for the summary and, if log_path is set, append it to
+    the log. Phases that ran more than once are added together."""
+    merged: dict[str, dict] = {}
+    for phase in phases:
+        entry = merged.setdefault(phase.name, {"seconds": 0.0, "bytes": None})
+        entry["seconds"] = round(entry["seconds"] + phase.seconds, 6)
+        if phase.bytes is not None:
+            entry["bytes"] = (entry["bytes"] or 0) + phase.bytes
+    entry = {"time": round(time.time(), 3), "library": library_path, "file": filename, "outcome": outcome,
+             "total_seconds": round(total_seconds, 6), "phases": merged}
+
+    with _write_lock:
+        _remember(entry)
+        if log_path:
+            try:
+                with open(log_path, "a", encoding="utf-8") as fh:
+                    fh.write(json.dumps(entry) + "\n")
+            except OSError as e:
+                print(f"Could not write publish metrics to {log_path}: {e}")
+    return entry
+
+
+def load_history(log_path: str | None) -> None:
+    """Fill the in-memory history from the end of the log, once per log file"""
+    global _loaded_from
+    if not log_path or log_path == _loaded_from:
+        return
+    _loaded_from = log_path
+    try:
+        with open(log_path, "r", encoding="utf-8") as fh:
+            lines = deque(fh, maxlen=HISTORY_SIZE * 10)
+    except OSError:
+        return
+    with _write_lock:
+        _history.clear()
+        for line in lines:
+            try:
+                _remember(json.loads(line))
+            except (ValueError, KeyError):
+                continue
+
+
+def load_history_in_background(log_path: str | None) -> None:
+    """load_history() on a thread, so a log on a slow or network drive doesn't hold up Blender"""
+    if log_path and log_path != _loaded_from:
+        threading.Thread(target=load_history, args=(log_path,), name="copy_to_asset_library_metrics",
+                         daemon=True).start()
+
+
+def _percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def summary(library_path: str) -> dict[str, tuple[float, float, int]]:
+    """phase -> (p50 seconds, p95 seconds, number of publishes) over a library's recent publishes, including the
+    TOTAL of each publish. Only reads memory, so it's safe to call from draw()."""
+    with _write_lock:
+        records = list(_history.get(library_path, ()))
+    by_phase: dict[str, list[float]] = {TOTAL: [r["total_seconds"] for r in records]}
+    for r in records:
+        for name, phase in r["phases"].items():
+            by_phase.setdefault(name, []).append(phase["seconds"])
+    return {name: (_percentile(values, 0.5), _percentile(values, 0.95), len(values))
+            for name, values in by_phase.items() if values}
+
+
+def libraries() -> list[str]:
+    with _write_lock:
+        return list(_history)
@@ -0,0 +1,68 @@
+import bpy
+from typing import Set
+from . import jobs
+from . import lazy
+
+if "_LOADED" in locals():
+    import importlib
+
+    for mod in (jobs, lazy,):  # list all imports here
+        importlib.reload(mod)
+_LOADED = True
+
+TIMER_INTERVAL = 0.1
+
+
+class ModalJobMixin:
+    """Mix into an Operator to run a jobs.BackgroundJob with a progress bar and Esc to cancel. Call _start_job() from
+    execute() and return its result. When the job ends, _job_finished(context) is called on the main thread with
+    self._job holding the result or error, and its return value ends the operator. It can also start another job with
+    _start_job() to carry on, and return that instead."""
+
+    _job: jobs.BackgroundJob | None = None
+    _timer = None
+    _modal_running = False
+
+    def _start_job(self, context, job: jobs.BackgroundJob, status_text: str) -> Set[str]:
+        # The job's threads mustn't be the first to use a deferred module
+        lazy.load_all()
+        self._job = job.start()
+        wm = context.window_manager
+        self._timer = wm.event_timer_add(TIMER_INTERVAL, window=context.window)
+        wm.progress_begin(0, 100)
+        if not self._modal_running:
+            wm.modal_handler_add(self)
+            self._modal_running = True
+        context.workspace.status_text_set(f"{status_text} (Esc to cancel)")
+        return {'RUNNING_MODAL'}
+
+    def _end_job(self, context) -> None:
+        wm = context.window_manager
+        wm.event_timer_remove(self._timer)
+        wm.progress_end()
+        context.workspace.status_text_set(None)
+
+    def _job_finished(self, context) -> Set[str]:
+        """Called on the main thread when the job ends, to report its outcome. Operators override this to use the
+        job's result. By default, a failed or cancelled job cancels the operator, and it finishes otherwise."""
+        if self._job.error:
+            return {'CANCELLED'}
+        return {'FINISHED'}
+
+    def modal(self, context, event) -> Set[str]:
+        if event.type == 'ESC' and event.value == 'PRESS':
+            print(f"Cancelling {self.bl_label}")
+            self._job.cancel()
+            return {'RUNNING_MODAL'}
+
+        if event.type != 'TIMER':
+            return {'PASS_THROUGH'}
+
+        context.window_manager.progress_update(int(self._job.progress * 100))
+        if not self._job.done:
+            return {'PASS_THROUGH'}
+
+        self._end_job(context)
+        result = self._job_finished(context)
+        self._modal_running = 'RUNNING_MODAL' in result
+        return result
@@ -0,0 +1,9 @@
+import re
+
+_NUMERIC_SUFFIX = re.compile(r'[_ ]?\d+(\.[^\.]+)$')
+
+
+def published_filename(filename: str, normalize_numeric_suffix: bool) -> str:
+    """The name a file gets in the Asset Library. With normalization on, a numeric suffix is replaced with "_latest",
+    so "file_101.blend" and "file101.blend" both become "file_latest.blend"."""
+    return _NUMERIC_SUFFIX.sub('_latest\\1', filename) if normalize_numeric_suffix else filename
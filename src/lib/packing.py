@@ -0,0 +1,156 @@
+import bpy
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import NamedTuple
+from . import hashing
+
+if "_LOADED" in locals():
+    import importlib
+
+    for mod in (hashing,):  # list all imports here
+        importlib.reload(mod)
+_LOADED = True
+
+"""
+Packing external images into the published copy only. The images are packed from memory just before the copy is
+saved and unpacked again (back to their original files, which are left alone) straight after, so the open file keeps
+referring to the files on disk.
+
+Reading textures off a network drive is the slow part, so it starts on a thread pool as soon as a publish begins,
+while the rest of the publish gets ready. The data is kept in a cache keyed by content hash, and the hash is cached by
+(path, size, mtime) in lib/hashing.py, so an unchanged texture isn't read again on the next publish.
+"""
+
+MAX_WORKERS = 8
+# Texture data kept between publishes. The least recently used textures are dropped past this.
+CACHE_BYTES = 1024 * 1024 * 1024
+
+
+class PackStats(NamedTuple):
+    images: int
+    bytes: int
+    # Images whose data came from the cache, without reading the file
+    cached: int
+
+    def __str__(self) -> str:
+        return f"packed {self.images} images, {self.bytes / (1024 * 1024):.1f} MB, {self.cached} from cache"
+
+
+class _Load(NamedTuple):
+    digest: str
+    data: bytes
+    cached: bool
+
+
+# digest -> texture data, least recently used first
+_data: OrderedDict[str, bytes] = OrderedDict()
+_data_bytes = 0
+_lock = threading.Lock()
+_pool: ThreadPoolExecutor | None = None
+
+
+def _get_pool() -> ThreadPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="copy_to_asset_library_pack")
+    return _pool
+
+
+def _remember(digest: str, data: bytes) -> None:
+    global _data_bytes
+    with _lock:
+        if digest in _data:
+            return
+        _data[digest] = data
+        _data_bytes += len(data)
+        while _data_bytes > CACHE_BYTES and len(_data) > 1:
+            _, dropped = _data.popitem(last=False)
+            _data_bytes -= len(dropped)
+
+
+def _load(filepath: str) -> _Load:
+    if digest := hashing.cached_hash(filepath):
+        with _lock:
+            if (data := _data.get(digest)) is not None:
+                _data.move_to_end(digest)
+                return _Load(digest, data, True)
+
+    with open(filepath, "rb") as fh:
+        data = fh.read()
+    digest = hashlib.blake2b(data, digest_size=32).hexdigest()
+    hashing.remember(filepath, digest)
+    _remember(digest, data)
+    return _Load(digest, data, False)
+
+
+def _can_pack(image) -> bool:
+    return image.packed_file is None and image.source == 'FILE' and image.library is None and bool(image.filepath)
+
+
+def packable_images() -> list[tuple[str, str]]:
+    """(image name, absolute path) of every image that can be packed from its file. Tiled, sequence and movie images
+    can't be packed from memory, and linked images belong to their library. Images with unsaved changes (e.g., from
+    texture painting) are left out, since their file is out of date and unpacking them again would reload it over the
+    changes (see unsaved_images()). Must run on the main thread."""
+    images = []
+    for image in bpy.data.images:
+        if not _can_pack(image) or image.is_dirty:
+            continue
+        path = bpy.path.abspath(image.filepath)
+        if os.path.isfile(path):
+            images.append((image.name, path))
+    return images
+
+
+def unsaved_images() -> list[str]:
+    """Names of the images that would be packed if it weren't for their unsaved changes. Must run on the main thread."""
+    return [image.name for image in bpy.data.images if _can_pack(image) and image.is_dirty]
+
+
+def prefetch() -> dict[str, Future]:
+    """Start reading the packable images in the background. Returns image name -> future of its data, for packed()."""
+    pool = _get_pool()
+    return {name: pool.submit(_load, path) for name, path in packable_images()}
+
+
+@contextmanager
+def packed(loads: dict[str, Future]):
+    """Pack the prefetched images for the duration of the with block (i.e., the save), then put them back to
+    referring to their files. Yields the PackStats. Images that couldn't be read are left unpacked."""
+    packed_images = []
+    total_bytes = 0
+    cached = 0
+    try:
+        for name, future in loads.items():
+            image = bpy.data.images.get(name)
+            # It may have been painted on since the prefetch started
+            if image is None or image.packed_file is not None or image.is_dirty:
+                continue
+            try:
+                load = future.result()
+            except OSError as e:
+                print(f"Could not read image {name} to pack it: {e}")
+                continue
+            image.pack(data=load.data, data_len=len(load.data))
+            packed_images.append(image)
+            total_bytes += len(load.data)
+            cached += load.cached
+        yield PackStats(len(packed_images), total_bytes, cached)
+    finally:
+        for image in packed_images:
+            # The original file is still there, so this only points the image back at it
+            image.unpack(method='USE_ORIGINAL')
+
+
+def shutdown() -> None:
+    global _pool, _data_bytes
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+    with _lock:
+        _data.clear()
+        _data_bytes = 0
@@ -0,0 +1,88 @@
+import bpy
+from bpy.app.handlers import persistent
+from typing import NamedTuple
+
+"""
+Preflight scanning of the open file, in one loop over each ID collection. Any ID type can be marked as an asset, so
+every collection is visited, but once an asset has been found, collections with nothing else to look at are skipped.
+The image and library findings are gathered in the same loops. The result is cached until the file changes
+(depsgraph update) or is saved or loaded.
+"""
+
+# bpy.data collections holding IDs that can refer to external files by filepath
+EXTERNAL_FILE_COLLECTIONS = ("images", "libraries", "sounds", "movieclips", "fonts", "volumes", "cache_files")
+
+_id_collections: list[str] | None = None
+
+
+def id_collections() -> list[str]:
+    """The names of all of bpy.data's ID collections (objects, meshes, materials...). Any ID can be marked as an
+    asset, so these are where assets are looked for."""
+    global _id_collections
+    if _id_collections is None:
+        _id_collections = [key for key, prop in bpy.data.bl_rna.properties.items()
+                           if isinstance(prop, bpy.types.CollectionProperty)]
+    return _id_collections
+
+
+class PreflightScan(NamedTuple):
+    has_assets: bool
+    unpacked_images: list[str]
+    # (library name, number of linked items)
+    linked_libraries: list[tuple[str, int]]
+    # Whether anything refers to an external file by a relative ("//") path, which would need remapping if the file
+    # were published somewhere else without going through Blender's save
+    has_relative_paths: bool
+
+
+_cached_scan: PreflightScan | None = None
+
+
+def scan() -> PreflightScan:
+    """Scan the open file, or return the cached scan if nothing has changed since the last one."""
+    global _cached_scan
+    if _cached_scan is not None:
+        return _cached_scan
+
+    has_assets = False
+    unpacked_images = []
+    linked_libraries = []
+    has_relative_paths = False
+    for key in id_collections():
+        external = key in EXTERNAL_FILE_COLLECTIONS
+        if has_assets and not external:
+            continue
+        for item in getattr(bpy.data, key, ()):
+            if not has_assets and getattr(item, "asset_data", None) is not None:
+                has_assets = True
+                if not external:
+                    break
+            if not external:
+                continue
+            packed = getattr(item, "packed_file", None) is not None
+            if not packed and not has_relative_paths and item.filepath.startswith("//"):
+                has_relative_paths = True
+            if key == "images" and not packed and item.name != 'Render Result':
+                unpacked_images.append(item.name)
+            elif key == "libraries" and (count := len(item.users_id)) > 0:
+                linked_libraries.append((item.name, count))
+
+    _cached_scan = PreflightScan(has_assets, unpacked_images, linked_libraries, has_relative_paths)
+    return _cached_scan
+
+
+def invalidate() -> None:
+    global _cached_scan
+    _cached_scan = None
+
+
+@persistent
+def _invalidate_handler(*_args) -> None:
+    invalidate()
+
+
+REGISTER_HANDLERS = [
+    ("depsgraph_update_post", _invalidate_handler),
+    ("save_post", _invalidate_handler),
+    ("load_post", _invalidate_handler),
+]
@@ -0,0 +1,106 @@
+import os
+import time
+from typing import NamedTuple
+from . import blendfile
+from . import manifest
+
+if "_LOADED" in locals():
+    import importlib
+
+    for mod in (blendfile, manifest,):  # list all imports here
+        importlib.reload(mod)
+_LOADED = True
+
+"""
+What publishing the open file would change for the users of a library: assets added or removed, assets that moved to
+another catalog, and the size difference. The published file's assets come from its sidecar (see lib/manifest.py)
+when that's up to date with the file, and otherwise from its blocks (see lib/blendfile.py), so the published file is
+never loaded into Blender.
+"""
+
+# ID codes in .blend files, by bpy ID type. Any ID can be an asset (see preflight.id_collections()).
+_ID_CODES = {"ACTION": "AC", "ARMATURE": "AR", "BRUSH": "BR", "CACHEFILE": "CF", "CAMERA": "CA", "COLLECTION": "GR",
+             "CURVE": "CU", "CURVES": "CV", "FONT": "VF", "GREASEPENCIL": "GD", "GREASEPENCIL_V3": "GP",
+             "IMAGE": "IM", "KEY": "KE", "LATTICE": "LT", "LIGHT": "LA", "LIGHT_PROBE": "LP", "LINESTYLE": "LS",
+             "MASK": "MS", "MATERIAL": "MA", "MESH": "ME", "META": "MB", "MOVIECLIP": "MC", "NODETREE": "NT",
+             "OBJECT": "OB", "PAINTCURVE": "PC", "PALETTE": "PL", "PARTICLE": "PA", "POINTCLOUD": "PT",
+             "SCENE": "SC", "SOUND": "SO", "SPEAKER": "SK", "TEXT": "TX", "TEXTURE": "TE", "VOLUME": "VO",
+             "WORKSPACE": "WS", "WORLD": "WO"}
+_KINDS = {code: id_type.replace("_", " ").capitalize() for id_type, code in _ID_CODES.items()} \
+    | {"GR": "Collection", "NT": "Node group", "VF": "Font", "MB": "Metaball", "GD": "Grease Pencil",
+       "GP": "Grease Pencil"}
+
+SOURCE_SIDECAR = "sidecar"
+SOURCE_BLOCKS = "blocks"
+
+
+class AssetKey(NamedTuple):
+    code: str
+    name: str
+
+    def __str__(self) -> str:
+        return f"{_KINDS.get(self.code, self.code)} \"{self.name}\""
+
+
+class PublishDiff(NamedTuple):
+    # False if nothing has been published there yet
+    exists: bool
+    added: list[AssetKey]
+    removed: list[AssetKey]
+    # Assets whose catalog UUID is different
+    recataloged: list[AssetKey]
+    destination_bytes: int
+    # What the copy is expected to weigh (the open file's size on disk)
+    source_bytes: int
+    # Where the published assets were read from (SOURCE_SIDECAR or SOURCE_BLOCKS), or None if there's nothing there
+    source: str | None
+    seconds: float
+
+
+def _published_assets(destination: str) -> tuple[dict[AssetKey, str | None], str]:
+    """The published file's assets (key -> catalog UUID, None if unknown), and where they came from"""
+    sidecar = manifest.read_sidecar(destination)
+    if sidecar and manifest.is_current(sidecar, destination):
+        return {AssetKey(_ID_CODES.get(a["id_type"], a["id_type"]), a["name"]): a["catalog_id"]
+                for a in sidecar["assets"]}, SOURCE_SIDECAR
+    # Linked IDs are the other files' assets, and aren't published with this one
+    return {AssetKey(a.code, a.name): a.catalog_id for a in blendfile.read_info(destination).assets
+            if a.code != blendfile.LINKED_ID_CODE}, SOURCE_BLOCKS
+
+
+def compare(destination: str, entries: list[manifest.AssetEntry], source_bytes: int) -> PublishDiff:
+    """Compare the assets about to be published (see manifest.collect()) with those already at the destination.
+    Raises blendfile.BlendFileException if the published file can't be read."""
+    start = time.perf_counter()
+    current = {AssetKey(_ID_CODES.get(e.id_type, e.id_type), e.name): e.catalog_id for e in entries}
+    if not os.path.isfile(destination):
+        return PublishDiff(False, list(current), [], [], 0, source_bytes, None, time.perf_counter() - start)
+
+    published, source = _published_assets(destination)
+    added = [key for key in current if key not in published]
+    removed = [key for key in published if key not in current]
+    recataloged = [key for key, catalog_id in current.items()
+                   if published.get(key) is not None and published[key] != catalog_id]
+    return PublishDiff(True, added, removed, recataloged, os.path.getsize(destination), source_bytes, source,
+                       time.perf_counter() - start)
+
+
+def _listed(keys: list[AssetKey], what: str) -> list[str]:
+    if len(keys) > 10:
+        return [f"{len(keys)} assets {what}"]
+    return [f"{key} {what}" for key in keys]
+
+
+def describe(diff: PublishDiff) -> list[str]:
+    """Lines for the preflight popup"""
+    if not diff.exists:
+        return [f"Not published here yet. {len(diff.added)} assets would be added "
+                f"(about {diff.source_bytes / (1024 * 1024):.1f} MB)"]
+    lines = _listed(diff.added, "would be added") + _listed(diff.removed, "would be removed") \
+        + _listed(diff.recataloged, "would move to another catalog")
+    if not lines:
+        lines = ["No assets would be added, removed or moved to another catalog"]
+    change = (diff.source_bytes - diff.destination_bytes) / (1024 * 1024)
+    lines.append(f"Size: {diff.destination_bytes / (1024 * 1024):.1f} MB now, about "
+                 f"{diff.source_bytes / (1024 * 1024):.1f} MB after ({change:+.1f} MB)")
+    return lines
@@ -0,0 +1,217 @@
+import os
+import sqlite3
+import time
+from contextlib import contextmanager, nullcontext
+from typing import NamedTuple
+
+"""
+A small SQLite index in each Asset Library recording what was published there, from where, and when. This makes
+"is this file up to date?" a lookup instead of opening or hashing anything in the library, even with thousands of
+published files. A publish holds the index's write lock only while it swaps the file into place, and only commits its
+record if the swap succeeded, so the index never describes a file that isn't there. The slow parts of a publish (the
+save, copy and backup) happen outside it, so publishes of other files to the same library don't wait on them.
+
+The index uses SQLite's default rollback journal rather than WAL, since WAL doesn't work on network shares.
+"""
+
+INDEX_FILENAME = ".copy_to_asset_library_index.sqlite"
+BUSY_TIMEOUT = 30.0
+
+STRATEGY_SAVE = "save"
+STRATEGY_SYMLINK = "symlink"
+# Put back from the backup store (see lib/backups.py), so it's an older version of the source on purpose
+STRATEGY_RESTORE = "restore"
+
+# Why a published file is out of date
+SOURCE_MISSING = "SOURCE_MISSING"
+SOURCE_CHANGED = "SOURCE_CHANGED"
+DESTINATION_CHANGED = "DESTINATION_CHANGED"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS published (
+    destination_name TEXT PRIMARY KEY,
+    source_path TEXT NOT NULL,
+    source_size INTEGER NOT NULL,
+    source_mtime_ns INTEGER NOT NULL,
+    content_hash TEXT,
+    size INTEGER NOT NULL,
+    published_at REAL NOT NULL,
+    blender_version TEXT NOT NULL,
+    strategy TEXT NOT NULL
+)
+"""
+
+
+class Origin(NamedTuple):
+    """Where a publish came from, captured on the main thread before saving"""
+    source_path: str
+    source_size: int
+    source_mtime_ns: int
+    blender_version: str
+
+
+class Entry(NamedTuple):
+    destination_name: str
+    source_path: str
+    source_size: int
+    source_mtime_ns: int
+    content_hash: str | None
+    size: int
+    published_at: float
+    blender_version: str
+    strategy: str
+
+
+class StaleEntry(NamedTuple):
+    entry: Entry
+    reason: str
+
+
+def origin(source_path: str, blender_version: str) -> Origin:
+    st = os.stat(source_path)
+    return Origin(os.path.abspath(source_path), st.st_size, st.st_mtime_ns, blender_version)
+
+
+def index_path(library_path: str) -> str:
+    return os.path.join(library_path, INDEX_FILENAME)
+
+
+def _connect(library_path: str) -> sqlite3.Connection:
+    # Transactions are managed explicitly (BEGIN IMMEDIATE) rather than by the sqlite3 module
+    conn = sqlite3.connect(index_path(library_path), timeout=BUSY_TIMEOUT, isolation_level=None)
+    conn.execute(_SCHEMA)
+    return conn
+
+
+class Transaction:
+    def __init__(self, conn: sqlite3.Connection, origin_: Origin):
+        self._conn = conn
+        self._origin = origin_
+        self._writing = False
+
+    @contextmanager
+    def writing(self):
+        """Hold the index's write lock for the with block, which should be no more than the swap and record(). What's
+        record()ed is committed if the block succeeds and rolled back if it raises. If the lock can't be had, the block
+        still runs, unrecorded."""
+        try:
+            self._conn.execute("BEGIN IMMEDIATE")
+        except sqlite3.Error as e:
+            print(f"Could not lock the publish index, so not recording this publish: {e}")
+            yield
+            return
+
+        self._writing = True
+        try:
+            yield
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        else:
+            self._conn.execute("COMMIT")
+        finally:
+            self._writing = False
+
+    def record(self, destination: str, content_hash: str | None, strategy: str) -> None:
+        """Record a publish. Only does anything inside writing()."""
+        if not self._writing:
+            return
+        size = os.lstat(destination).st_size if strategy == STRATEGY_SYMLINK else os.path.getsize(destination)
+        self._conn.execute("INSERT OR REPLACE INTO published VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                           (os.path.basename(destination), *self._origin[:3], content_hash, size, time.time(),
+                            self._origin.blender_version, strategy))
+
+
+@contextmanager
+def publishing(destination: str, origin_: Origin | None):
+    """Open the library's index for a publish to destination. Yields a Transaction to record() the publish on, inside
+    writing() (see writing()). Yields None if origin_ is None or the index can't be opened, in which case the publish
+    goes ahead unrecorded."""
+    conn = None
+    if origin_ is not None:
+        try:
+            conn = _connect(os.path.dirname(destination))
+        except sqlite3.Error as e:
+            print(f"Could not open the publish index for {destination}, so not recording this publish: {e}")
+            conn = None
+
+    if conn is None:
+        yield None
+        return
+
+    try:
+        yield Transaction(conn, origin_)
+    finally:
+        conn.close()
+
+
+def writing(transaction: Transaction | None):
+    """Transaction.writing(), or nothing if there's no index to write to"""
+    return transaction.writing() if transaction else nullcontext()
+
+
+def record_restore(destination: str, content_hash: str) -> None:
+    """Update a published file's record after it was restored from a backup, so it isn't reported as changed (and
+    republished over). It keeps its source, so it's stale again once the source changes. Does nothing if the file
+    isn't in the index."""
+    library_path = os.path.dirname(destination)
+    if not os.path.isfile(index_path(library_path)):
+        return
+    try:
+        conn = _connect(library_path)
+        try:
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.execute("UPDATE published SET content_hash = ?, size = ?, published_at = ?, strategy = ? "
+                             "WHERE destination_name = ?", (content_hash, os.path.getsize(destination), time.time(),
+                                                            STRATEGY_RESTORE, os.path.basename(destination)))
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        print(f"Could not record the restore of {destination} in the publish index: {e}")
+
+
+def entries(library_path: str) -> list[Entry]:
+    if not os.path.isfile(index_path(library_path)):
+        return []
+    conn = _connect(library_path)
+    try:
+        return [Entry(*row) for row in conn.execute("SELECT * FROM published ORDER BY destination_name")]
+    finally:
+        conn.close()
+
+
+def lookup(library_path: str, destination_name: str) -> Entry | None:
+    if not os.path.isfile(index_path(library_path)):
+        return None
+    conn = _connect(library_path)
+    try:
+        row = conn.execute("SELECT * FROM published WHERE destination_name = ?", (destination_name,)).fetchone()
+    finally:
+        conn.close()
+    return Entry(*row) if row else None
+
+
+def _stale_reason(library_path: str, entry: Entry) -> str | None:
+    try:
+        st = os.stat(entry.source_path)
+    except FileNotFoundError:
+        return SOURCE_MISSING
+    # A symlink always shows the latest source, so only a missing source matters
+    if entry.strategy == STRATEGY_SYMLINK:
+        return None
+    if (st.st_size, st.st_mtime_ns) != (entry.source_size, entry.source_mtime_ns):
+        return SOURCE_CHANGED
+    try:
+        if os.path.getsize(os.path.join(library_path, entry.destination_name)) != entry.size:
+            return DESTINATION_CHANGED
+    except FileNotFoundError:
+        return DESTINATION_CHANGED
+    return None
+
+
+def stale(library_path: str) -> list[StaleEntry]:
+    """Published files whose source has changed or gone missing since they were published, or whose published copy
+    has been changed or removed by something else. Only stats files, never reads them."""
+    return [StaleEntry(entry, reason) for entry in entries(library_path)
+            if (reason := _stale_reason(library_path, entry))]
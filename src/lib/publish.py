@@ -0,0 +1,387 @@
+import errno
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+from . import backups
+from . import cats
+from . import codec
+from . import hashing
+from . import jobs
+from . import linkstrategy
+from . import lock
+from . import manifest
+from . import metrics
+from . import pubindex
+from . import resumable
+from . import transfer
+
+if "_LOADED" in locals():
+    import importlib
+
+    for mod in (backups, cats, codec, hashing, jobs, linkstrategy, lock, manifest, metrics, pubindex, resumable,
+                transfer,):  # list all imports here
+        importlib.reload(mod)
+_LOADED = True
+
+"""
+Filesystem side of publishing a file to an Asset Library: backups, transfers and change detection. Nothing in here
+touches bpy, so it's safe to run from a background job.
+"""
+
+UNCHANGED = "UNCHANGED"
+COPIED = "COPIED"
+
+# How long to wait for another publish of the same file (from this or another Blender) to finish
+LOCK_TIMEOUT = 120.0
+
+
+class PublishResult(NamedTuple):
+    outcome: str
+    copy_stats: transfer.CopyStats | None = None
+    encode_stats: codec.EncodeStats | None = None
+    # Something that went wrong after the file itself was published (e.g., the catalog merge)
+    warning: str | None = None
+    # How long each step took (see lib/metrics.py)
+    phases: tuple[metrics.Phase, ...] = ()
+
+
+def backup_existing(destination: str, retention: backups.Retention | None = None, job=None) -> str | None:
+    """Back up an existing destination file for the caller to replace. With a retention policy, it goes into the
+    library's backup store as a new generation (see lib/backups.py), and old generations are pruned in the
+    background. Without one, it's hard linked to its ".blend1" backup, replacing any older backup. Either way, if the
+    filesystem can't hard link, the file is moved to the backup instead, so the destination is briefly missing until
+    the caller puts the new file in place. Returns the backup path, or None if there was nothing to back up."""
+    if retention is not None:
+        backup_file = backups.store(destination, job)
+        if backup_file:
+            backups.schedule_prune(os.path.dirname(destination), retention)
+        return backup_file
+
+    backup_file = f"{destination}1"
+    # A symlink has no content of its own to keep
+    if os.path.islink(destination) or not os.path.isfile(destination):
+        return None
+    print(f"Linking existing {destination} to {backup_file}")
+    temp_path = transfer.temp_path(backup_file)
+    try:
+        try:
+            transfer.link_file(destination, temp_path)
+        except OSError as e:
+            if not transfer.links_unsupported(e):
+                raise
+            # Copying the whole previous file on every publish is too slow, so move it aside instead
+            print(f"Can't hard link in {os.path.dirname(destination)} ({e}), so renaming it to {backup_file}")
+            os.replace(destination, backup_file)
+        else:
+            os.replace(temp_path, backup_file)
+    finally:
+        if os.path.isfile(temp_path):
+            os.remove(temp_path)
+    return backup_file
+
+
+def locked(destination: str, timeout: float = LOCK_TIMEOUT):
+    """Serialize publishes of one destination file, across Blender instances and machines"""
+    return lock.file_lock(destination, timeout)
+
+
+def backup_phases(destination: str, retention: backups.Retention | None = None,
+                  job: jobs.BackgroundJob | None = None) -> tuple[metrics.Phase, ...]:
+    """backup_existing() as a background job, for a caller that has the destination locked() and will save over it
+    once the backup is done. Returns how long it took."""
+    phases = []
+    with metrics.measure(phases, metrics.BACKUP):
+        backup_existing(destination, retention, job)
+    if job:
+        job.progress = 1.0
+    return tuple(phases)
+
+
+def write_manifest(destination: str, entries: list[manifest.AssetEntry] | None, outcome: str,
+                   phases: list[metrics.Phase]) -> str | None:
+    """Write the sidecar and library manifest for a file that's just been published (see lib/manifest.py). Call it
+    with the destination locked(), so the manifest describes the file this publish placed and not one another publish
+    swapped in since. Does nothing if entries is None, or if the file is unchanged and its sidecar is still current.
+    Returns a warning if the manifest couldn't be written."""
+    if entries is None:
+        return None
+    if outcome == UNCHANGED and (sidecar := manifest.read_sidecar(destination)) \
+            and manifest.is_current(sidecar, destination):
+        return None
+    try:
+        with metrics.measure(phases, metrics.MANIFEST):
+            manifest.write(destination, entries)
+    except (OSError, lock.LockTimeoutException) as e:
+        print("Asset manifest exception", e)
+        return "Could not update the asset manifest. Copied asset but the manifest is out of date."
+    return None
+
+
+def _with_catalogs(result: PublishResult, library_path: str, cats_text: str | None) -> PublishResult:
+    """Merge cats_text into the library's catalogs once its file is published, adding the time it took and any
+    warning to the result"""
+    if not cats_text:
+        return result
+    phases = []
+    warning = None
+    try:
+        with metrics.measure(phases, metrics.CATALOG_MERGE):
+            cats.merge_catalogs(library_path, cats_text)
+    except cats.CatalogVersionException as e:
+        print("Catalog version exception", e)
+        warning = "Catalog version was invalid or too new. Copied asset but did not update the catalog file."
+    except lock.LockTimeoutException as e:
+        print("Catalog lock timeout", e)
+        warning = "Catalog file is locked by another publish. Copied asset but did not update the catalog file."
+    except OSError as e:
+        print("Catalog merge exception", e)
+        warning = f"Could not update the catalog file ({e}). Copied asset but did not update the catalog file."
+    return result._replace(warning=result.warning or warning, phases=result.phases + tuple(phases))
+
+
+def add_catalogs(result: PublishResult, library_path: str, cats_text: str | None,
+                 job: jobs.BackgroundJob | None = None) -> PublishResult:
+    """Merge catalogs into a library after its file was saved in place on the main thread, so waiting for the catalog
+    file's lock happens in a background job like the other publishes"""
+    result = _with_catalogs(result, library_path, cats_text)
+    if job:
+        job.progress = 1.0
+    return result
+
+
+def _symlink(source: str, destination: str, phases: list[metrics.Phase]) -> None:
+    print(f"Creating symlink from {source} -> {destination}")
+    temp_path = transfer.temp_path(destination)
+    with metrics.measure(phases, metrics.SYMLINK):
+        os.symlink(source, temp_path)
+        try:
+            os.replace(temp_path, destination)
+        except OSError:
+            os.remove(temp_path)
+            raise
+
+
+def publish_symlink(source: str, destination: str, create_backup: bool, retention: backups.Retention | None = None,
+                    origin: pubindex.Origin | None = None,
+                    manifest_entries: list[manifest.AssetEntry] | None = None, cats_text: str | None = None,
+                    job: jobs.BackgroundJob | None = None) -> PublishResult:
+    """Replace the destination with a symlink to source (the open file), backing up the existing file first. Waiting
+    for the destination's lock and the backup can both take a while, so this runs in a background job like the
+    copies. The other options are as for publish_staged_file()."""
+    phases = []
+    with locked(destination), pubindex.publishing(destination, origin) as index:
+        if create_backup:
+            with metrics.measure(phases, metrics.BACKUP):
+                backup_existing(destination, retention, job)
+        with pubindex.writing(index):
+            _symlink(source, destination, phases)
+            if index:
+                index.record(destination, None, pubindex.STRATEGY_SYMLINK)
+        warning = write_manifest(destination, manifest_entries, COPIED, phases)
+    result = _with_catalogs(PublishResult(COPIED, warning=warning, phases=tuple(phases)),
+                            os.path.dirname(destination), cats_text)
+    if job:
+        job.progress = 1.0
+    return result
+
+
+def symlink_to_many(source: str, destinations: list[str], create_backup: bool, cats_text: str | None = None,
+                    retention: backups.Retention | None = None, origin: pubindex.Origin | None = None,
+                    manifest_entries: list[manifest.AssetEntry] | None = None,
+                    job: jobs.BackgroundJob | None = None) -> dict[str, PublishResult | BaseException]:
+    """publish_symlink() to several libraries at once. Returns each destination's result, or the exception that
+    stopped it, as publish_to_many() does."""
+    children = jobs.split(job, len(destinations))
+    results: dict[str, PublishResult | BaseException] = {}
+    with ThreadPoolExecutor(max_workers=len(destinations) or 1) as pool:
+        futures = {pool.submit(publish_symlink, source, destination, create_backup, retention, origin,
+                               manifest_entries, cats_text, child): destination
+                   for destination, child in zip(destinations, children)}
+        for future, destination in futures.items():
+            try:
+                results[destination] = future.result()
+            except BaseException as e:
+                print(f"Symlinking to {destination} failed: {e}")
+                results[destination] = e
+    if job:
+        job.check_cancelled()
+    return results
+
+
+def _unchanged(source: str, destination: str, strategy: str, skip_unchanged: bool, source_hash: str | None,
+               job: jobs.BackgroundJob | None) -> bool:
+    if not os.path.isfile(destination):
+        return False
+    if strategy == linkstrategy.STRATEGY_HARDLINK and os.path.samefile(source, destination):
+        return True
+    return skip_unchanged and os.path.getsize(destination) == os.path.getsize(source) \
+        and hashing.file_hash(destination, job) == source_hash
+
+
+def _stage(source: str, destination: str, temp_path: str, strategy: str, movable: bool,
+           resumable_options: resumable.Options | None, job: jobs.BackgroundJob | None) -> transfer.CopyStats:
+    """Put the new file at its temporary path beside the destination. A movable (scratch) source on the same
+    filesystem is renamed there rather than copied, and a plain copy is made resumable if resumable_options are
+    given."""
+    if movable:
+        start = time.perf_counter()
+        try:
+            os.rename(source, temp_path)
+            return transfer.CopyStats(transfer.METHOD_RENAME, os.path.getsize(temp_path), time.perf_counter() - start)
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+    if resumable_options and strategy == linkstrategy.STRATEGY_COPY:
+        partial = resumable.partial_path(destination)
+        try:
+            stats = resumable.copy_file(source, partial, resumable_options, job)
+        except lock.LockTimeoutException:
+            print(f"Another publish is copying to {partial}, so making a separate copy")
+        else:
+            os.replace(partial, temp_path)
+            return stats
+    return linkstrategy.place_file(source, temp_path, strategy, job)
+
+
+def _place(source: str, destination: str, strategy: str, create_backup: bool, skip_unchanged: bool,
+           job: jobs.BackgroundJob | None, encode_stats: codec.EncodeStats | None = None,
+           retention: backups.Retention | None = None, origin: pubindex.Origin | None = None,
+           phases: tuple[metrics.Phase, ...] = (), movable: bool = False,
+           resumable_options: resumable.Options | None = None,
+           manifest_entries: list[manifest.AssetEntry] | None = None) -> PublishResult:
+    phases = list(phases)
+    # The publish index records the content hash, so it needs one even when unchanged files aren't being skipped
+    source_hash = None
+    if skip_unchanged or origin:
+        with metrics.measure(phases, metrics.HASH, os.path.getsize(source)):
+            source_hash = hashing.file_hash(source, job)
+
+    temp_path = transfer.temp_path(destination)
+    copy_stats = None
+    try:
+        # Also checked before waiting for the lock, so an unchanged file isn't copied for nothing
+        if not _unchanged(source, destination, strategy, skip_unchanged, source_hash, job):
+            with metrics.measure(phases, metrics.COPY, os.path.getsize(source)):
+                copy_stats = _stage(source, destination, temp_path, strategy, movable, resumable_options, job)
+        # The check, backup, swap and index record happen together, and the slow part (the copy) is already done
+        with locked(destination), pubindex.publishing(destination, origin) as index:
+            # Another publish may have replaced the destination while this one waited for the lock
+            if copy_stats is None and _unchanged(source, destination, strategy, skip_unchanged, source_hash, job):
+                print(f"{destination} already has this content. Leaving it alone.")
+                with pubindex.writing(index):
+                    if index:
+                        index.record(destination, source_hash, strategy)
+                warning = write_manifest(destination, manifest_entries, UNCHANGED, phases)
+                return PublishResult(UNCHANGED, encode_stats=encode_stats, warning=warning, phases=tuple(phases))
+            if copy_stats is None:
+                with metrics.measure(phases, metrics.COPY, os.path.getsize(source)):
+                    copy_stats = _stage(source, destination, temp_path, strategy, movable, resumable_options, job)
+
+            print(f"Placing {source} at {destination} ({strategy}, {copy_stats.method})")
+            with metrics.measure(phases, metrics.BACKUP):
+                if create_backup:
+                    backup_existing(destination, retention, job)
+            transfer.sync_file(temp_path)
+            # Other publishes to the library wait for the index, so it's only held for the swap itself
+            with pubindex.writing(index):
+                transfer.replace(temp_path, destination, synced=True)
+                if index:
+                    index.record(destination, source_hash, strategy)
+            if source_hash:
+                # Remember the new destination's hash so the next publish (and the manifest) doesn't read it back
+                hashing.remember(destination, source_hash)
+            warning = write_manifest(destination, manifest_entries, COPIED, phases)
+    finally:
+        if os.path.isfile(temp_path):
+            os.remove(temp_path)
+
+    return PublishResult(COPIED, copy_stats, encode_stats, warning, tuple(phases))
+
+
+def _encode(staged: str, zstd_level: int | None, zstd_threads: int, job: jobs.BackgroundJob | None,
+            phases: list[metrics.Phase]) -> tuple[str, codec.EncodeStats | None]:
+    if zstd_level is None:
+        return staged, None
+    encoded = f"{staged}.zst"
+    with metrics.measure(phases, metrics.ENCODE, os.path.getsize(staged)):
+        stats = codec.encode_zstd(staged, encoded, zstd_level, zstd_threads, job)
+    return encoded, stats
+
+
+def publish_staged_file(staged: str, destination: str, create_backup: bool, skip_unchanged: bool,
+                        zstd_level: int | None = None, zstd_threads: int = 0,
+                        retention: backups.Retention | None = None, origin: pubindex.Origin | None = None,
+                        resumable_options: resumable.Options | None = None,
+                        manifest_entries: list[manifest.AssetEntry] | None = None, cats_text: str | None = None,
+                        job: jobs.BackgroundJob | None = None) -> PublishResult:
+    """Move a staged (saved) scratch file into place at the destination, backing up the existing file first. It's
+    renamed into place when it's on the destination's filesystem (e.g., staged in the library with
+    transfer.temp_path()) and copied otherwise. If zstd_level is given, the staged file is first re-encoded with
+    Zstandard at that level. If skip_unchanged is set and the
+    destination already has identical content, nothing is touched. retention selects the backup store over the
+    ".blend1" backup (see backup_existing()), origin, if given, is recorded in the library's publish index, and
+    resumable_options, if given, make a copy (rather than a rename) resumable (see lib/resumable.py). If
+    manifest_entries are given, the published file's asset manifest is written (see write_manifest()), and if
+    cats_text is given, it's merged into the library's catalogs."""
+    phases = []
+    staged, encode_stats = _encode(staged, zstd_level, zstd_threads, job, phases)
+    result = _place(staged, destination, linkstrategy.STRATEGY_COPY, create_backup, skip_unchanged, job, encode_stats,
+                    retention, origin, tuple(phases), movable=True, resumable_options=resumable_options,
+                    manifest_entries=manifest_entries)
+    return _with_catalogs(result, os.path.dirname(destination), cats_text)
+
+
+def publish_existing_file(source: str, destination: str, strategy: str, create_backup: bool, skip_unchanged: bool,
+                          retention: backups.Retention | None = None, origin: pubindex.Origin | None = None,
+                          resumable_options: resumable.Options | None = None,
+                          manifest_entries: list[manifest.AssetEntry] | None = None, cats_text: str | None = None,
+                          job: jobs.BackgroundJob | None = None) -> PublishResult:
+    """Publish a file that's already saved on disk as-is, with one of the linkstrategy strategies, instead of
+    re-saving it through Blender. The other options are as for publish_staged_file()."""
+    start = time.perf_counter()
+    result = _place(source, destination, strategy, create_backup, skip_unchanged, job, retention=retention,
+                    origin=origin, resumable_options=resumable_options, manifest_entries=manifest_entries)
+    print(f"Published {source} to {destination} by {strategy} in {time.perf_counter() - start:.3f}s")
+    return _with_catalogs(result, os.path.dirname(destination), cats_text)
+
+
+def publish_to_many(source: str, targets: list[tuple[str, str]], create_backup: bool, skip_unchanged: bool,
+                    zstd_level: int | None = None, zstd_threads: int = 0, cats_text: str | None = None,
+                    retention: backups.Retention | None = None, origin: pubindex.Origin | None = None,
+                    resumable_options: resumable.Options | None = None,
+                    manifest_entries: list[manifest.AssetEntry] | None = None,
+                    job: jobs.BackgroundJob | None = None) -> dict[str, PublishResult | BaseException]:
+    """Publish one saved or staged file to several libraries at once. targets is a list of (destination path,
+    linkstrategy strategy). Encoding and hashing of the source happen once, then each destination is backed up,
+    placed and (if cats_text is given) has its catalogs merged concurrently. Returns each destination's result, or
+    the exception that stopped it."""
+    phases = []
+    source, encode_stats = _encode(source, zstd_level, zstd_threads, job, phases)
+    if skip_unchanged or origin:
+        # Hash once up front, rather than every destination's thread racing to hash the same file
+        with metrics.measure(phases, metrics.HASH, os.path.getsize(source)):
+            hashing.file_hash(source, job)
+
+    def publish_one(destination: str, strategy: str, child_job: jobs.ChildJob) -> PublishResult:
+        result = _place(source, destination, strategy, create_backup, skip_unchanged, child_job, encode_stats,
+                        retention, origin, tuple(phases), resumable_options=resumable_options,
+                        manifest_entries=manifest_entries)
+        result = _with_catalogs(result, os.path.dirname(destination), cats_text)
+        child_job.progress = 1.0
+        return result
+
+    children = jobs.split(job, len(targets))
+    results: dict[str, PublishResult | BaseException] = {}
+    with ThreadPoolExecutor(max_workers=len(targets) or 1) as pool:
+        futures = {pool.submit(publish_one, destination, strategy, child): destination
+                   for (destination, strategy), child in zip(targets, children)}
+        for future, destination in futures.items():
+            try:
+                results[destination] = future.result()
+            except BaseException as e:
+                print(f"Publishing to {destination} failed: {e}")
+                results[destination] = e
+    if job:
+        job.check_cancelled()
+    return results
@@ -0,0 +1,218 @@
+import errno
+import hashlib
+import json
+import os
+import time
+from typing import Callable, NamedTuple
+from . import hashing
+from . import jobs
+from . import lock
+from . import transfer
+
+if "_LOADED" in locals():
+    import importlib
+
+    for mod in (hashing, jobs, lock, transfer,):  # list all imports here
+        importlib.reload(mod)
+_LOADED = True
+
+"""
+Resumable copies for slow or flaky network libraries (SMB, NFS, sshfs). The file is copied in large chunks into a
+hidden ".partial" file beside the destination, and each chunk's digest is added to a sidecar journal once the chunk
+is on disk. If the connection drops, the copy is retried and picks up after the last chunk in the journal that still
+matches the source, and the same goes for the next publish of identical content after a cancel or a crash. Before
+the file is handed over to be swapped in, it's read back and checked against the source's hash as a whole.
+
+Tests and benchmarks can inject I/O faults with set_fault_hook().
+"""
+
+CHUNK_SIZE = 16 * 1024 * 1024
+# Writes are split into slices this size, so the bandwidth cap is smooth and faults can land mid-chunk
+SLICE_SIZE = 1024 * 1024
+RETRIES = 5
+RETRY_DELAY = 1.0
+JOURNAL_VERSION = 1
+
+# Errors that won't go away by trying again
+_PERMANENT_ERRNOS = {errno.ENOSPC, errno.EDQUOT, errno.EACCES, errno.EPERM, errno.EROFS, errno.ENOENT}
+
+METHOD_RESUMABLE = "resumable"
+
+
+class Options(NamedTuple):
+    # Bytes per second to write at most, or 0 for no limit
+    bandwidth_limit: float = 0.0
+    retries: int = RETRIES
+
+
+class VerificationException(BaseException):
+    pass
+
+
+# Called as hook(operation, offset) before each write ("write") and read back ("verify"). It can raise OSError to
+# simulate a failing drive or connection.
+_fault_hook: Callable[[str, int], None] | None = None
+
+
+def set_fault_hook(hook: Callable[[str, int], None] | None) -> None:
+    global _fault_hook
+    _fault_hook = hook
+
+
+def _fault(operation: str, offset: int) -> None:
+    if _fault_hook:
+        _fault_hook(operation, offset)
+
+
+def partial_path(destination: str) -> str:
+    """Where a resumable copy to destination is built. It doesn't depend on the process, so a later publish can pick
+    it up."""
+    return os.path.join(os.path.dirname(destination), f".{os.path.basename(destination)}.partial")
+
+
+def _journal_path(partial: str) -> str:
+    return f"{partial}.journal"
+
+
+def _chunk_digest(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def _read_journal(partial: str) -> list[str]:
+    try:
+        with open(_journal_path(partial), "r", encoding="utf-8") as fh:
+            journal = json.load(fh)
+    except (OSError, ValueError):
+        return []
+    if journal.get("version") != JOURNAL_VERSION or journal.get("chunk_size") != CHUNK_SIZE:
+        return []
+    return journal.get("chunks", [])
+
+
+def _write_journal(partial: str, chunks: list[str]) -> None:
+    journal_path = _journal_path(partial)
+    temp = f"{journal_path}.tmp"
+    with open(temp, "w", encoding="utf-8") as fh:
+        json.dump({"version": JOURNAL_VERSION, "chunk_size": CHUNK_SIZE, "chunks": chunks}, fh)
+    os.replace(temp, journal_path)
+
+
+def _verified_chunks(source_fh, partial: str) -> list[str]:
+    """The journaled chunks that are still in the partial file and still match the source, in order"""
+    try:
+        partial_size = os.path.getsize(partial)
+    except OSError:
+        return []
+    verified = []
+    for index, digest in enumerate(_read_journal(partial)):
+        source_fh.seek(index * CHUNK_SIZE)
+        data = source_fh.read(CHUNK_SIZE)
+        if not data or index * CHUNK_SIZE + len(data) > partial_size or _chunk_digest(data) != digest:
+            break
+        verified.append(digest)
+    return verified
+
+
+def _write_throttled(fd: int, data: bytes, offset: int, options: Options, started: float, written: list[int],
+                     job: jobs.BackgroundJob | None, held: lock.HeldLock) -> None:
+    view = memoryview(data)
+    os.lseek(fd, offset, os.SEEK_SET)
+    while view:
+        if job:
+            job.check_cancelled()
+        held.check()
+        _fault("write", offset)
+        count = os.write(fd, view[:SLICE_SIZE])
+        view = view[count:]
+        offset += count
+        written[0] += count
+        if options.bandwidth_limit:
+            ahead = written[0] / options.bandwidth_limit - (time.perf_counter() - started)
+            if ahead > 0 and job:
+                job.sleep(ahead)
+            elif ahead > 0:
+                time.sleep(ahead)
+
+
+def _verify(partial: str, expected: str, job: jobs.BackgroundJob | None) -> None:
+    digest = hashlib.blake2b(digest_size=32)
+    offset = 0
+    with open(partial, "rb") as fh:
+        while chunk := fh.read(hashing.HASH_CHUNK_SIZE):
+            if job:
+                job.check_cancelled()
+            _fault("verify", offset)
+            digest.update(chunk)
+            offset += len(chunk)
+    if digest.hexdigest() != expected:
+        raise VerificationException(f"{partial} doesn't match its source after copying")
+
+
+def _attempt(source: str, partial: str, total: int, options: Options, started: float, written: list[int],
+             job: jobs.BackgroundJob | None, held: lock.HeldLock) -> None:
+    """One try at finishing the copy, from the last verified chunk"""
+    with open(source, "rb") as source_fh:
+        chunks = _verified_chunks(source_fh, partial)
+        offset = min(len(chunks) * CHUNK_SIZE, total)
+        fd = os.open(partial, os.O_RDWR | os.O_CREAT | getattr(os, "O_BINARY", 0), 0o644)
+        try:
+            os.ftruncate(fd, offset)
+            source_fh.seek(offset)
+            while data := source_fh.read(CHUNK_SIZE):
+                _write_throttled(fd, data, offset, options, started, written, job, held)
+                os.fsync(fd)
+                offset += len(data)
+                chunks.append(_chunk_digest(data))
+                _write_journal(partial, chunks)
+                if job:
+                    job.progress = offset / total if total else 1.0
+        finally:
+            os.close(fd)
+
+
+def _remove_journal(partial: str) -> None:
+    if os.path.isfile(_journal_path(partial)):
+        os.remove(_journal_path(partial))
+
+
+def copy_file(source: str, partial: str, options: Options,
+              job: jobs.BackgroundJob | None = None) -> transfer.CopyStats:
+    """Copy source to partial (see partial_path()) resumably, retrying failed I/O and verifying the result. On
+    success, the partial file is complete and its journal is gone, ready to be moved into place. On failure or
+    cancellation, both are left behind for the next try to resume from. Raises lock.LockTimeoutException right away
+    if another copy to the same partial file is running. The lock is kept fresh for as long as a throttled copy takes
+    (see lib/lock.py), and if another process takes it over anyway, the copy stops with lock.LockLostException rather
+    than writing into the same file."""
+    total = os.path.getsize(source)
+    expected = hashing.file_hash(source, job)
+    started = time.perf_counter()
+    written = [0]
+    with lock.file_lock(partial, timeout=0) as held:
+        with open(source, "rb") as source_fh:
+            resumed_from = min(len(_verified_chunks(source_fh, partial)) * CHUNK_SIZE, total)
+        for attempt in range(options.retries + 1):
+            try:
+                _attempt(source, partial, total, options, started, written, job, held)
+                _verify(partial, expected, job)
+                break
+            except VerificationException as e:
+                print(f"{e}. Copying it again from the start.")
+                _remove_journal(partial)
+                if attempt == options.retries:
+                    raise
+            except OSError as e:
+                if e.errno in _PERMANENT_ERRNOS or attempt == options.retries:
+                    raise
+                delay = RETRY_DELAY * 2 ** attempt
+                print(f"Copying {source} to {partial} failed ({e}). Resuming in {delay:.0f}s.")
+                if job:
+                    # Wakes up (and stops) straight away if the publish is cancelled
+                    job.sleep(delay)
+                else:
+                    time.sleep(delay)
+        _remove_journal(partial)
+
+    stats = transfer.CopyStats(METHOD_RESUMABLE, written[0], time.perf_counter() - started)
+    print(f"Copied {source} to {partial}: {stats}" +
+          (f", resumed after {resumed_from / (1024 * 1024):.1f} MB" if resumed_from else ""))
+    return stats
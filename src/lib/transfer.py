@@ -0,0 +1,229 @@
+import errno
+import os
+import shutil
+import sys
+import threading
+import time
+from typing import Callable, NamedTuple
+from . import jobs
+
+if "_LOADED" in locals():
+    import importlib
+
+    for mod in (jobs,):  # list all imports here
+        importlib.reload(mod)
+_LOADED = True
+
+"""
+Copy engine for moving published files around. On Linux, it tries the cheapest kernel-side method first (a reflink
+clone, then copy_file_range, then sendfile) and falls back to a chunked userspace copy.
+"""
+
+COPY_CHUNK_SIZE = 8 * 1024 * 1024
+# Kernel-side copies don't pass through Python, so they can go in bigger bites between progress/cancel checks
+KERNEL_CHUNK_SIZE = 64 * 1024 * 1024
+
+# From linux/fs.h: _IOW(0x94, 9, int)
+FICLONE = 0x40049409
+
+METHOD_REFLINK = "reflink"
+METHOD_COPY_FILE_RANGE = "copy_file_range"
+METHOD_SENDFILE = "sendfile"
+METHOD_USERSPACE = "userspace"
+METHOD_HARDLINK = "hardlink"
+METHOD_RENAME = "rename"
+
+# Errors that mean "this method isn't available here", as opposed to an actual I/O failure
+_UNSUPPORTED_ERRNOS = {errno.EXDEV, errno.ENOSYS, errno.EOPNOTSUPP, errno.ENOTTY, errno.EINVAL, errno.EBADF,
+                       errno.EPERM}
+
+
+class CopyStats(NamedTuple):
+    method: str
+    bytes: int
+    seconds: float
+
+    @property
+    def throughput(self) -> float:
+        """Bytes per second"""
+        return self.bytes / self.seconds if self.seconds > 0 else float("inf")
+
+    def __str__(self) -> str:
+        mb = self.bytes / (1024 * 1024)
+        if self.seconds <= 0:
+            return f"{mb:.1f} MB via {self.method}"
+        return f"{mb:.1f} MB via {self.method} in {self.seconds:.2f}s ({mb / self.seconds:.1f} MB/s)"
+
+
+class _Unsupported(Exception):
+    pass
+
+
+def _unsupported_or_raise(e: OSError, copied: int) -> None:
+    # Only fall back to the next method if this one failed before writing anything
+    if copied == 0 and e.errno in _UNSUPPORTED_ERRNOS:
+        raise _Unsupported() from e
+    raise e
+
+
+def _reflink(src_fd: int, dest_fd: int, total: int, job: jobs.BackgroundJob | None) -> int:
+    import fcntl
+    try:
+        fcntl.ioctl(dest_fd, FICLONE, src_fd)
+    except OSError as e:
+        _unsupported_or_raise(e, 0)
+    return total
+
+
+def _copy_file_range(src_fd: int, dest_fd: int, total: int, job: jobs.BackgroundJob | None) -> int:
+    copied = 0
+    while copied < total:
+        if job:
+            job.check_cancelled()
+        try:
+            sent = os.copy_file_range(src_fd, dest_fd, min(KERNEL_CHUNK_SIZE, total - copied), copied, copied)
+        except OSError as e:
+            _unsupported_or_raise(e, copied)
+        if sent == 0:
+            break
+        copied += sent
+        if job:
+            job.progress = copied / total
+    return copied
+
+
+def _sendfile(src_fd: int, dest_fd: int, total: int, job: jobs.BackgroundJob | None) -> int:
+    copied = 0
+    while copied < total:
+        if job:
+            job.check_cancelled()
+        try:
+            sent = os.sendfile(dest_fd, src_fd, copied, min(KERNEL_CHUNK_SIZE, total - copied))
+        except OSError as e:
+            _unsupported_or_raise(e, copied)
+        if sent == 0:
+            break
+        copied += sent
+        if job:
+            job.progress = copied / total
+    return copied
+
+
+def _userspace(src_fd: int, dest_fd: int, total: int, job: jobs.BackgroundJob | None) -> int:
+    copied = 0
+    os.lseek(src_fd, 0, os.SEEK_SET)
+    os.lseek(dest_fd, 0, os.SEEK_SET)
+    while chunk := os.read(src_fd, COPY_CHUNK_SIZE):
+        if job:
+            job.check_cancelled()
+        view = memoryview(chunk)
+        while view:
+            written = os.write(dest_fd, view)
+            view = view[written:]
+        copied += len(chunk)
+        if job and total:
+            job.progress = copied / total
+    return copied
+
+
+def _methods() -> list[tuple[str, Callable]]:
+    methods = []
+    if sys.platform.startswith("linux"):
+        methods.append((METHOD_REFLINK, _reflink))
+        if hasattr(os, "copy_file_range"):
+            methods.append((METHOD_COPY_FILE_RANGE, _copy_file_range))
+        if hasattr(os, "sendfile"):
+            methods.append((METHOD_SENDFILE, _sendfile))
+    methods.append((METHOD_USERSPACE, _userspace))
+    return methods
+
+
+def copy_file(source: str, destination: str, job: jobs.BackgroundJob | None = None) -> CopyStats:
+    """Copy source to destination using the fastest method available, reporting progress to the job (if given) and
+    stopping if the job is cancelled. A cancelled or failed copy removes the partial destination file."""
+    total = os.path.getsize(source)
+    start = time.perf_counter()
+    try:
+        with open(source, "rb") as src_fh, open(destination, "wb") as dest_fh:
+            src_fd, dest_fd = src_fh.fileno(), dest_fh.fileno()
+            for method, copy_fn in _methods():
+                try:
+                    copied = copy_fn(src_fd, dest_fd, total, job)
+                    break
+                except _Unsupported:
+                    print(f"Copy method {method} is not available from {source} to {destination}")
+                    os.ftruncate(dest_fd, 0)
+        shutil.copystat(source, destination)
+    except (OSError, jobs.JobCancelled):
+        if os.path.isfile(destination):
+            os.remove(destination)
+        raise
+    if job:
+        job.progress = 1.0
+    stats = CopyStats(method, copied, time.perf_counter() - start)
+    print(f"Copied {source} to {destination}: {stats}")
+    return stats
+
+
+def clone_file(source: str, destination: str) -> CopyStats:
+    """Make destination a reflink (copy-on-write clone) of source. Raises OSError if the filesystem can't do it."""
+    if not sys.platform.startswith("linux"):
+        raise OSError(errno.EOPNOTSUPP, "Reflinks are only supported on Linux", destination)
+    import fcntl
+    start = time.perf_counter()
+    try:
+        with open(source, "rb") as src_fh, open(destination, "wb") as dest_fh:
+            fcntl.ioctl(dest_fh.fileno(), FICLONE, src_fh.fileno())
+        shutil.copystat(source, destination)
+    except OSError:
+        if os.path.isfile(destination):
+            os.remove(destination)
+        raise
+    return CopyStats(METHOD_REFLINK, os.path.getsize(destination), time.perf_counter() - start)
+
+
+def link_file(source: str, destination: str) -> CopyStats:
+    """Make destination a hard link to source. No data is copied."""
+    start = time.perf_counter()
+    os.link(source, destination)
+    return CopyStats(METHOD_HARDLINK, os.path.getsize(destination), time.perf_counter() - start)
+
+
+def links_unsupported(e: OSError) -> bool:
+    """Whether a failed link_file() means the filesystem can't hard link that file (as opposed to, e.g., a missing
+    file)"""
+    return e.errno in _UNSUPPORTED_ERRNOS | {errno.EMLINK}
+
+
+def temp_path(destination: str, suffix: str = ".tmp") -> str:
+    """A hidden name beside the destination to build a new file under, so the existing one is only ever replaced
+    whole. By default it has no .blend extension, so Blender won't index it if it's left behind."""
+    return os.path.join(os.path.dirname(destination),
+                        f".{os.path.basename(destination)}.{os.getpid()}.{threading.get_ident()}{suffix}")
+
+
+def _fsync(path: str, flags: int) -> None:
+    fd = os.open(path, flags)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def sync_file(path: str) -> None:
+    """Make sure a file's data is on disk"""
+    if not os.path.islink(path):
+        # Windows only allows fsync on handles open for writing
+        _fsync(path, os.O_RDWR | getattr(os, "O_BINARY", 0))
+
+
+def replace(source: str, destination: str, synced: bool = False) -> None:
+    """Atomically replace destination with source (on the same filesystem), making sure the new file's data is on
+    disk before it takes the destination's place (unless the caller already did, with sync_file()), and that the
+    rename itself is on disk afterwards"""
+    if not synced:
+        sync_file(source)
+    os.replace(source, destination)
+    if os.name == "posix":
+        # Make the rename itself durable. Windows can't open directories for fsync.
+        _fsync(os.path.dirname(destination) or ".", os.O_RDONLY)
@@ -1,17 +1,117 @@
 import bpy
+import time
 from bpy.types import Menu
 from ..operator import copy as copy_to_asset_library
+from ..operator import copy_multi as copy_to_asset_libraries
+from ..operator import batch as batch_copy
+from ..operator import restore as restore_previous
+from ..operator import stale as stale_files
+from ..operator import autopublish as auto_publish
+from ..lib import autopublish
+from ..lib import libstatus
+from ..lib import linkstrategy
 from ..lib import pkginfo
 
 if "_LOADED" in locals():
     import importlib
 
-    for mod in (copy_to_asset_library, pkginfo,):  # list all imports here
+    for mod in (copy_to_asset_library, copy_to_asset_libraries, batch_copy, restore_previous, stale_files,
+                auto_publish, autopublish, libstatus, linkstrategy, pkginfo,):  # list all imports here
         importlib.reload(mod)
 _LOADED = True
 
 package_name = pkginfo.package_name()
 
+
+def _ago(timestamp: float) -> str:
+    seconds = max(0, time.time() - timestamp)
+    for unit, size in (("day", 86400), ("hour", 3600), ("min", 60)):
+        if seconds >= size:
+            return f"{int(seconds // size)} {unit}{'s' if unit != 'min' and seconds >= 2 * size else ''} ago"
+    return "just now"
+
+
+def _status_text(status: libstatus.LibraryStatus | None) -> tuple[str, str]:
+    """(description, icon) for a library's status in the menu"""
+    if status is None:
+        return "checking...", 'TIME'
+    if not status.reachable:
+        return "offline", 'ERROR'
+    parts = []
+    if status.published_mtime is not None:
+        parts.append(f"published {_ago(status.published_mtime)}")
+    if not status.writable:
+        parts.append("read-only")
+    if status.free_bytes is not None:
+        parts.append(f"{status.free_bytes / 1024 ** 3:.0f} GB free")
+    if not status.writable:
+        icon = 'LOCKED'
+    elif status.published_mtime is not None:
+        icon = 'CHECKMARK'
+    else:
+        icon = 'DISK_DRIVE'
+    return ", ".join(parts), icon
+
+
+class COPYTOASSETLIBRARY_MT_batch_destinations(Menu):
+    bl_idname = 'COPYTOASSETLIBRARY_MT_batch_destinations'
+    bl_label = 'Batch Copy Files to Asset Library...'
+
+    def draw(self, context):
+        layout = self.layout
+        layout.operator_context = 'INVOKE_DEFAULT'
+        for lib in context.preferences.filepaths.asset_libraries:
+            oper = layout.operator(batch_copy.COPYTOASSETLIBRARY_OT_batch.bl_idname, text=lib.name)
+            oper.path = lib.path
+
+
+class COPYTOASSETLIBRARY_MT_restore_destinations(Menu):
+    bl_idname = 'COPYTOASSETLIBRARY_MT_restore_destinations'
+    bl_label = 'Restore Previous Version'
+
+    def draw(self, context):
+        layout = self.layout
+        for lib in context.preferences.filepaths.asset_libraries:
+            oper = layout.operator(restore_previous.COPYTOASSETLIBRARY_OT_restore_previous.bl_idname, text=lib.name)
+            oper.path = lib.path
+
+
+class COPYTOASSETLIBRARY_MT_preview_destinations(Menu):
+    bl_idname = 'COPYTOASSETLIBRARY_MT_preview_destinations'
+    bl_label = 'Preview Publish'
+
+    def draw(self, context):
+        layout = self.layout
+        for lib in context.preferences.filepaths.asset_libraries:
+            oper = layout.operator(copy_to_asset_library.COPYTOASSETLIBRARY_OT_copy.bl_idname, text=lib.name)
+            oper.path = lib.path
+            oper.preview = True
+
+
+class COPYTOASSETLIBRARY_MT_stale_destinations(Menu):
+    bl_idname = 'COPYTOASSETLIBRARY_MT_stale_destinations'
+    bl_label = 'Stale Files Report'
+
+    def draw(self, context):
+        layout = self.layout
+        for lib in context.preferences.filepaths.asset_libraries:
+            oper = layout.operator(stale_files.COPYTOASSETLIBRARY_OT_stale_report.bl_idname, text=lib.name)
+            oper.path = lib.path
+
+
+class COPYTOASSETLIBRARY_MT_auto_publish_destinations(Menu):
+    bl_idname = 'COPYTOASSETLIBRARY_MT_auto_publish_destinations'
+    bl_label = 'Auto-publish on Save'
+
+    def draw(self, context):
+        layout = self.layout
+        enabled = autopublish.libraries()
+        for lib in context.preferences.filepaths.asset_libraries:
+            oper = layout.operator(auto_publish.COPYTOASSETLIBRARY_OT_toggle_auto_publish.bl_idname, text=lib.name,
+                                   icon='CHECKBOX_HLT' if lib.path in enabled else 'CHECKBOX_DEHLT')
+            oper.path = lib.path
+
+
 class COPYTOASSETLIBRARY_MT_destinations(Menu):
     bl_idname = 'COPYTOASSETLIBRARY_MT_destinations'
     bl_label = 'Copy to Asset Library...'
@@ -26,8 +126,37 @@ class COPYTOASSETLIBRARY_MT_destinations(Menu):
             layout.alert = True
             layout.label(text="File must be saved", icon='ERROR')
 
+        # Only show strategies that have already been probed. Probing touches the filesystem, which draw() mustn't.
+        show_strategy = prefs.link_strategy == 'AUTO' and not prefs.create_symlinks and not unsaved
+        published_name = libstatus.published_name_for_open_file()
         for lib in libraries:
-            oper = layout.operator(copy_to_asset_library.COPYTOASSETLIBRARY_OT_copy.bl_idname, text=lib.name)
+            strategy = linkstrategy.cached_strategy(lib.path, bpy.data.filepath) if show_strategy else None
+            text = f"{lib.name} ({strategy})" if strategy else lib.name
+            icon = 'NONE'
+            if published_name:
+                # Cached only. Statuses are refreshed in the background (see lib/libstatus.py).
+                status_text, icon = _status_text(libstatus.get(lib.path, published_name))
+                text = f"{text} \u2014 {status_text}" if status_text else text
+            oper = layout.operator(copy_to_asset_library.COPYTOASSETLIBRARY_OT_copy.bl_idname, text=text, icon=icon)
             oper.path = lib.path
 
-REGISTER_CLASSES = [COPYTOASSETLIBRARY_MT_destinations]
+        layout.separator()
+        if len(libraries) > 1:
+            multi_layout = layout.column()
+            multi_layout.operator_context = 'INVOKE_DEFAULT'
+            multi_layout.operator(copy_to_asset_libraries.COPYTOASSETLIBRARY_OT_copy_multi.bl_idname,
+                                  text="Copy to Several Asset Libraries...")
+        if not prefs.create_symlinks:
+            layout.menu(COPYTOASSETLIBRARY_MT_preview_destinations.bl_idname)
+        layout.menu(COPYTOASSETLIBRARY_MT_batch_destinations.bl_idname)
+        if not prefs.create_symlinks:
+            layout.menu(COPYTOASSETLIBRARY_MT_auto_publish_destinations.bl_idname)
+        if prefs.create_backup and prefs.backup_style == 'STORE' and published_name:
+            layout.menu(COPYTOASSETLIBRARY_MT_restore_destinations.bl_idname)
+        if prefs.publish_index:
+            layout.menu(COPYTOASSETLIBRARY_MT_stale_destinations.bl_idname)
+
+
+REGISTER_CLASSES = [COPYTOASSETLIBRARY_MT_batch_destinations, COPYTOASSETLIBRARY_MT_restore_destinations,
+                    COPYTOASSETLIBRARY_MT_preview_destinations, COPYTOASSETLIBRARY_MT_stale_destinations,
+                    COPYTOASSETLIBRARY_MT_auto_publish_destinations, COPYTOASSETLIBRARY_MT_destinations]
@@ -0,0 +1,46 @@
+import bpy
+from typing import Set
+from bpy.types import Operator
+from bpy.props import StringProperty
+from ..lib import autopublish
+
+if "_LOADED" in locals():
+    import importlib
+
+    for mod in (autopublish,):  # list all imports here
+        importlib.reload(mod)
+_LOADED = True
+
+
+class COPYTOASSETLIBRARY_OT_toggle_auto_publish(Operator):
+    """Turn publishing this file to an Asset Library after every save on or off"""
+    bl_idname = "copy_to_asset_library.toggle_auto_publish"
+    bl_label = "Auto-publish on Save"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    path: StringProperty(name="path", description="Asset Library path")
+
+    @classmethod
+    def post_register(cls) -> None:
+        setattr(bpy.types.Scene, autopublish.SCENE_PROPERTY, StringProperty(
+            name="Auto-publish libraries",
+            description="Asset Library paths this file is published to after every save",
+            options={'HIDDEN'},
+        ))
+
+    @classmethod
+    def post_unregister(cls) -> None:
+        if hasattr(bpy.types.Scene, autopublish.SCENE_PROPERTY):
+            delattr(bpy.types.Scene, autopublish.SCENE_PROPERTY)
+
+    def execute(self, context) -> Set[str]:
+        if not self.path:
+            self.report({'ERROR'}, 'Internal error: Path not provided to operator')
+            return {'CANCELLED'}
+        enabled = self.path not in autopublish.libraries()
+        autopublish.set_enabled(self.path, enabled)
+        self.report({'INFO'}, f"Auto-publish {'on' if enabled else 'off'}. Save the file to keep this setting.")
+        return {'FINISHED'}
+
+
+REGISTER_CLASSES = [COPYTOASSETLIBRARY_OT_toggle_auto_publish]
@@ -0,0 +1,90 @@
+import bpy
+import os
+import time
+from typing import Set
+from bpy.types import Operator, OperatorFileListElement
+from bpy.props import StringProperty, BoolProperty, IntProperty, CollectionProperty
+from ..lib import pkginfo
+from ..lib import jobs
+from ..lib import lazy
+from ..lib import modal
+
+# Loaded when a batch is started (see lib/lazy.py)
+tempfile = lazy.lazy_import("tempfile")
+batch = lazy.lazy_import("..lib.batch", __package__)
+
+if "_LOADED" in locals():
+    import importlib
+
+    for mod in (pkginfo, jobs, lazy, modal, batch,):  # list all imports here
+        importlib.reload(mod)
+_LOADED = True
+
+package_name = pkginfo.package_name()
+
+
+class COPYTOASSETLIBRARY_OT_batch(modal.ModalJobMixin, Operator):
+    """Copy many .blend files into an Asset Library, each in its own background Blender process"""
+    bl_idname = "copy_to_asset_library.batch"
+    bl_label = "Batch Copy to Asset Library"
+    bl_options = {'REGISTER'}
+
+    path: StringProperty(name="path", description="Asset Library path")
+    directory: StringProperty(name="Directory", subtype='DIR_PATH')
+    files: CollectionProperty(type=OperatorFileListElement)
+    filter_glob: StringProperty(default="*.blend", options={'HIDDEN'})
+    recursive: BoolProperty(name="Include subdirectories",
+                            description="If no files are selected, publish .blend files in subdirectories too",
+                            default=False)
+    skip_without_assets: BoolProperty(name="Skip files without assets",
+                                      description="Don't publish files that have nothing marked as an asset",
+                                      default=True)
+    workers: IntProperty(name="Blender processes", description="How many files to publish at once (0 = CPU count)",
+                         default=0, min=0)
+
+    def invoke(self, context, event) -> Set[str]:
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
+
+    def _selected_files(self) -> list[str]:
+        selected = [os.path.join(self.directory, f.name) for f in self.files if f.name]
+        return batch.find_blend_files(selected or [self.directory], self.recursive)
+
+    def _job_finished(self, context) -> Set[str]:
+        if self._job.error:
+            self.report({'ERROR'}, f"Batch copy failed: {self._job.error}")
+            return {'CANCELLED'}
+
+        report = self._job.result
+        report_path = os.path.join(tempfile.gettempdir(),
+                                   f"copy_to_asset_library_batch_{time.strftime('%Y%m%d_%H%M%S')}.json")
+        batch.write_report(report, report_path)
+        print(f"Batch report written to {report_path}")
+
+        message = f"Copied {report['succeeded']} of {len(report['files'])} files in {report['seconds']:.0f}s. " \
+                  f"Report: {report_path}"
+        self.report({'WARNING'} if report['failed'] else {'INFO'}, message)
+        return {'FINISHED'}
+
+    def execute(self, context) -> Set[str]:
+        if not self.path:
+            self.report({'ERROR'}, 'Internal error: Path not provided to operator')
+            return {'CANCELLED'}
+
+        files = self._selected_files()
+        if not files:
+            self.report({'ERROR'}, 'No .blend files were selected')
+            return {'CANCELLED'}
+
+        prefs = context.preferences.addons[package_name].preferences
+        job = jobs.BackgroundJob(batch.publish_files, bpy.app.binary_path, files, self.path, self.workers or None,
+                                 package_name, normalize_numeric_suffix=prefs.normalize_numeric_suffix,
+                                 skip_without_assets=self.skip_without_assets)
+        if bpy.app.background:
+            self._job = job.start()
+            self._job.join()
+            return self._job_finished(context)
+        return self._start_job(context, job, f"Copying {len(files)} files to Asset Library...")
+
+
+REGISTER_CLASSES = [COPYTOASSETLIBRARY_OT_batch]
@@ -1,33 +1,77 @@
 import bpy
 import os
-import re
-import shutil
-import tempfile
+import time
+from contextlib import ExitStack
 from typing import Set
 from bpy.types import Operator
 from bpy.props import StringProperty, BoolProperty
 from ..lib import pkginfo
-from ..lib import cats
-from ..lib import blendfile
+from ..lib import autopublish
+from ..lib import jobs
+from ..lib import lazy
+from ..lib import libstatus
+from ..lib import linkstrategy
+from ..lib import metrics
+from ..lib import modal
+from ..lib import naming
+from ..lib import preflight
+from ..lib import transfer
+
+# Only needed once something is published, so they're loaded then instead of when Blender starts (see lib/lazy.py)
+shutil = lazy.lazy_import("shutil")
+tempfile = lazy.lazy_import("tempfile")
+assetexport = lazy.lazy_import("..lib.assetexport", __package__)
+backups = lazy.lazy_import("..lib.backups", __package__)
+cats = lazy.lazy_import("..lib.cats", __package__)
+blendfile = lazy.lazy_import("..lib.blendfile", __package__)
+codec = lazy.lazy_import("..lib.codec", __package__)
+dependencies = lazy.lazy_import("..lib.dependencies", __package__)
+lock = lazy.lazy_import("..lib.lock", __package__)
+manifest = lazy.lazy_import("..lib.manifest", __package__)
+packing = lazy.lazy_import("..lib.packing", __package__)
+publish = lazy.lazy_import("..lib.publish", __package__)
+pubdiff = lazy.lazy_import("..lib.pubdiff", __package__)
+pubindex = lazy.lazy_import("..lib.pubindex", __package__)
+resumable = lazy.lazy_import("..lib.resumable", __package__)
 
 if "_LOADED" in locals():
     import importlib
 
-    for mod in (pkginfo, cats,):  # list all imports here
+    for mod in (pkginfo, autopublish, jobs, lazy, libstatus, linkstrategy, metrics, modal, naming, preflight, transfer,
+                assetexport, backups, cats, blendfile, codec, dependencies, lock, manifest, packing, publish, pubdiff,
+                pubindex, resumable,):  # list all imports here
         importlib.reload(mod)
 _LOADED = True
 
 package_name = pkginfo.package_name()
 
 
-class COPYTOASSETLIBRARY_OT_copy(Operator):
+class COPYTOASSETLIBRARY_OT_copy(modal.ModalJobMixin, Operator):
     """Copy or symlink the open file into an Asset Library directory"""
     bl_idname = "copy_to_asset_library.copy"
     bl_label = "Copy to Asset Library"
     bl_options = {'REGISTER'}
 
     path: StringProperty(name="path", description="Path")
-    skip_preflight: BoolProperty(name="skip_preflight", description="Skip Preflight Checks (confirmed)")
+    skip_preflight: BoolProperty(name="skip_preflight", description="Skip Preflight Checks (confirmed)",
+                                 options={'SKIP_SAVE'})
+    preview: BoolProperty(name="preview", description="Show what publishing would change in the Asset Library, and "
+                                                      "ask before publishing", options={'SKIP_SAVE'})
+
+    _in_background = False
+    _temp_dir = None
+    _staged_path = None
+    # Image name -> data being read for packing into the copy (see lib/packing.py), or None if not packing
+    _pack_loads = None
+    # The assets to write on their own (see lib/assetexport.py), or None to save the whole file
+    _export_assets = None
+    _export_stats = None
+    # What to write to the asset manifests (see lib/manifest.py), or None to not write them
+    _manifest_entries = None
+    # The destination's lock, while a save in place is backing up and saving over it
+    _held_lock = None
+    # Called with the job's result instead of _finish(), to carry on after a job that was one step of the publish
+    _then = None
 
     @classmethod
     def _can_save(cls, prefs) -> bool:
@@ -42,39 +86,77 @@ class COPYTOASSETLIBRARY_OT_copy(Operator):
         cls.poll_message_set('File must be saved before copying')
         return False
 
-    @classmethod
-    def _has_assets(cls) -> bool:
-        for key in [d[0] for d in bpy.data.bl_rna.properties.items() if isinstance(d[1], bpy.types.CollectionProperty)]:
-            for item in getattr(bpy.data, key):
-                try:
-                    if item.asset_data is not None:
-                        return True
-                except:
-                    pass
-        return False
-
     def _preflight(self, _context) -> list[str]:
-        unpacks = [f"Image \"{img.name}\" is not packed" for img in bpy.data.images if
-                   img.packed_file is None and img.name != 'Render Result']
-        links = [f"{len(lib.users_id)} items are linked from library \"{lib.name}\"" for lib in bpy.data.libraries if
-                 len(lib.users_id) > 0]
+        scan = preflight.scan()
+        unsaved = packing.unsaved_images() if self._pack_loads is not None else []
+        # Images that will be packed into the copy are fine
+        unpacks = [f"Image \"{name}\" is not packed" for name in scan.unpacked_images
+                   if name not in (self._pack_loads or ()) and name not in unsaved]
+        links = [f"{count} items are linked from library \"{name}\"" for name, count in scan.linked_libraries]
         if len(unpacks) > 10:
             unpacks = [f"{len(unpacks)} images were not packed"]
         if len(links) > 10:
-            unpacks = [f"Linked items from {len(links)} linked libraries were found"]
-
-        no_assets = ["This file contains nothing marked as an Asset"] if not self._has_assets() else []
-
-        return no_assets + unpacks + links
-
-    def _preflight_fail(self, preflight_errors: list[str]):
+            links = [f"Linked items from {len(links)} linked libraries were found"]
+
+        unpacks += [f"Image \"{name}\" has unsaved changes, so it can't be packed into the copy" for name in unsaved]
+
+        no_assets = ["This file contains nothing marked as an Asset"] if not scan.has_assets else []
+
+        return no_assets + unpacks + links + self._audit_dependencies(bool(unpacks))
+
+    def _audit_dependencies(self, unpacked: bool) -> list[str]:
+        audit = dependencies.audit(self._libraries(), packing=self._pack_loads or ())
+        missing = [f"{f.kind} \"{f.name}\" is missing ({f.filepath})" for f in audit.missing]
+        outside = [f"{f.kind} \"{f.name}\" is outside the Asset Library, so it will only be found on this computer"
+                   for f in audit.unresolvable]
+        if len(missing) > 10:
+            missing = [f"{len(missing)} external files are missing"]
+        if len(outside) > 10:
+            outside = [f"{len(outside)} external files are outside the Asset Library, so they will only be found on "
+                       f"this computer"]
+        errors = missing + outside
+        if audit.large:
+            errors.append(f"{len(audit.large)} external files are over "
+                          f"{dependencies.LARGE_FILE_BYTES // (1024 * 1024)} MB")
+        if audit.timed_out:
+            errors.append(f"{len(audit.timed_out)} external files couldn't be checked in time. Is a drive slow or "
+                          f"offline?")
+        if audit.files and (errors or unpacked):
+            errors.append(f"External files add up to {audit.total_bytes / (1024 * 1024):.1f} MB")
+        return errors
+
+    def _library_name(self, path: str) -> str:
+        for lib in bpy.context.preferences.filepaths.asset_libraries:
+            if lib.path == path:
+                return lib.name
+        return path
+
+    def _preview(self, new_filename: str) -> list[str]:
+        """What publishing would change in each library, for the preflight popup"""
+        entries = manifest.collect()
+        source_bytes = os.path.getsize(bpy.data.filepath) if os.path.isfile(bpy.data.filepath) else 0
+        libraries = self._libraries()
+        lines = []
+        for path in libraries:
+            prefix = f"{self._library_name(path)}: " if len(libraries) > 1 else ""
+            try:
+                diff = pubdiff.compare(os.path.join(path, new_filename), entries, source_bytes)
+            except (OSError, blendfile.BlendFileException) as e:
+                print("Publish preview exception", e)
+                lines.append(f"{prefix}Could not read the published {new_filename}: {e}")
+                continue
+            print(f"Compared with {os.path.join(path, new_filename)} ({diff.source}) in {diff.seconds:.3f}s")
+            lines += [prefix + line for line in pubdiff.describe(diff)]
+        return lines
+
+    def _preflight_fail(self, preflight_errors: list[str], title: str = "There were some problems with this file:",
+                        icon: str = 'ERROR'):
         def confirm_menu(menu, _) -> None:
             layout = menu.layout.column()
 
             button_layout = layout.column()
             continue_oper = button_layout.operator(self.bl_idname, text=f"Copy to Asset Library anyway...")
-            continue_oper.path = self.path
-            continue_oper.skip_preflight = True
+            self._confirm_properties(continue_oper)
 
             layout.separator()
 
@@ -82,39 +164,286 @@ class COPYTOASSETLIBRARY_OT_copy(Operator):
             for err in preflight_errors:
                 err_layout.label(text=f" \u25BA {err}")
 
-        bpy.context.window_manager.popup_menu(confirm_menu, title="There were some problems with this file:",
-                                              icon="ERROR")
-
-    def _symlink(self, source, destination):
-        print(f"Creating symlink from {source} -> {destination}")
-        os.symlink(source, destination)
-
-    def _save_copy(self, destination, prefs):
-        compress = prefs.always_compress or blendfile.is_compressed()
+        bpy.context.window_manager.popup_menu(confirm_menu, title=title, icon=icon)
+
+    def _confirm_properties(self, oper) -> None:
+        """Set up the properties of the "anyway" button in the preflight popup to repeat this copy"""
+        oper.path = self.path
+        oper.skip_preflight = True
+
+    def _zstd_level(self, prefs) -> int | None:
+        """The Zstandard level to re-encode the saved copy with, or None to use Blender's own compression"""
+        if prefs.publish_codec != 'ZSTD':
+            return None
+        if not codec.available():
+            print("The zstandard module isn't available, so using Blender's compression instead")
+            self._warnings.append("Zstandard re-encoding isn't available in this Blender. Used Blender's compression.")
+            return None
+        return prefs.zstd_level
+
+    def _retention(self, prefs) -> "backups.Retention | None":
+        """The backup store's retention policy, or None for a single ".blend1" backup"""
+        if prefs.backup_style != 'STORE':
+            return None
+        return backups.Retention(prefs.backup_generations, prefs.backup_retention_days)
+
+    def _resumable(self, prefs) -> "resumable.Options | None":
+        """How to make copies into the library resumable, or None to copy them the fast way"""
+        if not prefs.resumable_transfer:
+            return None
+        return resumable.Options(bandwidth_limit=prefs.bandwidth_limit * 1024 * 1024)
+
+    def _origin(self, prefs, self_path: str) -> "pubindex.Origin | None":
+        """What to record in the library's publish index, or None to not record anything"""
+        if not prefs.publish_index:
+            return None
+        return pubindex.origin(self_path, bpy.app.version_string)
+
+    def _on_disk_compression_matches(self, prefs) -> bool:
+        on_disk = blendfile.detect_codec()
+        if prefs.publish_codec == 'NONE':
+            return on_disk is None
+        if prefs.publish_codec == 'ZSTD':
+            # The level the file on disk was compressed with can't be known, so always re-encode
+            return False
+        return bool(on_disk) or not prefs.always_compress
+
+    def _links_allowed(self, prefs) -> bool:
+        return prefs.link_strategy == 'AUTO'
+
+    def _raw_strategy(self, prefs, self_path: str, library_path: str) -> str | None:
+        """How to publish the file on disk as-is (see lib/linkstrategy.py), or None if it needs to be saved through
+        Blender"""
+        if not self._links_allowed(prefs) or not bpy.data.is_saved or bpy.data.is_dirty:
+            return None
+        if self._pack_loads:
+            print("Images need packing into the copy, so saving a copy")
+            return None
+        if self._export_assets:
+            print("Only the assets are published, so writing them out")
+            return None
+        if not self._on_disk_compression_matches(prefs):
+            print("The file on disk isn't compressed the way the copy should be, so saving a copy")
+            return None
+        if os.path.normpath(os.path.dirname(self_path)) != os.path.normpath(library_path) \
+                and preflight.scan().has_relative_paths:
+            print("The file has relative paths that need remapping, so saving a copy")
+            return None
+        return linkstrategy.probe(library_path, self_path).strategy
+
+    def _run_publish(self, context, publish_fn, *args, **kwargs) -> Set[str]:
+        """Run a lib/publish.py function in the background (when invoked from the UI) or right away (from scripts)"""
+        if self._in_background:
+            job = jobs.BackgroundJob(publish_fn, *args, **kwargs)
+            return self._start_job(context, job, f"Copying {self._new_filename} to Asset Library...")
+
+        try:
+            result = publish_fn(*args, **kwargs)
+        except (OSError, lock.LockTimeoutException, resumable.VerificationException) as e:
+            self._release_lock()
+            self._log_metrics(context, "FAILED")
+            self.report({'ERROR'}, f"Could not copy {self._new_filename}: {e}")
+            return {'CANCELLED'}
+        finally:
+            self._cleanup_temp()
+        return self._carry_on(context, result)
+
+    def _carry_on(self, context, result) -> Set[str]:
+        then, self._then = self._then, None
+        return then(context, result) if then else self._finish(context, result)
+
+    def _release_lock(self) -> None:
+        self._then = None
+        if self._held_lock:
+            self._held_lock.close()
+            self._held_lock = None
+
+    def _stages_to_temp(self, prefs) -> bool:
+        # Re-encoding works on a saved file, and resumable copies copy one, so they always need a temporary file
+        return prefs.save_copy_to_temp or prefs.resumable_transfer or self._reencode_level is not None
+
+    def _save_copy(self, destination, prefs) -> str | None:
+        """Save a copy of the current state to the destination. If saving to a temporary file first, the temporary
+        file is saved and its path returned, and it's up to the caller to move it to the destination. The temporary
+        file is hidden beside the destination, so it can be renamed into place, or in the system's temporary directory
+        if there's no single destination, the copy should be resumable (so Blender's save doesn't go over the
+        network) or Blender mustn't save into the library at all (see the stage_outside_library preference)."""
+        if prefs.publish_codec == 'NONE' or self._reencode_level is not None:
+            compress = False
+        else:
+            compress = bool(prefs.always_compress or blendfile.is_compressed())
         print("Using compression" if compress else "Not using compression")
-        if not prefs.save_copy_to_temp:
+        if not self._stages_to_temp(prefs):
             print(f"Saving {destination} from current state")
-            bpy.ops.wm.save_as_mainfile(filepath=destination, copy=True, compress=compress)
-            return
+            self._save(destination, compress)
+            return None
 
-        with tempfile.TemporaryDirectory() as td:
-            temp_path = os.path.join(td, 'asset_export_temp.blend')
-            print(f"Saving temporary file {temp_path} from current state")
-            bpy.ops.wm.save_as_mainfile(filepath=temp_path, copy=True, compress=compress)
-            print(f"Copying {temp_path} to {destination}")
-            shutil.copy2(temp_path, destination)
-
-    def execute(self, context) -> Set[str]:
+        if destination and not prefs.resumable_transfer and not prefs.stage_outside_library:
+            temp_path = self._staged_path = transfer.temp_path(destination, ".tmp.blend")
+        else:
+            self._temp_dir = tempfile.mkdtemp(prefix="copy_to_asset_library_")
+            temp_path = os.path.join(self._temp_dir, 'asset_export_temp.blend')
+        print(f"Saving temporary file {temp_path} from current state")
+        phase = self._save(temp_path, compress)
+        print(f"Saved {phase.bytes / (1024 * 1024):.1f} MB in {phase.seconds:.2f}s")
+        return temp_path
+
+    def _save(self, filepath: str, compress: bool) -> metrics.Phase:
+        with ExitStack() as stack:
+            if self._pack_loads:
+                start = time.perf_counter()
+                stats = stack.enter_context(packing.packed(self._pack_loads))
+                self._phases.append(metrics.Phase(metrics.PACK, time.perf_counter() - start, stats.bytes))
+                print(f"Publishing with images {stats}")
+            start = time.perf_counter()
+            if self._export_assets:
+                prefs = bpy.context.preferences.addons[package_name].preferences
+                self._export_stats = assetexport.write_assets(filepath, self._export_assets, compress,
+                                                              prefs.relative_remap)
+                print(self._export_stats)
+            else:
+                with autopublish.own_save():
+                    bpy.ops.wm.save_as_mainfile(filepath=filepath, copy=True, compress=compress)
+            phase = metrics.Phase(metrics.SAVE, time.perf_counter() - start, os.path.getsize(filepath))
+        self._phases.append(phase)
+        return phase
+
+    def _cleanup_temp(self) -> None:
+        # The staged file is normally renamed into place, but it's left behind if the publish stops short
+        if self._staged_path:
+            for path in (self._staged_path, f"{self._staged_path}.zst"):
+                if os.path.isfile(path):
+                    os.remove(path)
+            self._staged_path = None
+        if self._temp_dir:
+            shutil.rmtree(self._temp_dir, ignore_errors=True)
+            self._temp_dir = None
+
+    def _locked_out(self, context, error: "lock.LockTimeoutException") -> Set[str]:
+        print("Publish lock timeout", error)
+        self._log_metrics(context, "FAILED")
+        self.report({'ERROR'}, f"Could not copy {self._new_filename}: another publish of it is still running")
+        return {'CANCELLED'}
+
+    def _libraries(self) -> list[str]:
+        """The Asset Libraries this operator publishes to"""
+        return [self.path]
+
+    def _log_metrics(self, context, outcome: str, phases: tuple[metrics.Phase, ...] = (),
+                     library_path: str | None = None) -> None:
+        """Record how long each phase of this publish took, for one library or (by default) all of them"""
         prefs = context.preferences.addons[package_name].preferences
-        self_path = bpy.data.filepath
-        filename = bpy.path.basename(self_path)
-        new_filename = re.sub(r'[_ ]?\d+(\.[^\.]+)$', '_latest\\1',
-                              filename) if prefs.normalize_numeric_suffix else filename
+        log_path = bpy.path.abspath(prefs.metrics_log) if prefs.metrics_log else None
+        total = time.perf_counter() - self._started
+        for path in [library_path] if library_path else self._libraries():
+            metrics.record(log_path, path, self._new_filename, outcome, self._phases + list(phases), total)
+
+    def _job_finished(self, context) -> Set[str]:
+        self._cleanup_temp()
+
+        if isinstance(self._job.error, jobs.JobCancelled):
+            self._release_lock()
+            self._log_metrics(context, "CANCELLED")
+            self.report({'WARNING'}, f"Cancelled copying {self._new_filename}")
+            return {'CANCELLED'}
 
-        if not self.path:
-            self.report({'ERROR'}, 'Internal error: Path not provided to operator')
+        if self._job.error:
+            self._release_lock()
+            self._log_metrics(context, "FAILED")
+            self.report({'ERROR'}, f"Could not copy {self._new_filename}: {self._job.error}")
             return {'CANCELLED'}
 
+        return self._carry_on(context, self._job.result)
+
+    def _catalog_text(self, prefs) -> str | None:
+        """The catalogs to merge into the library, read now (on the main thread) so the merge itself can run in the
+        background, or None to not merge any"""
+        if not prefs.append_catalog:
+            return None
+        if not (cats_text := cats.get_catalog_text()):
+            print("No existing catalog data. Nothing to export.")
+        return cats_text
+
+    def _save_in_place(self, context, prefs, destination: str, origin: "pubindex.Origin | None",
+                       cats_text: str | None) -> Set[str]:
+        """Save straight over the destination. Blender can only save on the main thread, so in the UI the lock isn't
+        waited for (which would freeze Blender), and the backup runs as a background job before the save."""
+        held = ExitStack()
+        try:
+            held.enter_context(publish.locked(destination, 0 if self._in_background else publish.LOCK_TIMEOUT))
+        except lock.LockTimeoutException as e:
+            return self._locked_out(context, e)
+        self._held_lock = held
+
+        def save(context_, backup_phases: "tuple[metrics.Phase, ...]") -> Set[str]:
+            phases = list(backup_phases)
+            try:
+                with held, pubindex.publishing(destination, origin) as index:
+                    self._save_copy(destination, prefs)
+                    with pubindex.writing(index):
+                        if index:
+                            # Blender saved straight into the library, so there's no hash without reading the file back
+                            index.record(destination, None, pubindex.STRATEGY_SAVE)
+                    warning = publish.write_manifest(destination, self._manifest_entries, publish.COPIED, phases)
+            finally:
+                self._held_lock = None
+            result = publish.PublishResult(publish.COPIED, warning=warning, phases=tuple(phases))
+            if not cats_text:
+                return self._finish(context_, result)
+            # Merge the catalogs in the background, too
+            return self._run_publish(context_, publish.add_catalogs, result, self.path, cats_text)
+
+        if not prefs.create_backup:
+            return save(context, ())
+        self._then = save
+        return self._run_publish(context, publish.backup_phases, destination, self._retention(prefs))
+
+    def _report_export(self) -> None:
+        if self._export_stats:
+            self.report({'INFO'}, str(self._export_stats))
+
+    def _finish(self, context, result: "publish.PublishResult | None" = None) -> Set[str]:
+        prefs = context.preferences.addons[package_name].preferences
+        result = result or publish.PublishResult(publish.COPIED)
+        libstatus.invalidate(self.path)
+        warning = result.warning or (self._warnings[0] if self._warnings else None)
+        self._log_metrics(context, result.outcome, result.phases)
+        self._report_export()
+
+        if warning:
+            self.report({'WARNING'}, warning)
+        elif result.outcome == publish.UNCHANGED:
+            self.report({'INFO'}, f"{self._new_filename} is unchanged in the Asset Library")
+        elif result.encode_stats and result.copy_stats:
+            self.report({'INFO'}, f"Copied {self._new_filename} ({result.encode_stats}; {result.copy_stats})")
+        elif result.copy_stats:
+            self.report({'INFO'}, f"Copied {self._new_filename} ({result.copy_stats})")
+        else:
+            self.report({'INFO'}, f"{'Symlinked' if prefs.create_symlinks else 'Copied'} {self._new_filename}")
+        return {'FINISHED'}
+
+    def invoke(self, context, event) -> Set[str]:
+        # Interactive use copies in the background. Scripts calling execute() directly get a blocking copy.
+        self._in_background = not bpy.app.background
+        return self.execute(context)
+
+    def _assets_to_export(self, prefs) -> set | None:
+        if not prefs.assets_only or prefs.create_symlinks:
+            return None
+        if not (assets := assetexport.asset_ids()):
+            # Writing nothing would publish an empty file
+            print("Nothing is marked as an asset, so publishing the whole file")
+            return None
+        return assets
+
+    def _prepare(self, context, prefs) -> Set[str] | None:
+        """Check the file can be copied and run preflight, setting up for the copy. Returns the operator's result if it
+        should stop here, or None to carry on."""
+        # Publishing uses threads, which mustn't be the first to use a deferred module
+        lazy.load_all()
+        filename = bpy.path.basename(bpy.data.filepath)
+        new_filename = naming.published_filename(filename, prefs.normalize_numeric_suffix)
+
         if not (filename and new_filename):
             self.report({'ERROR'}, 'Internal error: File name could not be determined')
             return {'CANCELLED'}
@@ -122,39 +451,70 @@ class COPYTOASSETLIBRARY_OT_copy(Operator):
         if not self._can_save(prefs):
             self.report({'ERROR'}, 'File must be saved first')
 
-        if not self.skip_preflight and not prefs.skip_preflight and (preflight_errors := self._preflight(context)):
+        self._phases = []
+        self._started = time.perf_counter()
+        # Start reading the images to pack right away, so it overlaps with preflight
+        self._pack_loads = packing.prefetch() if prefs.pack_on_publish and not prefs.create_symlinks else None
+        self._export_assets = self._assets_to_export(prefs)
+        self._export_stats = None
+        self._manifest_entries = manifest.collect() if prefs.write_manifest else None
+        preflight_errors = None
+        if not self.skip_preflight and not prefs.skip_preflight:
+            with metrics.measure(self._phases, metrics.PREFLIGHT):
+                preflight_errors = self._preflight(context)
+        if self.preview:
+            print("Previewing the publish, so showing a dialog to confirm the copy")
+            self._preflight_fail((preflight_errors or []) + self._preview(new_filename),
+                                 title=f"Publishing {new_filename} would change:",
+                                 icon='ERROR' if preflight_errors else 'INFO')
+            return {'CANCELLED'}
+        if preflight_errors:
             print("Preflight failed, so showing a dialog to confirm the copy")
             self._preflight_fail(preflight_errors)
             return {'CANCELLED'}
 
-        destination = os.path.join(self.path, new_filename)
-        backup_file = f"{destination}1"
+        self._new_filename = new_filename
+        self._warnings = []
+        self._reencode_level = self._zstd_level(prefs)
+        return None
 
-        if prefs.create_backup and os.path.isfile(destination):
-            if os.path.isfile(backup_file):
-                print(f"Removing backup file {backup_file} to make room for the new one")
-                os.remove(backup_file)
-            print(f"Moving existing {destination} to {backup_file}")
-            os.rename(destination, backup_file)
+    def execute(self, context) -> Set[str]:
+        prefs = context.preferences.addons[package_name].preferences
+        self_path = bpy.data.filepath
 
-        if prefs.create_symlinks:
-            self._symlink(self_path, destination)
-        else:
-            self._save_copy(destination, prefs)
+        if not self.path:
+            self.report({'ERROR'}, 'Internal error: Path not provided to operator')
+            return {'CANCELLED'}
 
-        warning = None
-        if prefs.append_catalog:
-            try:
-                cats.append_catalogs_from_current_file(self.path)
-            except cats.CatalogVersionException as e:
-                print("Catalog version exception", e)
-                warning = "Catalog version was invalid or too new. Copied asset but did not update the catalog file."
+        if (stop := self._prepare(context, prefs)) is not None:
+            return stop
 
-        if warning:
-            self.report({'WARNING'}, warning)
-        else:
-            self.report({'INFO'}, f"{'Symlinked' if prefs.create_symlinks else 'Copied'} {new_filename}")
-        return {'FINISHED'}
+        destination = os.path.join(self.path, self._new_filename)
+
+        origin = self._origin(prefs, self_path)
+        cats_text = self._catalog_text(prefs)
+
+        if prefs.create_symlinks:
+            return self._run_publish(context, publish.publish_symlink, self_path, destination, prefs.create_backup,
+                                     self._retention(prefs), origin, self._manifest_entries, cats_text)
+
+        if strategy := self._raw_strategy(prefs, self_path, self.path):
+            print(f"Publishing {self_path} to {destination} as-is, by {strategy}")
+            return self._run_publish(context, publish.publish_existing_file, self_path, destination, strategy,
+                                     prefs.create_backup, prefs.skip_unchanged, retention=self._retention(prefs),
+                                     origin=origin, resumable_options=self._resumable(prefs),
+                                     manifest_entries=self._manifest_entries, cats_text=cats_text)
+
+        if not self._stages_to_temp(prefs):
+            return self._save_in_place(context, prefs, destination, origin, cats_text)
+
+        temp_path = self._save_copy(destination, prefs)
+        print(f"Publishing {temp_path} to {destination}")
+        return self._run_publish(context, publish.publish_staged_file, temp_path, destination, prefs.create_backup,
+                                 prefs.skip_unchanged, self._reencode_level, prefs.zstd_threads,
+                                 retention=self._retention(prefs), origin=origin,
+                                 resumable_options=self._resumable(prefs), manifest_entries=self._manifest_entries,
+                                 cats_text=cats_text)
 
 
 REGISTER_CLASSES = [COPYTOASSETLIBRARY_OT_copy]
@@ -0,0 +1,160 @@
+import bpy
+import os
+from typing import Set
+from bpy.types import PropertyGroup
+from bpy.props import StringProperty, BoolProperty, CollectionProperty
+from ..lib import pkginfo
+from ..lib import autopublish
+from ..lib import lazy
+from ..lib import libstatus
+from ..lib import linkstrategy
+from ..lib import metrics
+from . import copy as copy_to_asset_library
+
+# Loaded when something is published (see lib/lazy.py)
+publish = lazy.lazy_import("..lib.publish", __package__)
+
+if "_LOADED" in locals():
+    import importlib
+
+    for mod in (pkginfo, autopublish, lazy, libstatus, linkstrategy, metrics, copy_to_asset_library,
+                publish,):  # list all imports here
+        importlib.reload(mod)
+_LOADED = True
+
+package_name = pkginfo.package_name()
+
+
+class COPYTOASSETLIBRARY_PG_library_choice(PropertyGroup):
+    name: StringProperty(name="Name")
+    path: StringProperty(name="Path")
+    selected: BoolProperty(name="Selected", default=False)
+
+
+class COPYTOASSETLIBRARY_OT_copy_multi(copy_to_asset_library.COPYTOASSETLIBRARY_OT_copy):
+    """Save the open file once and copy it into several Asset Libraries at the same time"""
+    bl_idname = "copy_to_asset_library.copy_multi"
+    bl_label = "Copy to Several Asset Libraries"
+    bl_options = {'REGISTER'}
+
+    choices: CollectionProperty(type=COPYTOASSETLIBRARY_PG_library_choice)
+    # Newline-separated library paths. Set when re-running after the preflight popup, so the dialog isn't shown again.
+    libraries: StringProperty(name="libraries", description="Library paths", options={'HIDDEN', 'SKIP_SAVE'})
+    auto_publish: BoolProperty(name="auto_publish", description="Started by an auto-publish after saving",
+                               options={'HIDDEN', 'SKIP_SAVE'})
+
+    def _library_paths(self) -> list[str]:
+        if self.libraries:
+            return [p for p in self.libraries.split("\n") if p]
+        return [c.path for c in self.choices if c.selected]
+
+    def _confirm_properties(self, oper) -> None:
+        oper.libraries = "\n".join(self._library_paths())
+        oper.skip_preflight = True
+
+    def _links_allowed(self, prefs) -> bool:
+        # Auto-publishing happens on every save, so always take the cheapest way when the file allows it
+        return self.auto_publish or super()._links_allowed(prefs)
+
+    def _run_publish(self, context, publish_fn, *args, **kwargs) -> Set[str]:
+        result = super()._run_publish(context, publish_fn, *args, **kwargs)
+        if self.auto_publish and self._job:
+            autopublish.track(self._job)
+        return result
+
+    def _libraries(self) -> list[str]:
+        return self._library_list
+
+    def _stages_to_temp(self, prefs) -> bool:
+        # One save is shared by every destination, so it always goes to a temporary file
+        return True
+
+    def draw(self, context):
+        layout = self.layout
+        for choice in self.choices:
+            layout.prop(choice, "selected", text=choice.name)
+
+    def invoke(self, context, event) -> Set[str]:
+        self._in_background = not bpy.app.background
+        if self.libraries:
+            return self.execute(context)
+        self.choices.clear()
+        for lib in context.preferences.filepaths.asset_libraries:
+            choice = self.choices.add()
+            choice.name = lib.name
+            choice.path = lib.path
+        return context.window_manager.invoke_props_dialog(self)
+
+    def execute(self, context) -> Set[str]:
+        prefs = context.preferences.addons[package_name].preferences
+        self_path = bpy.data.filepath
+
+        self._library_list = self._library_paths()
+        if not self._library_list:
+            self.report({'ERROR'}, 'No Asset Libraries were selected')
+            return {'CANCELLED'}
+
+        if (stop := self._prepare(context, prefs)) is not None:
+            return stop
+
+        destinations = {path: os.path.join(path, self._new_filename) for path in self._library_list}
+
+        origin = self._origin(prefs, self_path)
+        cats_text = self._catalog_text(prefs)
+
+        if prefs.create_symlinks:
+            return self._run_publish(context, publish.symlink_to_many, self_path, list(destinations.values()),
+                                     prefs.create_backup, cats_text, retention=self._retention(prefs), origin=origin,
+                                     manifest_entries=self._manifest_entries)
+
+        strategies = {path: self._raw_strategy(prefs, self_path, path) for path in self._library_list}
+        if all(strategies.values()):
+            print(f"Publishing {self_path} as-is to {len(destinations)} libraries")
+            targets = [(destinations[path], strategies[path]) for path in self._library_list]
+            return self._run_publish(context, publish.publish_to_many, self_path, targets, prefs.create_backup,
+                                     prefs.skip_unchanged, None, 0, cats_text, retention=self._retention(prefs),
+                                     origin=origin, resumable_options=self._resumable(prefs),
+                                     manifest_entries=self._manifest_entries)
+
+        # At least one library needs a saved copy, so save once and copy that everywhere
+        temp_path = self._save_copy(None, prefs)
+        targets = [(destinations[path], linkstrategy.STRATEGY_COPY) for path in self._library_list]
+        print(f"Publishing {temp_path} to {len(destinations)} libraries")
+        return self._run_publish(context, publish.publish_to_many, temp_path, targets, prefs.create_backup,
+                                 prefs.skip_unchanged, self._reencode_level, prefs.zstd_threads, cats_text,
+                                 retention=self._retention(prefs), origin=origin,
+                                 resumable_options=self._resumable(prefs), manifest_entries=self._manifest_entries)
+
+    def _finish(self, context, results: "dict[str, publish.PublishResult | BaseException]") -> Set[str]:
+        prefs = context.preferences.addons[package_name].preferences
+        failed = 0
+        for path in self._library_list:
+            libstatus.invalidate(path)
+            name = self._library_name(path)
+            result = results.get(os.path.join(path, self._new_filename))
+            if isinstance(result, BaseException):
+                failed += 1
+                self._log_metrics(context, "FAILED", library_path=path)
+                self.report({'ERROR'}, f"{name}: could not copy {self._new_filename}: {result}")
+                continue
+            if result is None:
+                continue
+
+            self._log_metrics(context, result.outcome, result.phases, path)
+            if warning := result.warning:
+                self.report({'WARNING'}, f"{name}: copied {self._new_filename}, but: {warning}")
+            elif result.outcome == publish.UNCHANGED:
+                self.report({'INFO'}, f"{name}: {self._new_filename} is unchanged")
+            elif result.copy_stats:
+                self.report({'INFO'}, f"{name}: copied {self._new_filename} ({result.copy_stats})")
+            else:
+                self.report({'INFO'}, f"{name}: {'symlinked' if prefs.create_symlinks else 'copied'} "
+                                      f"{self._new_filename}")
+
+        self._report_export()
+        for warning in self._warnings:
+            self.report({'WARNING'}, warning)
+        return {'CANCELLED'} if failed == len(self._library_list) else {'FINISHED'}
+
+
+REGISTER_CLASSES = [COPYTOASSETLIBRARY_PG_library_choice, COPYTOASSETLIBRARY_OT_copy_multi]
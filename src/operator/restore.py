@@ -0,0 +1,90 @@
+import bpy
+import time
+from typing import Set
+from bpy.types import Operator
+from bpy.props import StringProperty
+from ..lib import jobs
+from ..lib import lazy
+from ..lib import libstatus
+from ..lib import modal
+
+# Loaded when a version is restored (see lib/lazy.py)
+backups = lazy.lazy_import("..lib.backups", __package__)
+lock = lazy.lazy_import("..lib.lock", __package__)
+
+if "_LOADED" in locals():
+    import importlib
+
+    for mod in (jobs, lazy, libstatus, modal, backups, lock,):  # list all imports here
+        importlib.reload(mod)
+_LOADED = True
+
+
+class COPYTOASSETLIBRARY_OT_restore_previous(modal.ModalJobMixin, Operator):
+    """Put back the previous version of the open file's copy in an Asset Library, from the library's backup store"""
+    bl_idname = "copy_to_asset_library.restore_previous"
+    bl_label = "Restore Previous Version"
+    bl_options = {'REGISTER'}
+
+    path: StringProperty(name="path", description="Asset Library path")
+
+    _in_background = False
+    _published_name = None
+
+    @classmethod
+    def poll(cls, context) -> bool:
+        if libstatus.published_name_for_open_file():
+            return True
+        cls.poll_message_set('File must be saved first')
+        return False
+
+    def invoke(self, context, event) -> Set[str]:
+        # Interactive use restores in the background. Scripts calling execute() directly get a blocking restore.
+        self._in_background = not bpy.app.background
+        return self.execute(context)
+
+    def _report_error(self, error: BaseException) -> Set[str]:
+        if isinstance(error, jobs.JobCancelled):
+            self.report({'WARNING'}, f"Cancelled restoring {self._published_name}")
+        elif isinstance(error, lock.LockTimeoutException):
+            print("Restore lock timeout", error)
+            self.report({'ERROR'}, f"Could not restore {self._published_name}: it's being published or restored "
+                                   f"by another Blender. Try again once that's finished.")
+        else:
+            self.report({'ERROR'}, f"Could not restore {self._published_name}: {error}")
+        return {'CANCELLED'}
+
+    def _job_finished(self, context) -> Set[str]:
+        libstatus.invalidate(self.path)
+        if self._job.error:
+            return self._report_error(self._job.error)
+        return self._finish(self._job.result)
+
+    def _finish(self, generation: "backups.Generation | None") -> Set[str]:
+        if generation is None:
+            self.report({'WARNING'}, f"There are no earlier versions of {self._published_name} in the backup store")
+            return {'CANCELLED'}
+        self.report({'INFO'}, f"Restored {self._published_name} from {time.ctime(generation.time_ns / 1e9)}")
+        return {'FINISHED'}
+
+    def execute(self, context) -> Set[str]:
+        self._published_name = libstatus.published_name_for_open_file()
+        if not self.path or not self._published_name:
+            self.report({'ERROR'}, 'Internal error: Path not provided to operator')
+            return {'CANCELLED'}
+
+        if self._in_background:
+            # Waiting for a lock would only leave the progress bar sitting there, so give up right away if it's held
+            job = jobs.BackgroundJob(backups.restore_previous, self.path, self._published_name, timeout=0)
+            return self._start_job(context, job, f"Restoring {self._published_name}...")
+
+        try:
+            generation = backups.restore_previous(self.path, self._published_name)
+        except (OSError, lock.LockTimeoutException) as e:
+            return self._report_error(e)
+        finally:
+            libstatus.invalidate(self.path)
+        return self._finish(generation)
+
+
+REGISTER_CLASSES = [COPYTOASSETLIBRARY_OT_restore_previous]
@@ -0,0 +1,92 @@
+import bpy
+import time
+from typing import Set
+from bpy.types import Operator
+from bpy.props import StringProperty
+from ..lib import lazy
+from . import batch as batch_copy
+
+# Loaded when the report is run (see lib/lazy.py)
+pubindex = lazy.lazy_import("..lib.pubindex", __package__)
+
+if "_LOADED" in locals():
+    import importlib
+
+    for mod in (lazy, batch_copy, pubindex,):  # list all imports here
+        importlib.reload(mod)
+_LOADED = True
+
+# Popups get unwieldy past this many lines, so the rest are only printed to the console
+MAX_REPORT_LINES = 30
+
+
+def _reason_text(reason: str) -> str:
+    return {
+        pubindex.SOURCE_MISSING: "source file is missing",
+        pubindex.SOURCE_CHANGED: "source file has changed",
+        pubindex.DESTINATION_CHANGED: "published file was changed or removed",
+    }[reason]
+
+
+def _republishable(library_path: str) -> list[str]:
+    return sorted({s.entry.source_path for s in pubindex.stale(library_path) if s.reason != pubindex.SOURCE_MISSING})
+
+
+class COPYTOASSETLIBRARY_OT_stale_report(Operator):
+    """List the files in an Asset Library that are out of date with their source files, from the library's publish
+    index"""
+    bl_idname = "copy_to_asset_library.stale_report"
+    bl_label = "Stale Files Report"
+    bl_options = {'REGISTER'}
+
+    path: StringProperty(name="path", description="Asset Library path")
+
+    def execute(self, context) -> Set[str]:
+        if not self.path:
+            self.report({'ERROR'}, 'Internal error: Path not provided to operator')
+            return {'CANCELLED'}
+
+        start = time.perf_counter()
+        stale = pubindex.stale(self.path)
+        print(f"Found {len(stale)} stale files in {self.path} in {time.perf_counter() - start:.3f}s")
+        lines = [f"{s.entry.destination_name}: {_reason_text(s.reason)}" for s in stale]
+        for line in lines:
+            print(f"  {line}")
+
+        if not stale:
+            self.report({'INFO'}, "Everything in the publish index is up to date")
+            return {'FINISHED'}
+
+        if len(lines) > MAX_REPORT_LINES:
+            lines = lines[:MAX_REPORT_LINES] + [f"...and {len(lines) - MAX_REPORT_LINES} more (see the console)"]
+        path = self.path
+        republishable = any(s.reason != pubindex.SOURCE_MISSING for s in stale)
+
+        def report_menu(menu, _) -> None:
+            layout = menu.layout.column()
+            if republishable:
+                layout.operator_context = 'INVOKE_DEFAULT'
+                oper = layout.operator(COPYTOASSETLIBRARY_OT_republish_stale.bl_idname, text="Republish stale files")
+                oper.path = path
+                layout.separator()
+            for line in lines:
+                layout.label(text=f" \u25BA {line}")
+
+        context.window_manager.popup_menu(report_menu, title=f"{len(stale)} stale files", icon="INFO")
+        return {'FINISHED'}
+
+
+class COPYTOASSETLIBRARY_OT_republish_stale(batch_copy.COPYTOASSETLIBRARY_OT_batch):
+    """Publish the source files of everything in an Asset Library that's out of date again"""
+    bl_idname = "copy_to_asset_library.republish_stale"
+    bl_label = "Republish Stale Files"
+    bl_options = {'REGISTER'}
+
+    def invoke(self, context, event) -> Set[str]:
+        return self.execute(context)
+
+    def _selected_files(self) -> list[str]:
+        return _republishable(self.path)
+
+
+REGISTER_CLASSES = [COPYTOASSETLIBRARY_OT_stale_report, COPYTOASSETLIBRARY_OT_republish_stale]
@@ -1,17 +1,24 @@
 import bpy
 
 from ..lib import pkginfo
+from ..lib import addon
+from ..lib import metrics
 
 if "_LOADED" in locals():
     import importlib
 
-    for mod in (pkginfo,):  # list all imports here
+    for mod in (pkginfo, addon, metrics,):  # list all imports here
         importlib.reload(mod)
 _LOADED = True
 
 package_name = pkginfo.package_name()
 
 
+def _load_metrics(prefs, _context=None) -> None:
+    """Read the timing log into the summary's cache, so draw() never has to read it"""
+    metrics.load_history_in_background(bpy.path.abspath(prefs.metrics_log) if prefs.metrics_log else None)
+
+
 class COPYTOASSETLIBRARY_PT_preferences(bpy.types.AddonPreferences):
     bl_idname = package_name
     create_symlinks: bpy.props.BoolProperty(
@@ -19,6 +26,19 @@ class COPYTOASSETLIBRARY_PT_preferences(bpy.types.AddonPreferences):
         description="Create symbolic links to the file instead of copying the file",
         default=False
     )
+    link_strategy: bpy.props.EnumProperty(
+        name="Saved files",
+        description="How to copy a file that's saved and unmodified",
+        items=[
+            ('AUTO', "Link or copy automatically", "Use the file on disk as-is when it's already compressed the way "
+                                                   "the copy should be, picking the cheapest way the Asset Library's "
+                                                   "drive supports: a copy-on-write clone, a hard link, or a plain "
+                                                   "file copy"),
+            ('SAVE', "Save a copy", "Always save a copy through Blender, as with unsaved files. The copy is "
+                                    "written by this version of Blender"),
+        ],
+        default='AUTO'
+    )
     allow_unsaved: bpy.props.BoolProperty(
         name="Snapshot unsaved files",
         description="If the file is modified and unsaved, save the current state of the file to the Asset Library. "
@@ -32,14 +52,95 @@ class COPYTOASSETLIBRARY_PT_preferences(bpy.types.AddonPreferences):
                     "because the \"Save a Copy\" feature is used to compress the file.)",
         default=True
     )
+    publish_codec: bpy.props.EnumProperty(
+        name="Compression",
+        description="How to compress the copy in the Asset Library",
+        items=[
+            ('BLENDER', "Blender default", "Use Blender's own compression, following \"Always save compressed\""),
+            ('NONE', "None", "Save the copy uncompressed, for the fastest loading on fast drives"),
+            ('ZSTD', "Zstandard (custom level)", "Save uncompressed, then re-encode with Zstandard at the given "
+                                                 "level using multiple threads. Needs the zstandard Python module"),
+        ],
+        default='BLENDER'
+    )
+    zstd_level: bpy.props.IntProperty(
+        name="Zstandard level",
+        description="Higher levels make smaller files that take longer to publish, but aren't slower to load",
+        default=9, min=1, max=22
+    )
+    zstd_threads: bpy.props.IntProperty(
+        name="Threads",
+        description="Threads used to re-encode the file (0 uses all cores)",
+        default=0, min=0
+    )
     normalize_numeric_suffix: bpy.props.BoolProperty(
         name="Replace numeric suffixes with \"_latest\"",
         description="Replace numeric suffixes with \"latest\" (e.g., MyFile01.blend -> MyFile_latest.blend)",
         default=True
     )
     create_backup: bpy.props.BoolProperty(
-        name="Move existing files to a .blend1 backup file",
-        description="If the file already exists, move it to a \".blend1\" file",
+        name="Back up existing files",
+        description="If the file already exists, keep a backup of it before replacing it",
+        default=True
+    )
+    backup_style: bpy.props.EnumProperty(
+        name="Backups",
+        description="How to keep backups of replaced files",
+        items=[
+            ('BLEND1', ".blend1 file", "Keep the replaced file as a \".blend1\" file, keeping only one backup. It's "
+                                       "hard linked, or moved on drives without hard links"),
+            ('STORE', "Backup store", "Keep several generations in a hidden backup store in the Asset Library. "
+                                      "Identical generations are only stored once"),
+        ],
+        default='BLEND1'
+    )
+    backup_generations: bpy.props.IntProperty(
+        name="Generations",
+        description="Number of backups to keep of each file",
+        default=5, min=1
+    )
+    backup_retention_days: bpy.props.FloatProperty(
+        name="Keep for days",
+        description="Also keep every backup newer than this many days (0 to only keep the set number of generations)",
+        default=0.0, min=0.0
+    )
+    skip_unchanged: bpy.props.BoolProperty(
+        name="Leave unchanged files alone",
+        description="If the copy is identical to the file already in the Asset Library, don't back up or "
+                    "replace it. This avoids needless re-syncing and library reloads. Applies to every copy (saved "
+                    "through a temporary file, linked or copied as-is, or to several libraries at once) but not to "
+                    "symlinks or to saving straight into the Asset Library.",
+        default=True
+    )
+    pack_on_publish: bpy.props.BoolProperty(
+        name="Pack images into the copy",
+        description="Pack external images into the copy in the Asset Library, leaving the open file referring to "
+                    "the image files. Image data is cached between publishes, so unchanged images aren't read again",
+        default=False
+    )
+    assets_only: bpy.props.BoolProperty(
+        name="Only publish the assets",
+        description="Write only the datablocks marked as assets, and everything they use, into the Asset Library "
+                    "instead of the whole file. Scratch scenes and unused data are left out",
+        default=False
+    )
+    auto_publish_delay: bpy.props.FloatProperty(
+        name="Auto-publish delay",
+        description="For files set to auto-publish on save, wait this many seconds after the last save before "
+                    "publishing, so a quick run of saves only publishes once",
+        default=2.0, min=0.0, subtype='TIME_ABSOLUTE', unit='TIME_ABSOLUTE'
+    )
+    publish_index: bpy.props.BoolProperty(
+        name="Keep a publish index in each Asset Library",
+        description="Record what was published to each library, from where and when, in a small database in the "
+                    "library. This powers the stale files report",
+        default=True
+    )
+    write_manifest: bpy.props.BoolProperty(
+        name="Write asset manifests",
+        description="Write a small JSON file beside each published file listing its assets (name, type, catalog, "
+                    "tags and description), and keep a manifest of every published file's assets in each library, "
+                    "so library tools don't have to open the .blend files",
         default=True
     )
     append_catalog: bpy.props.BoolProperty(
@@ -56,29 +157,91 @@ class COPYTOASSETLIBRARY_PT_preferences(bpy.types.AddonPreferences):
     )
 
     save_copy_to_temp: bpy.props.BoolProperty(
-        name="Save to a temporary file, then copy to the Asset Library (Dropbox bug fix)",
-        description="Save the copy in a temporary directory first, then move it to the Asset Library. This works "
-                    "around a bug in Dropbox where files are not properly saved in Dropbox-synced directories. "
+        name="Save to a temporary file, then move it into place",
+        description="Save the copy to a hidden temporary file in the Asset Library first, then swap it in for the "
+                    "published file in one step, so the library never holds a half-written file. "
                     "Not applicable when Create Symlinks is set.",
         default=True
     )
+    stage_outside_library: bpy.props.BoolProperty(
+        name="Keep the temporary file out of the Asset Library (Dropbox bug fix)",
+        description="Save the temporary file in the system's temporary directory instead, then copy it into the "
+                    "Asset Library. This works around a bug in Dropbox where files are not properly saved in "
+                    "Dropbox-synced directories, at the cost of copying the file rather than renaming it",
+        default=False
+    )
+    resumable_transfer: bpy.props.BoolProperty(
+        name="Resumable copies (for slow or unreliable network drives)",
+        description="Copy into the Asset Library in large chunks, keeping track of what's been copied so a dropped "
+                    "connection (or a cancelled publish) carries on where it left off, and check the whole file "
+                    "before swapping it in. The copy is saved on this computer first",
+        default=False
+    )
+    bandwidth_limit: bpy.props.FloatProperty(
+        name="Bandwidth limit (MB/s)",
+        description="Copy no faster than this, so publishing doesn't saturate the network (0 for no limit)",
+        default=0.0, min=0.0
+    )
+    metrics_log: bpy.props.StringProperty(
+        name="Timing log",
+        description="Append how long each phase of every publish took to this file, one JSON record per line. "
+                    "Leave empty to only keep timings for this session",
+        subtype='FILE_PATH',
+        default="",
+        update=_load_metrics
+    )
+    show_metrics: bpy.props.BoolProperty(
+        name="Publish timings",
+        description="Show how long recent publishes took in each library",
+        default=False
+    )
     relative_remap: bpy.props.BoolProperty(
         name="Remap relative paths",
         description="Sets the option to remap relative paths in the saved file.",
         default=True
     )
 
+    @classmethod
+    def post_register(cls) -> None:
+        if addon_entry := bpy.context.preferences.addons.get(package_name):
+            _load_metrics(addon_entry.preferences)
+
     def draw(self, context) -> None:
         layout = self.layout
         layout.prop(self, 'create_symlinks')
         au_layout = layout.column()
         au_layout.enabled = not self.create_symlinks
+        au_layout.prop(self, 'link_strategy')
         au_layout.prop(self, 'allow_unsaved')
         ac_layout = layout.column()
         ac_layout.enabled = self.allow_unsaved and not self.create_symlinks
-        ac_layout.prop(self, 'always_compress')
+        ac_layout.prop(self, 'publish_codec')
+        blender_codec_layout = ac_layout.column()
+        blender_codec_layout.enabled = self.publish_codec == 'BLENDER'
+        blender_codec_layout.prop(self, 'always_compress')
+        zstd_layout = ac_layout.row()
+        zstd_layout.enabled = self.publish_codec == 'ZSTD'
+        zstd_layout.prop(self, 'zstd_level')
+        zstd_layout.prop(self, 'zstd_threads')
         layout.prop(self, 'normalize_numeric_suffix')
         layout.prop(self, 'create_backup')
+        backup_layout = layout.column()
+        backup_layout.enabled = self.create_backup
+        backup_layout.prop(self, 'backup_style')
+        retention_layout = backup_layout.row()
+        retention_layout.enabled = self.backup_style == 'STORE'
+        retention_layout.prop(self, 'backup_generations')
+        retention_layout.prop(self, 'backup_retention_days')
+        su_layout = layout.column()
+        su_layout.enabled = not self.create_symlinks
+        su_layout.prop(self, 'skip_unchanged')
+        pack_layout = layout.column()
+        pack_layout.enabled = not self.create_symlinks
+        pack_layout.prop(self, 'pack_on_publish')
+        pack_layout.prop(self, 'assets_only')
+        layout.prop(self, 'auto_publish_delay')
+        layout.prop(self, 'publish_index')
+        layout.prop(self, 'write_manifest')
         layout.prop(self, 'append_catalog')
         layout.prop(self, 'skip_preflight')
 
@@ -87,6 +250,37 @@ class COPYTOASSETLIBRARY_PT_preferences(bpy.types.AddonPreferences):
         db_layout = advanced_layout.column()
         db_layout.enabled = self.allow_unsaved and not self.create_symlinks
         db_layout.prop(self, 'save_copy_to_temp')
+        so_layout = db_layout.row()
+        so_layout.enabled = self.save_copy_to_temp
+        so_layout.prop(self, 'stage_outside_library')
+        rt_layout = advanced_layout.column()
+        rt_layout.enabled = not self.create_symlinks
+        rt_layout.prop(self, 'resumable_transfer')
+        bw_layout = rt_layout.row()
+        bw_layout.enabled = self.resumable_transfer
+        bw_layout.prop(self, 'bandwidth_limit')
+
+        self._draw_metrics(layout.box())
+
+    def _draw_metrics(self, layout) -> None:
+        layout.prop(self, 'show_metrics', icon='TRIA_DOWN' if self.show_metrics else 'TRIA_RIGHT', emboss=False)
+        if not self.show_metrics:
+            return
+        layout.prop(self, 'metrics_log')
+        layout.label(text=addon.startup_report(), icon='TIME')
+        libraries = metrics.libraries()
+        if not libraries:
+            layout.label(text="No publishes recorded yet")
+            return
+        for library in libraries:
+            summary = metrics.summary(library)
+            col = layout.column(align=True)
+            col.label(text=f"{library} ({summary[metrics.TOTAL][2]} publishes)", icon='ASSET_MANAGER')
+            for phase, (p50, p95, _count) in sorted(summary.items(), key=lambda item: item[0] == metrics.TOTAL):
+                row = col.row()
+                row.label(text=phase)
+                row.label(text=f"p50 {p50:.2f}s")
+                row.label(text=f"p95 {p95:.2f}s")
 
 
 REGISTER_CLASSES = [COPYTOASSETLIBRARY_PT_preferences]